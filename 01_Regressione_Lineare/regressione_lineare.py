@@ -1,58 +1,119 @@
 # Import delle librerie necessarie
+from contextlib import nullcontext
+
 import numpy as np
-import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
 
-# --- 1. Preparazione dei Dati (Esempio Semplice) ---
-# Supponiamo di avere dati sulla dimensione delle case (X) e il loro prezzo (y)
-# X = np.array([[50], [60], [70], [80], [90], [100], [110], [120], [130], [140]]) # Mq
-# y = np.array([150, 180, 210, 240, 270, 300, 330, 360, 390, 420]) # Prezzo in migliaia di €
-
-# Generiamo dati casuali più realistici per l'esempio
-np.random.seed(42) # Per riproducibilità
-X = np.sort(np.random.rand(50, 1) * 100 + 50, axis=0) # Dimensioni case tra 50 e 150 mq
-y = (2.5 * X.flatten() + np.random.randn(50) * 50 + 20).flatten() # Prezzo con un po' di rumore
-
-# --- 2. Divisione dei Dati in Training Set e Test Set ---
-# X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-# Per questo esempio semplice con pochi dati, usiamo tutti i dati per il training,
-# ma in pratica la divisione è FONDAMENTALE.
-# Qui usiamo X e y direttamente per semplicità didattica.
-# Se vuoi mostrare la divisione, decommenta la riga sopra e usa X_train, y_train per fit()
-# e X_test, y_test per predict() e score().
-
-# --- 3. Creazione e Addestramento del Modello ---
-model = LinearRegression()
-model.fit(X, y) # Addestriamo il modello
-
-# --- 4. Effettuare Predizioni ---
-y_pred = model.predict(X) # Prediciamo i prezzi usando le dimensioni X
-
-# --- 5. Valutazione del Modello ---
-# (Se avessimo usato train_test_split, valuteremmo su X_test, y_test)
-mse = mean_squared_error(y, y_pred)
-r2 = r2_score(y, y_pred)
-
-print("--- Regressione Lineare ---")
-print(f"Coefficiente (pendenza): {model.coef_[0]:.2f}")
-print(f"Intercetta: {model.intercept_:.2f}")
-print(f"Mean Squared Error (MSE): {mse:.2f}")
-print(f"R-squared (R²): {r2:.2f}")
-
-# --- 6. Visualizzazione ---
-plt.figure(figsize=(10, 6))
-plt.scatter(X, y, color='blue', label='Dati Reali')
-plt.plot(X, y_pred, color='red', linewidth=2, label='Regressione Lineare')
-plt.xlabel("Dimensione Casa (mq)")
-plt.ylabel("Prezzo (migliaia di €)")
-plt.title("Regressione Lineare: Prezzo Casa vs. Dimensione")
-plt.legend()
-plt.grid(True)
-plt.show()
-
-# Predizione per una nuova casa
-nuova_casa_mq = np.array([[105]])
-prezzo_predetto = model.predict(nuova_casa_mq)
-print(f"\nPrezzo predetto per una casa di {nuova_casa_mq[0][0]} mq: {prezzo_predetto[0]:.2f} mila €")
\ No newline at end of file
+
+def main(fase=nullcontext, disegna=True, mostra_grafico=None, dimostrazioni=True, dati=None):
+    """Esegue l'intero esempio di Regressione Lineare e restituisce i risultati principali.
+
+    - fase: funzione che riceve il nome di una fase ('load', 'fit', 'predict', 'evaluate',
+      'plot', ...) e restituisce un context manager. Di default non fa nulla; il runner
+      utils/esegui.py la usa per misurare tempo e memoria di ogni fase.
+    - disegna: se False i grafici non vengono creati (utile su un server senza display).
+    - mostra_grafico: chiamata con il nome del grafico al posto di plt.show()
+      (es. per salvarlo su file).
+    - dimostrazioni: se False salta le sezioni di confronto extra (es. la modalità streaming).
+    - dati: coppia (X, y) da usare al posto del dataset dell'esempio, ad es. un dataset
+      grande generato con utils/dataset.py e aperto con carica_dataset (memory-map).
+    """
+    if disegna:
+        # matplotlib viene importato solo se servono i grafici: il solo import richiede
+        # più tempo dell'addestramento di questi esempi
+        import matplotlib.pyplot as plt
+        if mostra_grafico is None:
+            mostra_grafico = lambda nome: plt.show()
+
+    # --- 1. Preparazione dei Dati (Esempio Semplice) ---
+    # Supponiamo di avere dati sulla dimensione delle case (X) e il loro prezzo (y)
+    # X = np.array([[50], [60], [70], [80], [90], [100], [110], [120], [130], [140]]) # Mq
+    # y = np.array([150, 180, 210, 240, 270, 300, 330, 360, 390, 420]) # Prezzo in migliaia di €
+
+    with fase('load'):
+        if dati is None:
+            # Generiamo dati casuali più realistici per l'esempio
+            np.random.seed(42) # Per riproducibilità
+            X = np.sort(np.random.rand(50, 1) * 100 + 50, axis=0) # Dimensioni case tra 50 e 150 mq
+            y = (2.5 * X.flatten() + np.random.randn(50) * 50 + 20).flatten() # Prezzo con un po' di rumore
+        else:
+            X, y = dati
+
+    # --- 2. Divisione dei Dati in Training Set e Test Set ---
+    # from sklearn.model_selection import train_test_split
+    # X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    # Per questo esempio semplice con pochi dati, usiamo tutti i dati per il training,
+    # ma in pratica la divisione è FONDAMENTALE.
+    # Qui usiamo X e y direttamente per semplicità didattica.
+    # Se vuoi mostrare la divisione, decommenta le righe sopra e usa X_train, y_train per fit()
+    # e X_test, y_test per predict() e score().
+
+    # --- 3. Creazione e Addestramento del Modello ---
+    with fase('fit'):
+        model = LinearRegression()
+        model.fit(X, y) # Addestriamo il modello
+
+    # --- 4. Effettuare Predizioni ---
+    with fase('predict'):
+        y_pred = model.predict(X) # Prediciamo i prezzi usando le dimensioni X
+
+    # --- 5. Valutazione del Modello ---
+    # (Se avessimo usato train_test_split, valuteremmo su X_test, y_test)
+    with fase('evaluate'):
+        mse = mean_squared_error(y, y_pred)
+        r2 = r2_score(y, y_pred)
+
+    print("--- Regressione Lineare ---")
+    print(f"Coefficiente (pendenza): {model.coef_[0]:.2f}")
+    print(f"Intercetta: {model.intercept_:.2f}")
+    print(f"Mean Squared Error (MSE): {mse:.2f}")
+    print(f"R-squared (R²): {r2:.2f}")
+
+    # --- 5b. Modalità Streaming (dati che non entrano in memoria) ---
+    # Con centinaia di milioni di righe non possiamo tenere X e y in RAM.
+    # RegressioneLineareStreaming legge i dati a blocchi e accumula XᵀX e Xᵀy:
+    # otteniamo gli stessi coefficienti, MSE e R² usando memoria costante.
+    # (Per leggere da file usa leggi_chunk_csv / leggi_chunk_npy, vedi regressione_streaming.py)
+    if dimostrazioni:
+        from regressione_streaming import RegressioneLineareStreaming
+
+        with fase('streaming'):
+            # Sui 50 punti dell'esempio chunk da 10 righe, solo per mostrare il meccanismo; sui
+            # dataset grandi circa 100 chunk (al massimo un milione di righe ciascuno)
+            dimensione_chunk = min(max(10, len(X) // 100), 1_000_000)
+            chunks = ((X[i:i + dimensione_chunk], y[i:i + dimensione_chunk])
+                      for i in range(0, len(X), dimensione_chunk))
+            model_streaming = RegressioneLineareStreaming().fit_chunks(chunks)
+
+        print(f"\n--- Regressione Lineare (streaming, chunk da {dimensione_chunk} righe) ---")
+        print(f"Coefficiente (pendenza): {model_streaming.coef_[0]:.2f}")
+        print(f"Intercetta: {model_streaming.intercept_:.2f}")
+        print(f"Mean Squared Error (MSE): {model_streaming.mse_:.2f}")
+        print(f"R-squared (R²): {model_streaming.r2_:.2f}")
+
+    # --- 6. Visualizzazione ---
+    if disegna:
+        with fase('plot'):
+            plt.figure(figsize=(10, 6))
+            plt.scatter(X, y, color='blue', label='Dati Reali')
+            plt.plot(X, y_pred, color='red', linewidth=2, label='Regressione Lineare')
+            plt.xlabel("Dimensione Casa (mq)")
+            plt.ylabel("Prezzo (migliaia di €)")
+            plt.title("Regressione Lineare: Prezzo Casa vs. Dimensione")
+            plt.legend()
+            plt.grid(True)
+            mostra_grafico("regressione")
+
+    # Predizione per una nuova casa
+    if X.shape[1] == 1:
+        nuova_casa_mq = np.array([[105]])
+        prezzo_predetto = model.predict(nuova_casa_mq)
+        print(f"\nPrezzo predetto per una casa di {nuova_casa_mq[0][0]} mq: {prezzo_predetto[0]:.2f} mila €")
+
+    # Qui il "test set" sono tutti i dati, gli stessi usati per MSE e R²
+    return {'model': model, 'mse': mse, 'r2': r2, 'X_test': X, 'y_test': y}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+# Regressione Lineare "streaming" (out-of-core)
+#
+# Quando i dati non entrano in memoria non possiamo chiamare LinearRegression().fit(X, y)
+# una volta sola. Possiamo però leggere i dati a blocchi (chunk) e accumulare le
+# "statistiche sufficienti" delle equazioni normali:
+#
+#     (X̃ᵀX̃) β = X̃ᵀy      dove X̃ = [X, 1] (la colonna di 1 serve per l'intercetta)
+#
+# X̃ᵀX̃ ha dimensione (n_features + 1) x (n_features + 1) e X̃ᵀy ha n_features + 1 elementi:
+# la memoria usata resta costante anche se le righe diventano centinaia di milioni.
+# Accumulando anche Σy e Σy² possiamo calcolare MSE e R² senza una seconda passata.
+#
+# Le stesse statistiche permettono l'apprendimento ONLINE: quando arrivano nuove case
+# basta chiamare partial_fit con le nuove righe. Il costo dipende solo dalla dimensione
+# del blocco (più un sistema (n_features + 1) x (n_features + 1)), non da quanti dati
+# sono stati visti prima. Se i prezzi cambiano nel tempo (drift), con fattore_oblio < 1
+# i campioni vecchi pesano sempre meno (minimi quadrati ricorsivi con oblio esponenziale).
+#
+# Confronto con un riaddestramento periodico completo su dati che cambiano nel tempo:
+#   python regressione_streaming.py --benchmark-drift
+import argparse
+import time
+
+import numpy as np
+
+
+class RegressioneLineareStreaming:
+    """Regressione lineare ai minimi quadrati addestrata a blocchi.
+
+    Dopo `fit_chunks` (o una serie di `partial_fit`) espone gli stessi attributi di
+    `LinearRegression` (`coef_`, `intercept_`) più `mse_` e `r2_` calcolati sui dati
+    di addestramento, come fa lo script `regressione_lineare.py`.
+
+    - fattore_oblio: peso (tra 0 e 1) che ogni campione perde ad ogni nuovo campione.
+      Con 1.0 (default) tutti i campioni contano allo stesso modo e il risultato coincide
+      con LinearRegression; con ad es. 0.9999 il modello "ricorda" circa gli ultimi
+      1 / (1 - 0.9999) = 10000 campioni e segue i dati che cambiano nel tempo.
+
+    Il modello si può interrogare (predict) mentre un altro thread chiama partial_fit:
+    coefficienti e intercetta vengono sostituiti insieme, alla fine dell'aggiornamento,
+    quindi predict usa sempre una coppia coerente (le chiamate a partial_fit invece
+    vanno fatte da un solo thread alla volta).
+    """
+
+    def __init__(self, fattore_oblio=1.0):
+        if not 0.0 < fattore_oblio <= 1.0:
+            raise ValueError(f"fattore_oblio deve essere in (0, 1], ricevuto {fattore_oblio}")
+        self.fattore_oblio = fattore_oblio
+        self.n_samples_seen_ = 0
+        self._peso = 0.0  # Somma dei pesi dei campioni (= n_samples_seen_ senza oblio)
+        self._x0 = None  # Traslazione applicata alle features (media del primo chunk)
+        self._y0 = None  # Traslazione applicata al target
+        self._XtX = None
+        self._Xty = None
+        self._sum_y = 0.0
+        self._sum_y2 = 0.0
+
+    def partial_fit(self, X, y):
+        """Accumula le statistiche di un chunk (X: (n, n_features), y: (n,)) e aggiorna i coefficienti."""
+        if self._accumula(X, y):
+            self._risolvi()
+        return self
+
+    def _accumula(self, X, y):
+        """Aggiunge un chunk alle statistiche senza risolvere il sistema; False se il chunk è vuoto."""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64).ravel()
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        if X.shape[0] != y.shape[0]:
+            raise ValueError(f"X e y hanno un numero di righe diverso: {X.shape[0]} != {y.shape[0]}")
+        if X.shape[0] == 0:
+            return False
+
+        if self._XtX is None:
+            # Trasliamo i dati usando la media del primo chunk: il risultato non cambia,
+            # ma le somme restano numericamente stabili anche con moltissime righe.
+            n_features = X.shape[1]
+            self._x0 = X.mean(axis=0)
+            self._y0 = y.mean()
+            self._XtX = np.zeros((n_features + 1, n_features + 1))
+            self._Xty = np.zeros(n_features + 1)
+        elif X.shape[1] != self._x0.shape[0]:
+            raise ValueError(f"Il chunk ha {X.shape[1]} features, attese {self._x0.shape[0]}")
+
+        Xc = np.empty((X.shape[0], X.shape[1] + 1))
+        np.subtract(X, self._x0, out=Xc[:, :-1])
+        Xc[:, -1] = 1.0
+        yc = y - self._y0
+
+        n = X.shape[0]
+        if self.fattore_oblio == 1.0:
+            Xw, yw, peso = Xc, yc, float(n)
+        else:
+            # L'ultima riga del blocco ha peso 1, la penultima λ, ...; le statistiche già
+            # accumulate vengono moltiplicate per λ^n, come se avessimo visto le righe una a una.
+            pesi = self.fattore_oblio ** np.arange(n - 1, -1, -1, dtype=np.float64)
+            Xw, yw, peso = Xc * pesi[:, None], yc * pesi, float(pesi.sum())
+            decadimento = self.fattore_oblio ** n
+            self._XtX *= decadimento
+            self._Xty *= decadimento
+            self._sum_y *= decadimento
+            self._sum_y2 *= decadimento
+            self._peso *= decadimento
+
+        self._XtX += Xw.T @ Xc
+        self._Xty += Xw.T @ yc
+        self._sum_y += yw.sum()
+        self._sum_y2 += yw @ yc
+        self._peso += peso
+        self.n_samples_seen_ += n
+        return True
+
+    def fit_chunks(self, chunks):
+        """Addestra il modello da un iterabile di coppie (X_chunk, y_chunk).
+
+        Il sistema viene risolto una sola volta, dopo l'ultimo chunk: con molti chunk
+        risolverlo ad ogni blocco (come fa partial_fit) sarebbe lavoro sprecato.
+        """
+        for X_chunk, y_chunk in chunks:
+            self._accumula(X_chunk, y_chunk)
+        if self.n_samples_seen_ == 0:
+            raise ValueError("Nessun dato letto: l'iterabile dei chunk è vuoto.")
+        self._risolvi()
+        return self
+
+    def _risolvi(self):
+        # lstsq restituisce la soluzione a norma minima anche se X̃ᵀX̃ è singolare,
+        # come fa LinearRegression quando le features sono collineari.
+        beta = np.linalg.lstsq(self._XtX, self._Xty, rcond=None)[0]
+        b, c = beta[:-1], beta[-1]
+        # Una sola assegnazione: chi sta chiamando predict vede la coppia vecchia o quella nuova
+        self._parametri = (b, c + self._y0 - self._x0 @ b)
+
+        # SSE = yᵀy - 2βᵀX̃ᵀy + βᵀX̃ᵀX̃β (sui dati traslati, la traslazione non cambia i residui)
+        n = self._peso
+        sse = max(self._sum_y2 - 2 * beta @ self._Xty + beta @ self._XtX @ beta, 0.0)
+        sst = self._sum_y2 - self._sum_y ** 2 / n
+        self.mse_ = sse / n
+        self.r2_ = 1.0 - sse / sst if sst > 0 else 0.0
+
+    @property
+    def coef_(self):
+        try:
+            return self._parametri[0]
+        except AttributeError:
+            raise AttributeError("Il modello non è ancora stato addestrato") from None
+
+    @property
+    def intercept_(self):
+        try:
+            return self._parametri[1]
+        except AttributeError:
+            raise AttributeError("Il modello non è ancora stato addestrato") from None
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+        coef, intercetta = self._parametri
+        return X @ coef + intercetta
+
+
+# --- Lettura dei dati a blocchi ---
+
+def leggi_chunk_npy(percorso_X, percorso_y, chunk_size=1_000_000):
+    """Legge coppie (X, y) da due file .npy in memory-map, senza caricarli interi in RAM."""
+    X = np.load(percorso_X, mmap_mode='r')
+    y = np.load(percorso_y, mmap_mode='r')
+    if X.shape[0] != y.shape[0]:
+        raise ValueError(f"{percorso_X} e {percorso_y} hanno un numero di righe diverso")
+    for inizio in range(0, X.shape[0], chunk_size):
+        fine = inizio + chunk_size
+        yield np.asarray(X[inizio:fine]), np.asarray(y[inizio:fine])
+
+
+def leggi_chunk_csv(percorso, colonna_target, chunk_size=1_000_000, colonne_features=None, sep=','):
+    """Legge coppie (X, y) da un file CSV, un blocco di `chunk_size` righe alla volta."""
+    import pandas as pd
+
+    for df in pd.read_csv(percorso, sep=sep, chunksize=chunk_size):
+        features = colonne_features or [c for c in df.columns if c != colonna_target]
+        yield df[features].to_numpy(dtype=np.float64), df[colonna_target].to_numpy(dtype=np.float64)
+
+
+# --- Benchmark: dati che cambiano nel tempo (drift) ---
+
+def flusso_case_con_drift(n_blocchi, dimensione_blocco, random_state=42):
+    """Blocchi (X, y) di case in cui il prezzo al mq cresce nel tempo.
+
+    Il prezzo al mq passa gradualmente da 2.5 a 3.5 e al 60% del flusso fa un salto di +1
+    (ad es. un cambiamento improvviso del mercato). Restituisce anche il coefficiente vero.
+    """
+    rng = np.random.default_rng(random_state)
+    for t in range(n_blocchi):
+        avanzamento = t / max(n_blocchi - 1, 1)
+        coefficiente = 2.5 + avanzamento + (1.0 if avanzamento >= 0.6 else 0.0)
+        X = rng.random((dimensione_blocco, 1)) * 100 + 50 # Dimensioni case tra 50 e 150 mq
+        y = coefficiente * X[:, 0] + 20 + rng.standard_normal(dimensione_blocco) * 50
+        yield X, y, coefficiente
+
+
+def benchmark_drift(n_blocchi=200, dimensione_blocco=500, finestra=20_000, ogni=20, random_state=42):
+    """Confronta l'aggiornamento online con il riaddestramento periodico completo.
+
+    Errore "prequenziale": ogni blocco viene prima predetto con il modello attuale e solo
+    dopo usato per aggiornarlo, come succede in produzione con le nuove case.
+    - finestra: campioni ricordati (oblio 1 - 1/finestra; righe usate dal riaddestramento).
+    - ogni: il riaddestramento completo viene rifatto ogni `ogni` blocchi.
+    """
+    from collections import deque
+    from sklearn.linear_model import LinearRegression
+
+    class RiaddestramentoPeriodico:
+        # LinearRegression rifatta da zero sulle ultime `finestra` righe ogni `ogni` blocchi
+        def __init__(self):
+            self.blocchi, self.n_visti, self.modello = deque(), 0, None
+
+        def partial_fit(self, X, y):
+            self.blocchi.append((X, y))
+            while sum(len(b[1]) for b in self.blocchi) - len(self.blocchi[0][1]) >= finestra:
+                self.blocchi.popleft()
+            self.n_visti += 1
+            if self.modello is None or self.n_visti % ogni == 0:
+                self.modello = LinearRegression().fit(np.vstack([b[0] for b in self.blocchi]),
+                                                      np.concatenate([b[1] for b in self.blocchi]))
+
+        def predict(self, X):
+            return self.modello.predict(X)
+
+        @property
+        def coef_(self):
+            return self.modello.coef_
+
+    modelli = {
+        f'online, oblio 1-1/{finestra}': RegressioneLineareStreaming(fattore_oblio=1 - 1 / finestra),
+        'online, senza oblio': RegressioneLineareStreaming(),
+        f'riaddestramento ogni {ogni} blocchi': RiaddestramentoPeriodico(),
+    }
+    risultati = {nome: {'errore': 0.0, 'n': 0, 'tempi': []} for nome in modelli}
+    for t, (X, y, _) in enumerate(flusso_case_con_drift(n_blocchi, dimensione_blocco, random_state)):
+        for nome, modello in modelli.items():
+            r = risultati[nome]
+            if t > 0:
+                r['errore'] += float(np.sum((modello.predict(X) - y) ** 2))
+                r['n'] += len(y)
+            inizio = time.perf_counter()
+            modello.partial_fit(X, y)
+            r['tempi'].append(time.perf_counter() - inizio)
+    return {nome: {'mse_prequenziale': r['errore'] / r['n'], 'tempo_totale_s': sum(r['tempi']),
+                   'aggiornamento_max_ms': max(r['tempi']) * 1000,
+                   'coef_finale': float(modelli[nome].coef_[0])}
+            for nome, r in risultati.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regressione lineare out-of-core su file CSV o .npy")
+    parser.add_argument("dati", nargs='?', help="File CSV, oppure file .npy con le features")
+    parser.add_argument("--target", help="Nome della colonna target (CSV) oppure file .npy con il target")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000, help="Righe lette per blocco")
+    parser.add_argument("--sep", default=',', help="Separatore del CSV")
+    parser.add_argument("--benchmark-drift", action='store_true',
+                        help="Confronta aggiornamento online e riaddestramento periodico su dati con drift")
+    args = parser.parse_args()
+
+    if args.benchmark_drift:
+        print("--- Regressione online vs riaddestramento periodico (dati con drift) ---")
+        print(f"{'modello':<34} {'MSE prequenziale':>17} {'tempo totale':>13} {'agg. max':>10} {'pendenza finale':>16}")
+        for nome, r in benchmark_drift().items():
+            print(f"{nome:<34} {r['mse_prequenziale']:>17.1f} {r['tempo_totale_s']:>12.3f}s "
+                  f"{r['aggiornamento_max_ms']:>8.2f}ms {r['coef_finale']:>16.2f}")
+        print("Pendenza vera alla fine del flusso: 4.50")
+        return
+    if args.dati is None or args.target is None:
+        parser.error("servono il file dei dati e --target (oppure --benchmark-drift)")
+
+    if args.dati.endswith('.npy'):
+        chunks = leggi_chunk_npy(args.dati, args.target, args.chunk_size)
+    else:
+        chunks = leggi_chunk_csv(args.dati, args.target, args.chunk_size, sep=args.sep)
+
+    model = RegressioneLineareStreaming().fit_chunks(chunks)
+
+    print("--- Regressione Lineare (streaming) ---")
+    print(f"Campioni letti: {model.n_samples_seen_}")
+    print(f"Coefficienti: {np.array2string(model.coef_, precision=2)}")
+    print(f"Intercetta: {model.intercept_:.2f}")
+    print(f"Mean Squared Error (MSE): {model.mse_:.2f}")
+    print(f"R-squared (R²): {model.r2_:.2f}")
+
+
+if __name__ == "__main__":
+    main()
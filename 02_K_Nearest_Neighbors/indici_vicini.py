@@ -0,0 +1,217 @@
+# Indici per la ricerca dei vicini (K-Nearest Neighbors)
+#
+# KNeighborsClassifier, per ogni punto da classificare, deve trovare i k punti di
+# training più vicini. Con milioni di vettori (e molte features) la ricerca esatta
+# diventa lenta: questo modulo separa la "ricerca dei vicini" (l'indice) dal
+# "voto di maggioranza" (il classificatore), così da poter scegliere l'indice:
+#
+# - IndiceEsatto: KD-tree, Ball-tree o forza bruta (risultati identici a scikit-learn).
+# - IndiceIVF: indice approssimato "Inverted File". I punti vengono divisi in
+#   `n_liste` gruppi con K-Means; per ogni query si cercano i vicini solo nei
+#   `n_sonde` gruppi con il centroide più vicino. Più sonde = recall più alta ma
+#   ricerca più lenta: è la manopola recall/latenza.
+import time
+
+import numpy as np
+
+
+def _distanze_quadrate(A, B, norme_B=None):
+    """Distanze euclidee al quadrato tra le righe di A e le righe di B, in forma vettoriale."""
+    if norme_B is None:
+        norme_B = np.einsum('ij,ij->i', B, B)
+    D = np.einsum('ij,ij->i', A, A)[:, None] - 2.0 * (A @ B.T) + norme_B[None, :]
+    np.maximum(D, 0.0, out=D)  # Evita piccoli valori negativi dovuti agli arrotondamenti
+    return D
+
+
+def _centroide_piu_vicino(A, centroidi, dimensione_blocco=65_536):
+    """Indice del centroide più vicino per ogni riga di A, calcolato a blocchi.
+
+    Per l'argmin il termine ||a||² è costante su ogni riga: basta -2 a·c + ||c||².
+    """
+    norme_c = np.einsum('ij,ij->i', centroidi, centroidi)
+    etichette = np.empty(A.shape[0], dtype=np.intp)
+    for inizio in range(0, A.shape[0], dimensione_blocco):
+        D = A[inizio:inizio + dimensione_blocco] @ centroidi.T
+        D *= -2.0
+        D += norme_c
+        etichette[inizio:inizio + dimensione_blocco] = D.argmin(axis=1)
+    return etichette
+
+
+class IndiceEsatto:
+    """Ricerca esatta dei vicini con KD-tree, Ball-tree o forza bruta.
+
+    - algoritmo: 'kd_tree', 'ball_tree' o 'brute'.
+    - leaf_size: numero di punti nelle foglie dell'albero (influisce solo sulla velocità).
+    """
+
+    def __init__(self, algoritmo='kd_tree', leaf_size=40):
+        if algoritmo not in ('kd_tree', 'ball_tree', 'brute'):
+            raise ValueError(f"Algoritmo sconosciuto: {algoritmo!r}")
+        self.algoritmo = algoritmo
+        self.leaf_size = leaf_size
+
+    def fit(self, X):
+        self._X = np.ascontiguousarray(X, dtype=np.float64)
+        if self.algoritmo == 'kd_tree':
+            from sklearn.neighbors import KDTree
+            self._albero = KDTree(self._X, leaf_size=self.leaf_size)
+        elif self.algoritmo == 'ball_tree':
+            from sklearn.neighbors import BallTree
+            self._albero = BallTree(self._X, leaf_size=self.leaf_size)
+        else:
+            self._norme = np.einsum('ij,ij->i', self._X, self._X)
+        return self
+
+    def kneighbors(self, Q, k):
+        """Restituisce (distanze, indici) dei k vicini di ogni riga di Q, ordinati per distanza."""
+        Q = np.asarray(Q, dtype=np.float64)
+        if self.algoritmo != 'brute':
+            return self._albero.query(Q, k=k)
+        D = _distanze_quadrate(Q, self._X, self._norme)
+        if k < D.shape[1]:
+            idx = np.argpartition(D, k - 1, axis=1)[:, :k]
+        else:
+            idx = np.tile(np.arange(D.shape[1]), (len(Q), 1))
+        d = np.take_along_axis(D, idx, axis=1)
+        ordine = np.argsort(d, axis=1, kind='stable')
+        return np.sqrt(np.take_along_axis(d, ordine, axis=1)), np.take_along_axis(idx, ordine, axis=1)
+
+
+class IndiceIVF:
+    """Indice approssimato Inverted File (IVF) scritto in NumPy.
+
+    - n_liste: numero di gruppi (liste invertite). Di solito circa sqrt(n_campioni).
+    - n_sonde: quante liste visitare per ogni query (1 <= n_sonde <= n_liste).
+      Con n_sonde = n_liste la ricerca torna esatta.
+    - n_iter: iterazioni di K-Means per calcolare i centroidi delle liste.
+    - campioni_per_lista: i centroidi sono stimati su un sottoinsieme di al più
+      campioni_per_lista * n_liste punti (bastano poche centinaia di punti per lista).
+    """
+
+    def __init__(self, n_liste=100, n_sonde=8, n_iter=20, campioni_per_lista=256, random_state=None):
+        self.n_liste = n_liste
+        self.n_sonde = n_sonde
+        self.n_iter = n_iter
+        self.campioni_per_lista = campioni_per_lista
+        self.random_state = random_state
+
+    def fit(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        rng = np.random.default_rng(self.random_state)
+        n_liste = min(self.n_liste, X.shape[0])
+
+        # 1. Centroidi delle liste con un semplice K-Means (Lloyd) su un campione dei dati
+        max_campioni = self.campioni_per_lista * n_liste
+        campione = X if X.shape[0] <= max_campioni else X[rng.choice(X.shape[0], max_campioni, replace=False)]
+        centroidi = campione[rng.choice(campione.shape[0], n_liste, replace=False)].copy()
+        for _ in range(self.n_iter):
+            etichette = _centroide_piu_vicino(campione, centroidi)
+            conteggi = np.bincount(etichette, minlength=n_liste)
+            somme = np.stack([np.bincount(etichette, weights=campione[:, j], minlength=n_liste)
+                              for j in range(campione.shape[1])], axis=1)
+            non_vuoti = conteggi > 0
+            centroidi[non_vuoti] = somme[non_vuoti] / conteggi[non_vuoti, None]
+        self.centroidi_ = centroidi
+
+        # 2. Assegniamo ogni punto alla sua lista e ordiniamo i punti per lista,
+        #    così ogni lista è un blocco contiguo di memoria: X_ordinato[offset[l]:offset[l+1]]
+        liste = _centroide_piu_vicino(X, centroidi)
+        ordine = np.argsort(liste, kind='stable')
+        self._X = X[ordine]
+        self._norme = np.einsum('ij,ij->i', self._X, self._X)
+        self._id_originali = ordine
+        self._offset = np.concatenate(([0], np.cumsum(np.bincount(liste, minlength=n_liste))))
+        return self
+
+    def kneighbors(self, Q, k):
+        """Restituisce (distanze, indici) approssimati dei k vicini di ogni riga di Q."""
+        Q = np.asarray(Q, dtype=np.float64)
+        n_q = Q.shape[0]
+        n_sonde = max(1, min(self.n_sonde, self.centroidi_.shape[0]))
+
+        # Liste da visitare per ogni query: le n_sonde con il centroide più vicino
+        D_centroidi = _distanze_quadrate(Q, self.centroidi_)
+        sonde = np.argpartition(D_centroidi, n_sonde - 1, axis=1)[:, :n_sonde] \
+            if n_sonde < D_centroidi.shape[1] else np.tile(np.arange(D_centroidi.shape[1]), (n_q, 1))
+
+        migliori_d = np.full((n_q, k), np.inf)
+        migliori_i = np.full((n_q, k), -1, dtype=np.intp)
+
+        # Invece di un ciclo sulle query facciamo un ciclo sulle liste: per ciascuna
+        # lista calcoliamo in un colpo solo le distanze di tutte le query che la visitano.
+        query_per_lista = np.argsort(sonde.ravel(), kind='stable')
+        lista_ordinata = sonde.ravel()[query_per_lista]
+        confini = np.searchsorted(lista_ordinata, np.arange(self.centroidi_.shape[0] + 1))
+        for lista in range(self.centroidi_.shape[0]):
+            qs = query_per_lista[confini[lista]:confini[lista + 1]] // n_sonde
+            inizio, fine = self._offset[lista], self._offset[lista + 1]
+            if qs.size == 0 or fine == inizio:
+                continue
+            D = _distanze_quadrate(Q[qs], self._X[inizio:fine], self._norme[inizio:fine])
+            candidati_d = np.concatenate((migliori_d[qs], D), axis=1)
+            candidati_i = np.concatenate(
+                (migliori_i[qs], np.broadcast_to(np.arange(inizio, fine), D.shape)), axis=1)
+            scelti = np.argpartition(candidati_d, k - 1, axis=1)[:, :k]
+            migliori_d[qs] = np.take_along_axis(candidati_d, scelti, axis=1)
+            migliori_i[qs] = np.take_along_axis(candidati_i, scelti, axis=1)
+
+        ordine = np.argsort(migliori_d, axis=1, kind='stable')
+        migliori_d = np.take_along_axis(migliori_d, ordine, axis=1)
+        migliori_i = np.take_along_axis(migliori_i, ordine, axis=1)
+        trovati = migliori_i >= 0
+        indici = np.where(trovati, self._id_originali[np.where(trovati, migliori_i, 0)], -1)
+        return np.sqrt(migliori_d), indici
+
+
+class ClassificatoreKNN:
+    """Classificatore KNN (voto di maggioranza uniforme) che usa un indice intercambiabile.
+
+    Con un IndiceEsatto dà le stesse predizioni di KNeighborsClassifier(n_neighbors=k).
+    """
+
+    def __init__(self, indice, n_neighbors=5):
+        self.indice = indice
+        self.n_neighbors = n_neighbors
+
+    def fit(self, X, y):
+        self.classes_, self._y_codificato = np.unique(y, return_inverse=True)
+        self.indice.fit(X)
+        return self
+
+    def predict(self, X):
+        _, idx = self.indice.kneighbors(X, self.n_neighbors)
+        etichette = np.where(idx >= 0, self._y_codificato[np.maximum(idx, 0)], -1)
+        # Conteggio dei voti per classe, vettoriale su tutte le query.
+        # In caso di parità argmax sceglie la classe con indice minore, come scikit-learn.
+        voti = (etichette[:, :, None] == np.arange(len(self.classes_))).sum(axis=1)
+        return self.classes_[voti.argmax(axis=1)]
+
+
+def valuta_indice(indice, X_train, y_train, X_test, y_pred_riferimento, k=5, vicini_esatti=None):
+    """Confronta un indice con la predizione esatta di riferimento (es. model.predict(X_test_scaled)).
+
+    Restituisce un dizionario con:
+    - 'accordo': frazione di predizioni uguali al riferimento.
+    - 'recall': frazione dei k vicini esatti trovati dall'indice (se vicini_esatti è dato).
+    - 'tempo_costruzione_s' e 'latenza_media_ms' (latenza media per query).
+    """
+    inizio = time.perf_counter()
+    classificatore = ClassificatoreKNN(indice, n_neighbors=k).fit(X_train, y_train)
+    tempo_costruzione = time.perf_counter() - inizio
+
+    inizio = time.perf_counter()
+    y_pred = classificatore.predict(X_test)
+    tempo_query = time.perf_counter() - inizio
+
+    risultato = {
+        'accordo': float(np.mean(y_pred == y_pred_riferimento)),
+        'tempo_costruzione_s': tempo_costruzione,
+        'latenza_media_ms': 1000.0 * tempo_query / max(len(X_test), 1),
+    }
+    if vicini_esatti is not None:
+        _, idx = indice.kneighbors(X_test, k)
+        trovati = [len(np.intersect1d(a, b)) for a, b in zip(idx, vicini_esatti)]
+        risultato['recall'] = float(np.sum(trovati) / vicini_esatti.size)
+    return risultato
@@ -1,114 +1,188 @@
 # Import delle librerie necessarie
+from contextlib import nullcontext
+
 import numpy as np
-import matplotlib.pyplot as plt
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler # Per la standardizzazione delle features
 from sklearn.metrics import accuracy_score, confusion_matrix, ConfusionMatrixDisplay
-from sklearn.datasets import load_iris # Useremo il dataset Iris
-
-# --- 1. Caricamento e Preparazione dei Dati ---
-print("--- K-Nearest Neighbors (KNN) ---")
-print("Caricamento del dataset Iris...")
-iris = load_iris()
-X = iris.data # Features: lunghezza sepalo, larghezza sepalo, lunghezza petalo, larghezza petalo
-y = iris.target # Target: specie di Iris (0: setosa, 1: versicolor, 2: virginica)
-feature_names = iris.feature_names
-target_names = iris.target_names
-
-# Visualizziamo le dimensioni dei dati
-print(f"Numero di campioni: {X.shape[0]}")
-print(f"Numero di features: {X.shape[1]}")
-print(f"Nomi delle features: {feature_names}")
-print(f"Classi target: {target_names} (corrispondenti a {np.unique(y)})")
-
-# --- 2. Divisione dei Dati in Training Set e Test Set ---
-# Dividiamo i dati per addestrare il modello e per testarne le prestazioni.
-# test_size=0.3 significa che il 30% dei dati sarà usato per il test.
-# random_state assicura che la divisione sia sempre la stessa.
-# stratify=y è importante per i problemi di classificazione, per mantenere
-# la stessa proporzione di classi nel training e nel test set.
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
-
-print(f"\nDimensioni Training Set: {X_train.shape[0]} campioni")
-print(f"Dimensioni Test Set: {X_test.shape[0]} campioni")
-
-# --- 3. Standardizzazione delle Features ---
-# KNN è un algoritmo basato sulla distanza, quindi è sensibile alla scala delle features.
-# È buona pratica standardizzare le features (media 0, deviazione standard 1).
-print("\nStandardizzazione delle features...")
-scaler = StandardScaler()
-# Adattiamo lo scaler SOLO sui dati di training per evitare data leakage
-X_train_scaled = scaler.fit_transform(X_train)
-# Applichiamo la trasformazione sia ai dati di training che di test
-X_test_scaled = scaler.transform(X_test)
-
-# --- 4. Creazione e Addestramento del Modello ---
-# Scegliamo un valore per k (numero di vicini). Un valore comune è 5.
-k = 5
-print(f"\nCreazione del modello KNN con k={k}")
-model = KNeighborsClassifier(n_neighbors=k)
-
-# Addestriamo il modello utilizzando i dati di training standardizzati
-print("Addestramento del modello KNN...")
-model.fit(X_train_scaled, y_train)
-print("Modello addestrato.")
-
-# --- 5. Effettuare Predizioni ---
-# Usiamo il modello addestrato per fare predizioni sul test set (standardizzato)
-print("\nEffettuare predizioni sul Test Set...")
-y_pred = model.predict(X_test_scaled)
-
-# --- 6. Valutazione del Modello ---
-# Valutiamo le prestazioni del modello sul test set.
-
-# Accuratezza (Accuracy): la proporzione di predizioni corrette.
-accuracy = accuracy_score(y_test, y_pred)
-print(f"Accuratezza del modello KNN sul Test Set: {accuracy:.2f} (ovvero {accuracy*100:.2f}%)")
-
-# Matrice di Confusione: mostra il numero di predizioni corrette e errate per ciascuna classe.
-print("\nGenerazione della Matrice di Confusione...")
-cm = confusion_matrix(y_test, y_pred)
-# print("Matrice di Confusione:")
-# print(cm)
-
-# Visualizzazione della Matrice di Confusione
-disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=target_names)
-disp.plot(cmap=plt.cm.Blues)
-plt.title(f"Matrice di Confusione KNN (k={k}) - Dataset Iris")
-plt.show()
-
-# --- 7. Visualizzazione dei Dati di Test (opzionale, solo per 2 features) ---
-# Per visualizzare i risultati, usiamo solo le prime due features del dataset Iris
-# (lunghezza sepalo e larghezza sepalo) per semplicità.
-
-if X_test_scaled.shape[1] >= 2:
-    plt.figure(figsize=(10, 7))
-
-    # Colori per le classi
-    cmap_light = plt.cm.get_cmap('viridis', 3) # Per le regioni di decisione (non mostrate qui per semplicità)
-    cmap_bold = plt.cm.get_cmap('viridis', 3)  # Per i punti
-
-    # Plot dei punti del test set, colorati in base alla classe reale
-    scatter = plt.scatter(X_test_scaled[:, 0], X_test_scaled[:, 1], c=y_test, cmap=cmap_bold, edgecolor='k', s=60, alpha=0.8)
-
-    plt.xlabel(f"{feature_names[0]} (standardizzata)")
-    plt.ylabel(f"{feature_names[1]} (standardizzata)")
-    plt.title(f"Classificazione KNN (k={k}) - Dati di Test (Prime due features Iris)")
-
-    # Creazione di una legenda per le classi
-    handles, _ = scatter.legend_elements(prop="colors")
-    legend_labels = [f"Specie: {name}" for name in target_names]
-    plt.legend(handles, legend_labels, title="Classi Reali")
-    plt.grid(True)
-    plt.show()
-
-    # Potremmo anche visualizzare i punti colorati in base alla predizione y_pred
-    # e magari evidenziare gli errori, ma per semplicità lo omettiamo.
-    # Esempio per evidenziare errori:
-    # errori = X_test_scaled[y_test != y_pred]
-    # if errori.shape[0] > 0:
-    #     plt.scatter(errori[:, 0], errori[:, 1], facecolors='none', edgecolors='red', s=150, linewidths=2, label='Errori')
-
-
-print("\nEsecuzione script KNN completata.")
\ No newline at end of file
+
+
+def main(fase=nullcontext, disegna=True, mostra_grafico=None, dimostrazioni=True, dati=None):
+    """Esegue l'intero esempio KNN e restituisce i risultati principali.
+
+    - fase: funzione che riceve il nome di una fase ('load', 'split', 'scale', 'fit',
+      'predict', 'evaluate', 'plot', ...) e restituisce un context manager. Di default non
+      fa nulla; il runner utils/esegui.py la usa per misurare tempo e memoria di ogni fase.
+    - disegna: se False i grafici non vengono creati (utile su un server senza display).
+    - mostra_grafico: chiamata con il nome del grafico al posto di plt.show()
+      (es. per salvarlo su file).
+    - dimostrazioni: se False salta le sezioni di confronto extra (es. gli indici dei vicini).
+    - dati: coppia (X, y) da usare al posto del dataset dell'esempio, ad es. un dataset
+      grande generato con utils/dataset.py e aperto con carica_dataset (memory-map).
+    """
+    if disegna:
+        # matplotlib viene importato solo se servono i grafici: il solo import richiede
+        # più tempo dell'addestramento di questi esempi
+        import matplotlib.pyplot as plt
+        if mostra_grafico is None:
+            mostra_grafico = lambda nome: plt.show()
+
+    # --- 1. Caricamento e Preparazione dei Dati ---
+    print("--- K-Nearest Neighbors (KNN) ---")
+    print("Caricamento del dataset Iris..." if dati is None else "Caricamento del dataset fornito...")
+    with fase('load'):
+        if dati is None:
+            from sklearn.datasets import load_iris # Useremo il dataset Iris
+            iris = load_iris()
+            X = iris.data # Features: lunghezza sepalo, larghezza sepalo, lunghezza petalo, larghezza petalo
+            y = iris.target # Target: specie di Iris (0: setosa, 1: versicolor, 2: virginica)
+            feature_names = iris.feature_names
+            target_names = iris.target_names
+        else:
+            X, y = dati
+            feature_names = [f"feature {i}" for i in range(X.shape[1])]
+            target_names = np.unique(y).astype(str)
+
+    # Visualizziamo le dimensioni dei dati
+    print(f"Numero di campioni: {X.shape[0]}")
+    print(f"Numero di features: {X.shape[1]}")
+    print(f"Nomi delle features: {feature_names}")
+    print(f"Classi target: {target_names} (corrispondenti a {np.unique(y)})")
+
+    # --- 2. Divisione dei Dati in Training Set e Test Set ---
+    # Dividiamo i dati per addestrare il modello e per testarne le prestazioni.
+    # test_size=0.3 significa che il 30% dei dati sarà usato per il test.
+    # random_state assicura che la divisione sia sempre la stessa.
+    # stratify=y è importante per i problemi di classificazione, per mantenere
+    # la stessa proporzione di classi nel training e nel test set.
+    with fase('split'):
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+
+    print(f"\nDimensioni Training Set: {X_train.shape[0]} campioni")
+    print(f"Dimensioni Test Set: {X_test.shape[0]} campioni")
+
+    # --- 3. Standardizzazione delle Features ---
+    # KNN è un algoritmo basato sulla distanza, quindi è sensibile alla scala delle features.
+    # È buona pratica standardizzare le features (media 0, deviazione standard 1).
+    print("\nStandardizzazione delle features...")
+    with fase('scale'):
+        scaler = StandardScaler()
+        # Adattiamo lo scaler SOLO sui dati di training per evitare data leakage
+        X_train_scaled = scaler.fit_transform(X_train)
+        # Applichiamo la trasformazione sia ai dati di training che di test
+        X_test_scaled = scaler.transform(X_test)
+
+    # --- 4. Creazione e Addestramento del Modello ---
+    # Scegliamo un valore per k (numero di vicini). Un valore comune è 5.
+    k = 5
+    print(f"\nCreazione del modello KNN con k={k}")
+    model = KNeighborsClassifier(n_neighbors=k)
+
+    # Addestriamo il modello utilizzando i dati di training standardizzati
+    print("Addestramento del modello KNN...")
+    with fase('fit'):
+        model.fit(X_train_scaled, y_train)
+    print("Modello addestrato.")
+
+    # --- 5. Effettuare Predizioni ---
+    # Usiamo il modello addestrato per fare predizioni sul test set (standardizzato)
+    print("\nEffettuare predizioni sul Test Set...")
+    with fase('predict'):
+        y_pred = model.predict(X_test_scaled)
+
+    # --- 6. Valutazione del Modello ---
+    # Valutiamo le prestazioni del modello sul test set.
+    with fase('evaluate'):
+        # Accuratezza (Accuracy): la proporzione di predizioni corrette.
+        accuracy = accuracy_score(y_test, y_pred)
+        # Matrice di Confusione: mostra il numero di predizioni corrette e errate per ciascuna classe.
+        cm = confusion_matrix(y_test, y_pred)
+    print(f"Accuratezza del modello KNN sul Test Set: {accuracy:.2f} (ovvero {accuracy*100:.2f}%)")
+    # print("Matrice di Confusione:")
+    # print(cm)
+
+    # Visualizzazione della Matrice di Confusione
+    if disegna:
+        print("\nGenerazione della Matrice di Confusione...")
+        with fase('plot'):
+            disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=target_names)
+            disp.plot(cmap=plt.cm.Blues)
+            plt.title(f"Matrice di Confusione KNN (k={k}) - Dataset Iris")
+            mostra_grafico("knn_matrice_confusione")
+
+    # --- 6b. Indici per la Ricerca dei Vicini (esatti e approssimati) ---
+    # Con milioni di punti la ricerca dei k vicini è il collo di bottiglia di KNN.
+    # indici_vicini.py permette di scegliere l'indice: esatto (KD-tree, Ball-tree)
+    # oppure approssimato (IVF), dove n_sonde regola il compromesso recall/latenza.
+    # Confrontiamo ogni indice con le predizioni esatte y_pred di scikit-learn.
+    if dimostrazioni:
+        from indici_vicini import IndiceEsatto, IndiceIVF, valuta_indice
+
+        print("\nConfronto degli indici per la ricerca dei vicini (rispetto a model.predict):")
+        with fase('indici'):
+            _, vicini_esatti = model.kneighbors(X_test_scaled)
+            indici = {
+                "KD-tree (esatto)": IndiceEsatto('kd_tree'),
+                "Ball-tree (esatto)": IndiceEsatto('ball_tree'),
+                "IVF, 1 sonda su 6": IndiceIVF(n_liste=6, n_sonde=1, random_state=42),
+                "IVF, 3 sonde su 6": IndiceIVF(n_liste=6, n_sonde=3, random_state=42),
+            }
+            for nome, indice in indici.items():
+                risultato = valuta_indice(indice, X_train_scaled, y_train, X_test_scaled, y_pred, k=k,
+                                          vicini_esatti=vicini_esatti)
+                print(f"  {nome:<20} accordo: {risultato['accordo']*100:6.2f}%  recall@{k}: {risultato['recall']:.2f}  "
+                      f"latenza: {risultato['latenza_media_ms']:.4f} ms/query")
+
+    # --- 7. Visualizzazione dei Dati di Test (opzionale, solo per 2 features) ---
+    # Per visualizzare i risultati, usiamo solo le prime due features del dataset Iris
+    # (lunghezza sepalo e larghezza sepalo) per semplicità.
+
+    if disegna and X_test_scaled.shape[1] >= 2:
+        with fase('plot'):
+            plt.figure(figsize=(10, 7))
+
+            # Colori per le classi
+            n_classi = len(target_names)
+            cmap_light = plt.get_cmap('viridis', n_classi) # Per le regioni di decisione (con trasparenza)
+            cmap_bold = plt.get_cmap('viridis', n_classi)  # Per i punti
+
+            # Regioni di decisione: il modello usa tutte le features, quindi sul piano delle
+            # prime due disegniamo quelle di un KNN addestrato solo su queste due.
+            # RegioniDecisione (regioni_decisione.py) classifica la griglia a blocchi
+            # con l'indice dei vicini del modello: la memoria non dipende dalla risoluzione.
+            from regioni_decisione import RegioniDecisione, limiti_dati
+            model_2d = KNeighborsClassifier(n_neighbors=k).fit(X_train_scaled[:, :2], y_train)
+            regioni = RegioniDecisione(model_2d, limiti_dati(np.vstack([X_train_scaled, X_test_scaled])),
+                                       risoluzione=500, y_train=y_train)
+            regioni.disegna(cmap=cmap_light, alpha=0.3)
+
+            # Plot dei punti del test set, colorati in base alla classe reale
+            scatter = plt.scatter(X_test_scaled[:, 0], X_test_scaled[:, 1], c=y_test, cmap=cmap_bold, edgecolor='k', s=60, alpha=0.8)
+
+            plt.xlabel(f"{feature_names[0]} (standardizzata)")
+            plt.ylabel(f"{feature_names[1]} (standardizzata)")
+            plt.title(f"Classificazione KNN (k={k}) - Dati di Test e regioni di decisione (Prime due features)")
+
+            # Creazione di una legenda per le classi
+            handles, _ = scatter.legend_elements(prop="colors")
+            legend_labels = [f"Specie: {name}" for name in target_names]
+            plt.legend(handles, legend_labels, title="Classi Reali")
+            plt.grid(True)
+            mostra_grafico("knn_dati_test")
+
+        # Potremmo anche visualizzare i punti colorati in base alla predizione y_pred
+        # e magari evidenziare gli errori, ma per semplicità lo omettiamo.
+        # Esempio per evidenziare errori:
+        # errori = X_test_scaled[y_test != y_pred]
+        # if errori.shape[0] > 0:
+        #     plt.scatter(errori[:, 0], errori[:, 1], facecolors='none', edgecolors='red', s=150, linewidths=2, label='Errori')
+
+
+    print("\nEsecuzione script KNN completata.")
+    return {'model': model, 'scaler': scaler, 'accuracy': accuracy, 'confusion_matrix': cm,
+            'X_test': X_test, 'y_test': y_test}
+
+
+if __name__ == "__main__":
+    main()
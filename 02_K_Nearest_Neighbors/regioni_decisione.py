@@ -0,0 +1,296 @@
+# Regioni di decisione di un classificatore su griglie ad alta risoluzione
+#
+# Per disegnare le regioni di decisione si classifica ogni pixel di una griglia che
+# copre il piano delle due features. Il modo "ovvio" (np.meshgrid + model.predict su
+# tutta la griglia) con 2000 x 2000 pixel crea 4 milioni di punti, più tutti gli array
+# intermedi di predict: centinaia di MB. Qui invece:
+#
+# - i pixel vengono classificati a blocchi di decine di migliaia di punti, generati al volo
+#   (la griglia completa di coordinate non esiste mai in memoria): la memoria di lavoro
+#   dipende dalla dimensione del blocco, non da quella della griglia;
+# - per KNN i k_max vicini di ogni pixel vengono cercati UNA volta con l'indice del
+#   modello (KD-tree, Ball-tree, ... o un indice di indici_vicini.py) e se ne salvano
+#   solo le classi (1 byte per vicino). L'immagine per un altro k <= k_max è un voto di
+#   maggioranza sulle prime k classi: cambiare k (ad es. per un'animazione) non richiede
+#   nuove ricerche dei vicini. Queste classi stanno su disco (memory-map, in un file
+#   temporaneo o in `file_cache`), quindi anche la cache non occupa RAM;
+# - funziona con qualsiasi classificatore con predict (albero, MLP, ...): in quel caso
+#   ogni blocco viene semplicemente passato a predict.
+#
+# Confronto con meshgrid + predict (tempo e picco di memoria) su KNN, albero e MLP:
+#   python regioni_decisione.py --modello knn --risoluzione 2000 --k 1 3 5 9 15 --salva regioni_knn.png
+#   python regioni_decisione.py --modello albero
+import argparse
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# Pixel classificati insieme: le coordinate di un blocco (1 MB) restano in cache, ma il
+# blocco è abbastanza grande da ammortizzare il costo fisso di ogni chiamata a predict
+DIMENSIONE_BLOCCO = 65536
+
+
+def _codici(classi, etichette):
+    """Indice in `classi` di ogni etichetta (i pixel dell'immagine contengono questi indici)."""
+    return np.searchsorted(classi, etichette)
+
+
+class RegioniDecisione:
+    """Classe predetta per ogni pixel di una griglia sul piano di due features.
+
+    - modello: classificatore addestrato. KNeighborsClassifier (voto uniforme) o
+      ClassificatoreKNN di indici_vicini.py usano la cache dei vicini; gli altri predict.
+    - y_train: etichette con cui è stato addestrato il modello. Servono alla cache dei
+      vicini (la ricerca restituisce solo gli indici dei punti di training); senza, anche
+      i modelli KNN vengono classificati con predict.
+    - limiti: (x_min, x_max, y_min, y_max) della griglia.
+    - risoluzione: numero di pixel per lato, oppure (pixel in x, pixel in y).
+    - k_max: numero massimo di vicini per cui si potrà chiedere l'immagine (solo KNN,
+      default: n_neighbors del modello).
+    - trasforma: funzione applicata ad ogni blocco di punti (n, 2) prima di predict, se il
+      modello lavora in un altro spazio (es. pca.inverse_transform).
+    - file_cache: file (memory-map) in cui scrivere le classi dei vicini, per riusarle.
+      Se None si usa un file temporaneo, cancellato automaticamente: la cache non sta in
+      RAM, il sistema operativo tiene in memoria solo le pagine lette di recente.
+    """
+
+    def __init__(self, modello, limiti, risoluzione=2000, dimensione_blocco=DIMENSIONE_BLOCCO, k_max=None,
+                 trasforma=None, file_cache=None, y_train=None):
+        self.modello = modello
+        self.limiti = tuple(float(v) for v in limiti)
+        self.risoluzione = (risoluzione, risoluzione) if np.isscalar(risoluzione) else tuple(risoluzione)
+        self.dimensione_blocco = dimensione_blocco
+        self.trasforma = trasforma
+        self.file_cache = file_cache
+        self.classi = modello.classes_
+        # Codice dei vicini mancanti (indici IVF = -1): non è l'indice di nessuna classe
+        self._nessun_vicino = len(self.classi)
+        # Un byte per pixel finché le classi e il codice dei vicini mancanti entrano in uint8
+        self._dtype = np.uint8 if self._nessun_vicino <= np.iinfo(np.uint8).max else np.int32
+        # Indice in `classi` dell'etichetta di ogni punto di training (None: si usa predict)
+        self._codici_train = None
+        if y_train is not None:
+            self._codici_train = _codici(self.classi, np.asarray(y_train)).astype(self._dtype)
+        self.usa_vicini = self._codici_train is not None and self._supporta_vicini(modello)
+        self.k_max = (k_max or modello.n_neighbors) if self.usa_vicini else None
+        self._x = np.linspace(self.limiti[0], self.limiti[1], self.risoluzione[0])
+        self._y = np.linspace(self.limiti[2], self.limiti[3], self.risoluzione[1])
+        self._vicini = None # (pixel, k_max): classi dei vicini di ogni pixel, calcolate alla prima immagine
+        self._immagini = {} # k -> immagine già calcolata
+
+    @staticmethod
+    def _supporta_vicini(modello):
+        if hasattr(modello, '_fit_X'): # KNeighborsClassifier
+            return getattr(modello, 'weights', 'uniform') == 'uniform'
+        return hasattr(modello, 'indice') # ClassificatoreKNN
+
+    @property
+    def n_pixel(self):
+        return self.risoluzione[0] * self.risoluzione[1]
+
+    def coordinate(self, pixel):
+        """Coordinate (x, y) dei pixel con gli indici `pixel`, in ordine di riga (y costante lungo una riga)."""
+        return np.column_stack([self._x[pixel % self.risoluzione[0]], self._y[pixel // self.risoluzione[0]]])
+
+    def _punti(self, inizio, fine):
+        punti = self.coordinate(np.arange(inizio, fine))
+        return punti if self.trasforma is None else self.trasforma(punti)
+
+    def _blocchi(self):
+        for inizio in range(0, self.n_pixel, self.dimensione_blocco):
+            fine = min(inizio + self.dimensione_blocco, self.n_pixel)
+            yield inizio, fine, self._punti(inizio, fine)
+
+    def _classi_vicini(self, punti):
+        """Indici delle classi dei k_max vicini di ogni punto, dal più vicino al più lontano."""
+        if hasattr(self.modello, '_fit_X'):
+            idx = self.modello.kneighbors(punti, n_neighbors=self.k_max, return_distance=False)
+            return self._codici_train[idx]
+        _, idx = self.modello.indice.kneighbors(punti, self.k_max)
+        return np.where(idx >= 0, self._codici_train[np.maximum(idx, 0)], self._nessun_vicino)
+
+    def calcola_vicini(self):
+        """Cerca (una sola volta) i k_max vicini di tutti i pixel e ne salva le classi."""
+        if self._vicini is None:
+            forma = (self.n_pixel, self.k_max)
+            if self.file_cache is None:
+                # File anonimo: sparisce quando la memory-map non è più usata
+                vicini = np.memmap(tempfile.TemporaryFile(), mode='w+', dtype=self._dtype, shape=forma)
+            else:
+                vicini = np.lib.format.open_memmap(self.file_cache, mode='w+', dtype=self._dtype, shape=forma)
+            for inizio, fine, punti in self._blocchi():
+                vicini[inizio:fine] = self._classi_vicini(punti)
+            self._vicini = vicini
+        return self._vicini
+
+    def immagine(self, k=None):
+        """Array (pixel in y, pixel in x) con l'indice in `classi` della classe predetta.
+
+        Per KNN `k` (default: n_neighbors del modello) può essere qualsiasi valore fino a k_max.
+        """
+        if self.usa_vicini:
+            k = k or self.modello.n_neighbors
+            if not 1 <= k <= self.k_max:
+                raise ValueError(f"k deve essere tra 1 e k_max={self.k_max}, ricevuto {k}")
+        elif k is not None:
+            raise ValueError(f"k si può scegliere solo per KNN, non per {type(self.modello).__name__}")
+        if k in self._immagini:
+            return self._immagini[k]
+
+        risultato = np.empty(self.n_pixel, dtype=self._dtype)
+        if self.usa_vicini:
+            vicini = self.calcola_vicini()
+            n_classi = len(self.classi)
+            for inizio in range(0, self.n_pixel, self.dimensione_blocco):
+                primi_k = vicini[inizio:inizio + self.dimensione_blocco, :k]
+                # Solo i codici 0..n_classi-1 sono voti: i vicini mancanti non votano
+                voti = np.stack([(primi_k == c).sum(axis=1) for c in range(n_classi)], axis=1)
+                # A parità di voti argmax sceglie la classe con indice minore, come KNeighborsClassifier
+                risultato[inizio:inizio + len(primi_k)] = voti.argmax(axis=1)
+        else:
+            for inizio, fine, punti in self._blocchi():
+                risultato[inizio:fine] = _codici(self.classi, self.modello.predict(punti))
+        immagine = risultato.reshape(self.risoluzione[1], self.risoluzione[0])
+        self._immagini[k] = immagine
+        return immagine
+
+    def disegna(self, ax=None, k=None, cmap='viridis', alpha=0.3):
+        """Disegna le regioni con imshow (molto più veloce di contourf su griglie grandi)."""
+        import matplotlib.pyplot as plt
+
+        ax = ax or plt.gca()
+        return ax.imshow(self.immagine(k), origin='lower', extent=self.limiti, aspect='auto', cmap=cmap,
+                         vmin=0, vmax=len(self.classi) - 1, alpha=alpha, interpolation='nearest')
+
+
+def limiti_dati(X, margine=0.5):
+    """Limiti (x_min, x_max, y_min, y_max) che contengono le prime due features di X, più un margine."""
+    return (X[:, 0].min() - margine, X[:, 0].max() + margine, X[:, 1].min() - margine, X[:, 1].max() + margine)
+
+
+# --- Confronto con meshgrid + predict ---
+
+def _griglia_completa(modello, limiti, risoluzione):
+    """Metodo "ovvio": tutta la griglia in memoria e una sola chiamata a predict."""
+    xx, yy = np.meshgrid(np.linspace(limiti[0], limiti[1], risoluzione), np.linspace(limiti[2], limiti[3], risoluzione))
+    return _codici(modello.classes_, modello.predict(np.c_[xx.ravel(), yy.ravel()])).reshape(xx.shape)
+
+
+def _misura(funzione):
+    tracemalloc.start()
+    inizio = time.perf_counter()
+    risultato = funzione()
+    durata = time.perf_counter() - inizio
+    picco = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return risultato, durata, picco
+
+
+def dati_esempio(nome):
+    """Dataset dello script del classificatore `nome` ridotto a due features standardizzate.
+
+    Iris e Breast Cancer: le prime due features; Digits (64 pixel): le prime due componenti PCA.
+    """
+    from sklearn import datasets
+    from sklearn.decomposition import PCA
+    from sklearn.preprocessing import StandardScaler
+
+    caricatori = {'knn': datasets.load_iris, 'albero': datasets.load_breast_cancer, 'mlp': datasets.load_digits}
+    X, y = caricatori[nome](return_X_y=True)
+    X = StandardScaler().fit_transform(X)
+    X = PCA(n_components=2, random_state=42).fit_transform(X) if nome == 'mlp' else X[:, :2]
+    return X, y
+
+
+def classificatore(nome, k=5):
+    """Classificatore con gli stessi iperparametri dello script `nome`."""
+    if nome == 'knn':
+        from sklearn.neighbors import KNeighborsClassifier
+        return KNeighborsClassifier(n_neighbors=k)
+    if nome == 'albero':
+        from sklearn.tree import DecisionTreeClassifier
+        return DecisionTreeClassifier(criterion='gini', max_depth=4, random_state=42)
+    from sklearn.neural_network import MLPClassifier
+    return MLPClassifier(hidden_layer_sizes=(100, 50), max_iter=300, early_stopping=True, random_state=42)
+
+
+def confronta(nome='knn', risoluzione=2000, valori_k=(1, 5, 15), dimensione_blocco=DIMENSIONE_BLOCCO,
+              campioni_verifica=20_000, random_state=42):
+    """Tempi, picchi di memoria e accordo con model.predict del renderer a blocchi e di meshgrid + predict.
+
+    Per KNN la prima immagine include la ricerca dei k_max vicini; le immagini per gli
+    altri k riusano la cache, mentre meshgrid + predict rifà tutto per ogni k. L'accordo
+    è misurato su `campioni_verifica` pixel a caso, escludendo per KNN quelli in cui il
+    k-esimo e il (k+1)-esimo vicino sono alla stessa distanza: lì i k vicini non sono
+    unici e due ricerche corrette possono votare diversamente (Iris ha punti duplicati).
+    """
+    X, y = dati_esempio(nome)
+    k_max = max(valori_k) if nome == 'knn' else None
+    modelli = {k: classificatore(nome, k).fit(X, y) for k in (valori_k if nome == 'knn' else [None])}
+    limiti = limiti_dati(X)
+    primo = next(iter(modelli))
+    renderer = RegioniDecisione(modelli[primo], limiti, risoluzione, dimensione_blocco, k_max=k_max, y_train=y)
+
+    rng = np.random.default_rng(random_state)
+    pixel = rng.integers(0, renderer.n_pixel, min(campioni_verifica, renderer.n_pixel))
+    punti = renderer.coordinate(pixel) # Pixel estratti a caso, verificati con model.predict
+    risultati = {'modello': type(modelli[primo]).__name__, 'risoluzione': risoluzione, 'immagini': []}
+    for k, modello in modelli.items():
+        immagine, durata, picco = _misura(lambda: renderer.immagine(k))
+        _, durata_meshgrid, picco_meshgrid = _misura(lambda: _griglia_completa(modello, limiti, risoluzione))
+        uguali = immagine.ravel()[pixel] == _codici(modello.classes_, modello.predict(punti))
+        pareggi = np.zeros(len(pixel), dtype=bool)
+        if k is not None:
+            distanze, _ = modello.kneighbors(punti, n_neighbors=k + 1)
+            pareggi = distanze[:, k - 1] == distanze[:, k]
+        risultati['immagini'].append({'k': k, 'tempo_s': durata, 'picco_mb': picco,
+                                      'tempo_meshgrid_s': durata_meshgrid, 'picco_meshgrid_mb': picco_meshgrid,
+                                      'accordo': float(np.mean(uguali[~pareggi])),
+                                      'pareggi': float(np.mean(pareggi))})
+    return renderer, X, y, risultati
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regioni di decisione a blocchi contro meshgrid + predict")
+    parser.add_argument("--modello", choices=['knn', 'albero', 'mlp'], default='knn')
+    parser.add_argument("--risoluzione", type=int, default=2000, help="Pixel per lato della griglia")
+    parser.add_argument("--k", nargs='+', type=int, default=[1, 5, 15], help="Valori di k (solo KNN)")
+    parser.add_argument("--blocco", type=int, default=DIMENSIONE_BLOCCO, help="Pixel per blocco")
+    parser.add_argument("--salva", default=None, help="File PNG in cui salvare le regioni")
+    args = parser.parse_args()
+
+    renderer, X, y, risultati = confronta(args.modello, args.risoluzione, args.k, args.blocco)
+    print(f"--- Regioni di decisione {risultati['modello']} su {args.risoluzione}x{args.risoluzione} pixel ---")
+    print(f"{'immagine':<12} {'a blocchi':>10} {'picco':>9} {'meshgrid':>10} {'picco':>10} "
+          f"{'accordo':>9} {'pareggi':>8}")
+    for r in risultati['immagini']:
+        etichetta = f"k={r['k']}" if r['k'] is not None else "-"
+        print(f"{etichetta:<12} {r['tempo_s']:>9.2f}s {r['picco_mb']:>6.1f} MB {r['tempo_meshgrid_s']:>9.2f}s "
+              f"{r['picco_meshgrid_mb']:>7.1f} MB {r['accordo'] * 100:>8.2f}% {r['pareggi'] * 100:>7.2f}%")
+    print(f"{'totale':<12} {sum(r['tempo_s'] for r in risultati['immagini']):>9.2f}s {'':>9} "
+          f"{sum(r['tempo_meshgrid_s'] for r in risultati['immagini']):>9.2f}s")
+    if renderer.usa_vicini:
+        print(f"(Cache dei vicini: {renderer.calcola_vicini().nbytes / 2**20:.1f} MB, "
+              f"{renderer.k_max} classi da 1 byte per pixel)")
+
+    if args.salva:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        valori_k = [r['k'] for r in risultati['immagini']]
+        _, assi = plt.subplots(1, len(valori_k), figsize=(6 * len(valori_k), 5), squeeze=False)
+        for ax, k in zip(assi[0], valori_k):
+            renderer.disegna(ax, k=k)
+            ax.scatter(X[:, 0], X[:, 1], c=np.searchsorted(renderer.classi, y), cmap='viridis', edgecolor='k', s=15,
+                       vmin=0, vmax=len(renderer.classi) - 1)
+            ax.set_title(f"{risultati['modello']}" + (f" (k={k})" if k is not None else ""))
+        plt.tight_layout()
+        plt.savefig(args.salva, dpi=100)
+        print(f"Grafico salvato in {args.salva}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,221 @@
 # Import delle librerie necessarie
+from contextlib import nullcontext
+
 import numpy as np
-import matplotlib.pyplot as plt
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler # Per la standardizzazione (buona pratica)
-from sklearn.datasets import make_blobs # Per generare dati di esempio per il clustering
-
-# --- 1. Generazione dei Dati di Esempio ---
-print("--- K-Means Clustering ---")
-print("Generazione dati di esempio con make_blobs...")
-
-# Creiamo dei "blob" di punti per simulare cluster naturali.
-# n_samples: numero totale di punti.
-# centers: numero di centri (cluster) da generare o coordinate dei centri.
-# cluster_std: deviazione standard dei cluster (quanto sono sparsi).
-# random_state: per riproducibilità.
-n_samples = 300
-n_features = 2
-n_clusters_dati = 15 # Numero di cluster che vogliamo generare
-random_seed = 42
-
-X, y_true = make_blobs(n_samples=n_samples,
-                       n_features=n_features,
-                       centers=n_clusters_dati,
-                       cluster_std=0.7, # Cluster abbastanza definiti
-                       random_state=random_seed)
-
-print(f"Generati {X.shape[0]} campioni con {X.shape[1]} features.")
-# y_true contiene le etichette vere dei cluster, ma K-Means non le userà (è non supervisionato).
-# Le useremo solo alla fine per confrontare visivamente il risultato.
-
-# --- (Opzionale ma consigliato) Standardizzazione delle Features ---
-# Anche se K-Means può funzionare senza, se le feature hanno scale molto diverse
-# la standardizzazione può migliorare i risultati.
-print("\nStandardizzazione delle features...")
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-# Per questo esempio con make_blobs e cluster_std simili, l'effetto potrebbe non essere drastico,
-# ma è una buona pratica. Useremo X_scaled da ora.
-
-# --- 2. Creazione e Addestramento del Modello K-Means ---
-# Scegliamo il numero di cluster (k) per l'algoritmo K-Means.
-# In un caso reale, non conosceremmo n_clusters_dati e dovremmo usare metodi
-# come l'Elbow method o Silhouette score per stimare il k ottimale.
-# Qui, per semplicità didattica, usiamo il numero di cluster che sappiamo essere presenti.
-k_kmeans = n_clusters_dati
-print(f"\nCreazione del modello K-Means con k={k_kmeans} cluster...")
-
-# random_state nel KMeans assicura che l'inizializzazione dei centroidi sia la stessa,
-# portando a risultati riproducibili.
-# n_init='auto' è l'impostazione predefinita nelle versioni recenti di scikit-learn
-# per eseguire l'algoritmo più volte con diverse inizializzazioni dei centroidi.
-kmeans = KMeans(n_clusters=k_kmeans, random_state=random_seed, n_init='auto')
-
-print("Addestramento del modello K-Means...")
-# Addestriamo il modello K-Means sui dati (standardizzati)
-# K-Means assegna ogni punto a un cluster e calcola i centroidi.
-kmeans.fit(X_scaled)
-print("Modello addestrato.")
-
-# --- 3. Ottenere le Etichette dei Cluster e i Centroidi ---
-# Etichette dei cluster assegnate a ciascun punto dati
-labels_pred = kmeans.labels_
-
-# Coordinate dei centroidi dei cluster trovati
-centroids = kmeans.cluster_centers_
-
-print(f"\nEtichette dei cluster predette per i primi 10 punti: {labels_pred[:10]}")
-print(f"Coordinate dei centroidi dei {k_kmeans} cluster:\n{centroids}")
-
-# --- 4. Valutazione del Modello (Principalmente Visiva in questo script) ---
-# In pratica, si userebbero metriche come:
-# - Inertia (WCSS - Within-Cluster Sum of Squares): kmeans.inertia_
-#   Misura la somma delle distanze al quadrato dei campioni dal centro del loro cluster.
-#   Tende a diminuire all'aumentare di k. Usata nell'Elbow Method.
-# - Silhouette Score: misura quanto un campione sia simile al proprio cluster
-#   rispetto agli altri cluster. Valori vicini a +1 indicano buona clusterizzazione.
-#   (from sklearn.metrics import silhouette_score)
-
-print(f"\nInertia (WCSS) del modello: {kmeans.inertia_:.2f}")
-# silhouette_avg = silhouette_score(X_scaled, labels_pred)
-# print(f"Silhouette Score medio: {silhouette_avg:.2f}") # Richiede sklearn.metrics
-
-# --- 5. Visualizzazione dei Risultati ---
-
-# Grafico 1: Dati clusterizzati da K-Means
-plt.figure(figsize=(12, 5))
-
-plt.subplot(1, 2, 1)
-# Punti dati, colorati in base al cluster assegnato da K-Means
-plt.scatter(X_scaled[:, 0], X_scaled[:, 1], c=labels_pred, s=50, cmap='viridis', alpha=0.7)
-# Centroidi dei cluster
-plt.scatter(centroids[:, 0], centroids[:, 1], c='red', s=200, marker='X', edgecolor='black', label='Centroidi')
-plt.title(f"K-Means Clustering (k={k_kmeans}) - Predizioni")
-plt.xlabel("Feature 1 (standardizzata)")
-plt.ylabel("Feature 2 (standardizzata)")
-plt.legend()
-plt.grid(True)
-
-# Grafico 2: Dati originali con le etichette vere (per confronto)
-plt.subplot(1, 2, 2)
-plt.scatter(X_scaled[:, 0], X_scaled[:, 1], c=y_true, s=50, cmap='viridis', alpha=0.7)
-plt.title("Dati Originali - Etichette Vere")
-plt.xlabel("Feature 1 (standardizzata)")
-plt.ylabel("Feature 2 (standardizzata)")
-plt.grid(True)
-
-plt.suptitle("Confronto K-Means Clustering vs Etichette Vere", fontsize=16)
-plt.tight_layout(rect=[0, 0, 1, 0.96]) # Aggiusta layout per il suptitle
-plt.show()
-
-print("\nEsecuzione script K-Means completata.")
\ No newline at end of file
+
+
+def main(fase=nullcontext, disegna=True, mostra_grafico=None, dimostrazioni=True, dati=None):
+    """Esegue l'intero esempio K-Means e restituisce i risultati principali.
+
+    - fase: funzione che riceve il nome di una fase ('load', 'scale', 'fit', 'predict',
+      'evaluate', 'plot', ...) e restituisce un context manager. Di default non fa nulla;
+      il runner utils/esegui.py la usa per misurare tempo e memoria di ogni fase.
+    - disegna: se False i grafici non vengono creati (utile su un server senza display).
+    - mostra_grafico: chiamata con il nome del grafico al posto di plt.show()
+      (es. per salvarlo su file).
+    - dimostrazioni: se False salta le sezioni di confronto extra (es. il K-Means accelerato
+      o quello online).
+    - dati: coppia (X, y) da usare al posto del dataset dell'esempio, ad es. un dataset
+      grande generato con utils/dataset.py e aperto con carica_dataset (memory-map).
+    """
+    if disegna:
+        # matplotlib viene importato solo se servono i grafici: il solo import richiede
+        # più tempo dell'addestramento di questi esempi
+        import matplotlib.pyplot as plt
+        if mostra_grafico is None:
+            mostra_grafico = lambda nome: plt.show()
+
+    # --- 1. Generazione dei Dati di Esempio ---
+    print("--- K-Means Clustering ---")
+    print("Generazione dati di esempio con make_blobs..." if dati is None else "Caricamento del dataset fornito...")
+
+    # Creiamo dei "blob" di punti per simulare cluster naturali.
+    # n_samples: numero totale di punti.
+    # centers: numero di centri (cluster) da generare o coordinate dei centri.
+    # cluster_std: deviazione standard dei cluster (quanto sono sparsi).
+    # random_state: per riproducibilità.
+    n_samples = 300
+    n_features = 2
+    n_clusters_dati = 15 # Numero di cluster che vogliamo generare
+    random_seed = 42
+
+    with fase('load'):
+        if dati is None:
+            from sklearn.datasets import make_blobs # Per generare dati di esempio per il clustering
+            X, y_true = make_blobs(n_samples=n_samples,
+                                   n_features=n_features,
+                                   centers=n_clusters_dati,
+                                   cluster_std=0.7, # Cluster abbastanza definiti
+                                   random_state=random_seed)
+        else:
+            X, y_true = dati
+            n_clusters_dati = len(np.unique(y_true))
+
+    print(f"Generati {X.shape[0]} campioni con {X.shape[1]} features.")
+    # y_true contiene le etichette vere dei cluster, ma K-Means non le userà (è non supervisionato).
+    # Le useremo solo alla fine per confrontare visivamente il risultato.
+
+    # --- (Opzionale ma consigliato) Standardizzazione delle Features ---
+    # Anche se K-Means può funzionare senza, se le feature hanno scale molto diverse
+    # la standardizzazione può migliorare i risultati.
+    print("\nStandardizzazione delle features...")
+    with fase('scale'):
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+    # Per questo esempio con make_blobs e cluster_std simili, l'effetto potrebbe non essere drastico,
+    # ma è una buona pratica. Useremo X_scaled da ora.
+
+    # --- 2. Creazione e Addestramento del Modello K-Means ---
+    # Scegliamo il numero di cluster (k) per l'algoritmo K-Means.
+    # In un caso reale, non conosceremmo n_clusters_dati e dovremmo usare metodi
+    # come l'Elbow method o Silhouette score per stimare il k ottimale.
+    # Qui, per semplicità didattica, usiamo il numero di cluster che sappiamo essere presenti.
+    k_kmeans = n_clusters_dati
+    print(f"\nCreazione del modello K-Means con k={k_kmeans} cluster...")
+
+    # random_state nel KMeans assicura che l'inizializzazione dei centroidi sia la stessa,
+    # portando a risultati riproducibili.
+    # n_init='auto' è l'impostazione predefinita nelle versioni recenti di scikit-learn
+    # per eseguire l'algoritmo più volte con diverse inizializzazioni dei centroidi.
+    kmeans = KMeans(n_clusters=k_kmeans, random_state=random_seed, n_init='auto')
+
+    print("Addestramento del modello K-Means...")
+    # Addestriamo il modello K-Means sui dati (standardizzati)
+    # K-Means assegna ogni punto a un cluster e calcola i centroidi.
+    with fase('fit'):
+        kmeans.fit(X_scaled)
+    print("Modello addestrato.")
+
+    # --- 3. Ottenere le Etichette dei Cluster e i Centroidi ---
+    with fase('predict'):
+        # Etichette dei cluster assegnate a ciascun punto dati
+        labels_pred = kmeans.labels_
+
+        # Coordinate dei centroidi dei cluster trovati
+        centroids = kmeans.cluster_centers_
+
+    print(f"\nEtichette dei cluster predette per i primi 10 punti: {labels_pred[:10]}")
+    print(f"Coordinate dei centroidi dei {k_kmeans} cluster:\n{centroids}")
+
+    # --- 4. Valutazione del Modello (Principalmente Visiva in questo script) ---
+    # In pratica, si userebbero metriche come:
+    # - Inertia (WCSS - Within-Cluster Sum of Squares): kmeans.inertia_
+    #   Misura la somma delle distanze al quadrato dei campioni dal centro del loro cluster.
+    #   Tende a diminuire all'aumentare di k. Usata nell'Elbow Method.
+    # - Silhouette Score: misura quanto un campione sia simile al proprio cluster
+    #   rispetto agli altri cluster. Valori vicini a +1 indicano buona clusterizzazione.
+    #   (from sklearn.metrics import silhouette_score)
+
+    with fase('evaluate'):
+        inertia = kmeans.inertia_
+    print(f"\nInertia (WCSS) del modello: {inertia:.2f}")
+    # silhouette_avg = silhouette_score(X_scaled, labels_pred)
+    # print(f"Silhouette Score medio: {silhouette_avg:.2f}") # Richiede sklearn.metrics
+
+    # --- 4b. K-Means Accelerato (per dataset molto grandi) ---
+    # Con decine di milioni di punti e centinaia di cluster ogni iterazione di Lloyd è lenta.
+    # kmeans_accelerato.py offre:
+    # - 'hamerly': stesso risultato di Lloyd, ma salta le distanze che (per la disuguaglianza
+    #   triangolare) non possono cambiare l'assegnazione di un punto;
+    # - 'minibatch': aggiorna i centroidi con piccoli campioni casuali (approssimato).
+    # Per confrontare l'inerzia partiamo dagli stessi centroidi iniziali di scikit-learn.
+    if dimostrazioni:
+        from sklearn.cluster import kmeans_plusplus
+        from kmeans_accelerato import KMeansAccelerato
+
+        with fase('kmeans_accelerato'):
+            centroidi_iniziali, _ = kmeans_plusplus(X_scaled, k_kmeans, random_state=random_seed)
+            print("\nK-Means accelerato (Hamerly), distanze saltate per iterazione:")
+            kmeans_hamerly = KMeansAccelerato(n_clusters=k_kmeans, algoritmo='hamerly', init=centroidi_iniziali,
+                                              verbose=True).fit(X_scaled)
+            kmeans_minibatch = KMeansAccelerato(n_clusters=k_kmeans, algoritmo='minibatch', init=centroidi_iniziali,
+                                                batch_size=64, random_state=random_seed).fit(X_scaled)
+        print(f"Inertia Hamerly:    {kmeans_hamerly.inertia_:.2f} (scikit-learn: {kmeans.inertia_:.2f})")
+        print(f"Inertia Mini-batch: {kmeans_minibatch.inertia_:.2f} "
+              f"({100 * (kmeans_minibatch.inertia_ / kmeans.inertia_ - 1):+.2f}% rispetto a scikit-learn)")
+
+    # --- 4c. Scelta di k (Elbow method e Silhouette) ---
+    # Facciamo finta di non conoscere n_clusters_dati: selezione_k.py addestra K-Means per
+    # un intervallo di k (in parallelo, ogni k parte dai centroidi del k precedente) e
+    # stima la silhouette su un campione di punti, quindi funziona anche con milioni di punti.
+    if dimostrazioni:
+        from selezione_k import seleziona_k
+
+        print("\nScelta di k con Elbow method e Silhouette (k da 2 a 20):")
+        with fase('selezione_k'):
+            selezione = seleziona_k(X_scaled, range(2, 21), random_state=random_seed)
+        print(f"k suggerito dal gomito dell'inertia: {selezione['k_gomito']}")
+        print(f"k con la silhouette più alta: {selezione['k_silhouette']} "
+              f"(silhouette {max(selezione['silhouette']):.3f}; k usato sopra: {k_kmeans})")
+
+        if disegna:
+            with fase('plot'):
+                fig, (ax_inerzia, ax_silhouette) = plt.subplots(1, 2, figsize=(12, 4))
+                ax_inerzia.plot(selezione['k'], selezione['inerzia'], marker='o')
+                ax_inerzia.axvline(selezione['k_gomito'], color='red', linestyle='--', label='Gomito')
+                ax_inerzia.set_title("Elbow method")
+                ax_inerzia.set_xlabel("k")
+                ax_inerzia.set_ylabel("Inertia (WCSS)")
+                ax_inerzia.legend()
+                ax_silhouette.plot(selezione['k'], selezione['silhouette'], marker='o', color='green')
+                ax_silhouette.axvline(selezione['k_silhouette'], color='red', linestyle='--', label='Massimo')
+                ax_silhouette.set_title("Silhouette media (stimata)")
+                ax_silhouette.set_xlabel("k")
+                ax_silhouette.legend()
+                plt.tight_layout()
+                mostra_grafico("kmeans_selezione_k")
+
+    # --- 4d. K-Means Online (punti che arrivano nel tempo) ---
+    # Se i punti arrivano di continuo, KMeans.fit andrebbe rifatto da zero ogni volta.
+    # KMeansStreaming (kmeans_streaming.py) aggiorna i centroidi con partial_fit, un
+    # blocco di punti alla volta: il costo dipende solo dalla dimensione del blocco.
+    # Qui simuliamo l'arrivo dei punti in blocchi da 50, partendo dagli stessi centroidi.
+    if dimostrazioni:
+        from sklearn.cluster import kmeans_plusplus
+        from kmeans_streaming import KMeansStreaming
+
+        with fase('streaming'):
+            centroidi_iniziali, _ = kmeans_plusplus(X_scaled, k_kmeans, random_state=random_seed)
+            kmeans_online = KMeansStreaming(n_clusters=k_kmeans, init=centroidi_iniziali)
+            for inizio in range(0, X_scaled.shape[0], 50):
+                kmeans_online.partial_fit(X_scaled[inizio:inizio + 50])
+        print(f"\nInertia K-Means online (blocchi da 50 punti): {-kmeans_online.score(X_scaled):.2f} "
+              f"(scikit-learn: {kmeans.inertia_:.2f})")
+
+    # --- 5. Visualizzazione dei Risultati ---
+    if disegna:
+        with fase('plot'):
+            # Grafico 1: Dati clusterizzati da K-Means
+            plt.figure(figsize=(12, 5))
+
+            plt.subplot(1, 2, 1)
+            # Punti dati, colorati in base al cluster assegnato da K-Means
+            plt.scatter(X_scaled[:, 0], X_scaled[:, 1], c=labels_pred, s=50, cmap='viridis', alpha=0.7)
+            # Centroidi dei cluster
+            plt.scatter(centroids[:, 0], centroids[:, 1], c='red', s=200, marker='X', edgecolor='black', label='Centroidi')
+            plt.title(f"K-Means Clustering (k={k_kmeans}) - Predizioni")
+            plt.xlabel("Feature 1 (standardizzata)")
+            plt.ylabel("Feature 2 (standardizzata)")
+            plt.legend()
+            plt.grid(True)
+
+            # Grafico 2: Dati originali con le etichette vere (per confronto)
+            plt.subplot(1, 2, 2)
+            plt.scatter(X_scaled[:, 0], X_scaled[:, 1], c=y_true, s=50, cmap='viridis', alpha=0.7)
+            plt.title("Dati Originali - Etichette Vere")
+            plt.xlabel("Feature 1 (standardizzata)")
+            plt.ylabel("Feature 2 (standardizzata)")
+            plt.grid(True)
+
+            plt.suptitle("Confronto K-Means Clustering vs Etichette Vere", fontsize=16)
+            plt.tight_layout(rect=[0, 0, 1, 0.96]) # Aggiusta layout per il suptitle
+            mostra_grafico("kmeans_cluster")
+
+    print("\nEsecuzione script K-Means completata.")
+    return {'model': kmeans, 'scaler': scaler, 'inertia': inertia}
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+# K-Means online (streaming) con decadimento dei centroidi
+#
+# KMeans.fit riparte da zero ogni volta: se i punti arrivano di continuo bisognerebbe
+# riaddestrare periodicamente su tutti i dati (o su una finestra recente). Il K-Means
+# sequenziale invece aggiorna i centroidi con ogni nuovo blocco di punti:
+#
+#   1. ogni punto del blocco viene assegnato al centroide più vicino;
+#   2. ogni centroide diventa la media pesata tra sé stesso (con il peso dei punti visti
+#      finora) e i nuovi punti assegnati:  c = (w·c + Σx) / (w + n_nuovi).
+#
+# Il costo dipende solo dalla dimensione del blocco (n_blocco x k distanze), non da
+# quanti punti sono stati visti prima. Con fattore_oblio < 1 il peso dei punti vecchi
+# diminuisce ad ogni nuovo punto: i centroidi seguono i cluster che si spostano nel
+# tempo (drift). Un cluster che non riceve più punti perde peso; quando diventa
+# trascurabile viene spostato accanto al cluster più pesante, che viene diviso in due
+# (come fa lo StreamingKMeans di Spark). I cluster che non hanno ancora ricevuto punti
+# (es. centroidi iniziali scelti dall'utente) restano dove sono.
+#
+# Confronto con il riaddestramento periodico di KMeans su dati che cambiano nel tempo:
+#   python kmeans_streaming.py
+import argparse
+import time
+
+import numpy as np
+
+from kmeans_accelerato import _distanze_quadrate, _kmeans_plusplus
+
+SOGLIA_CLUSTER_MORTO = 1e-8 # Peso relativo al cluster più pesante sotto il quale un cluster viene rianimato
+
+
+class KMeansStreaming:
+    """K-Means aggiornato un blocco di punti alla volta con partial_fit.
+
+    - n_clusters: numero di cluster k.
+    - fattore_oblio: peso (tra 0 e 1) che ogni punto perde ad ogni nuovo punto. Con 1.0
+      ogni centroide è la media di tutti i punti che gli sono stati assegnati; con ad es.
+      0.9999 il modello "ricorda" circa gli ultimi 1 / (1 - 0.9999) = 10000 punti.
+    - init: 'k-means++' (sul primo blocco, che deve avere almeno n_clusters punti)
+      oppure un array (n_clusters, n_features) di centroidi iniziali.
+
+    Il modello si può interrogare (predict) mentre un altro thread chiama partial_fit:
+    i nuovi centroidi vengono calcolati in un array nuovo e sostituiti con una sola
+    assegnazione alla fine dell'aggiornamento (partial_fit va chiamato da un thread alla volta).
+    """
+
+    def __init__(self, n_clusters=8, fattore_oblio=1.0, init='k-means++', random_state=None):
+        if not 0.0 < fattore_oblio <= 1.0:
+            raise ValueError(f"fattore_oblio deve essere in (0, 1], ricevuto {fattore_oblio}")
+        self.n_clusters = n_clusters
+        self.fattore_oblio = fattore_oblio
+        self.init = init
+        self.random_state = random_state
+        self.n_samples_seen_ = 0
+
+    def partial_fit(self, X):
+        """Aggiorna i centroidi con un blocco di punti X (n, n_features)."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[0] == 0:
+            return self
+        if not hasattr(self, '_stato'):
+            self._inizializza(X)
+
+        centroidi, norme = self._stato
+        n, k = X.shape[0], self.n_clusters
+        etichette = _distanze_quadrate(X, centroidi, norme).argmin(axis=1)
+        if self.fattore_oblio == 1.0:
+            pesi_punti, decadimento = None, 1.0
+        else:
+            # L'ultimo punto del blocco ha peso 1, il penultimo λ, ...; i pesi accumulati
+            # finora vengono moltiplicati per λ^n, come se i punti arrivassero uno alla volta.
+            pesi_punti = self.fattore_oblio ** np.arange(n - 1, -1, -1, dtype=np.float64)
+            decadimento = self.fattore_oblio ** n
+        pesi_nuovi = np.bincount(etichette, weights=pesi_punti, minlength=k)
+        somme = np.stack([np.bincount(etichette, weights=X[:, j] if pesi_punti is None else X[:, j] * pesi_punti,
+                                      minlength=k) for j in range(X.shape[1])], axis=1)
+
+        pesi_vecchi = self.pesi_ * decadimento
+        pesi = pesi_vecchi + pesi_nuovi
+        nuovi = centroidi.copy()
+        aggiornati = pesi_nuovi > 0
+        nuovi[aggiornati] = ((pesi_vecchi[aggiornati, None] * centroidi[aggiornati] + somme[aggiornati])
+                             / pesi[aggiornati, None])
+        self._ricevuti |= aggiornati
+        self._rianima(nuovi, pesi)
+
+        self.pesi_ = pesi
+        self.n_samples_seen_ += n
+        # Una sola assegnazione: predict vede i centroidi vecchi o quelli nuovi, mai un misto
+        self._stato = (nuovi, np.einsum('ij,ij->i', nuovi, nuovi))
+        return self
+
+    def fit(self, X, dimensione_blocco=1024):
+        """Riparte da zero e passa tutti i punti di X, a blocchi, a partial_fit."""
+        for attributo in ('_stato', 'pesi_', '_rng', '_ricevuti'):
+            self.__dict__.pop(attributo, None)
+        self.n_samples_seen_ = 0
+        for inizio in range(0, X.shape[0], dimensione_blocco):
+            self.partial_fit(X[inizio:inizio + dimensione_blocco])
+        return self
+
+    @property
+    def cluster_centers_(self):
+        try:
+            return self._stato[0]
+        except AttributeError:
+            raise AttributeError("Il modello non è ancora stato addestrato") from None
+
+    def predict(self, X):
+        centroidi, norme = self._stato
+        return _distanze_quadrate(np.asarray(X, dtype=np.float64), centroidi, norme).argmin(axis=1)
+
+    def score(self, X):
+        """Meno la somma delle distanze al quadrato dal centroide più vicino (come KMeans.score)."""
+        centroidi, norme = self._stato
+        return -float(_distanze_quadrate(np.asarray(X, dtype=np.float64), centroidi, norme).min(axis=1).sum())
+
+    # --- Funzioni di supporto ---
+
+    def _inizializza(self, X):
+        self._rng = np.random.default_rng(self.random_state)
+        if isinstance(self.init, str):
+            if X.shape[0] < self.n_clusters:
+                raise ValueError(f"Il primo blocco ha {X.shape[0]} punti: ne servono almeno n_clusters="
+                                 f"{self.n_clusters} per k-means++ (oppure passa init=array di centroidi)")
+            centroidi = _kmeans_plusplus(X, self.n_clusters, self._rng)
+        else:
+            centroidi = np.array(self.init, dtype=np.float64)
+        self.pesi_ = np.zeros(self.n_clusters)
+        self._ricevuti = np.zeros(self.n_clusters, dtype=bool) # Cluster che hanno ricevuto almeno un punto
+        self._stato = (centroidi, np.einsum('ij,ij->i', centroidi, centroidi))
+
+    def _rianima(self, centroidi, pesi):
+        """Sposta i cluster con peso trascurabile accanto al cluster più pesante, dividendolo.
+
+        Solo i cluster il cui peso è decaduto: uno che non ha mai ricevuto punti ha peso 0
+        fin dall'inizio, ma non è "morto" (potrebbe ricevere punti dal prossimo blocco).
+        """
+        morti = np.flatnonzero(self._ricevuti & (pesi < SOGLIA_CLUSTER_MORTO * pesi.max()))
+        for j in morti:
+            piu_pesante = np.argmax(pesi)
+            scala = 1e-6 * np.maximum(np.abs(centroidi[piu_pesante]), 1.0)
+            perturbazione = self._rng.standard_normal(centroidi.shape[1]) * scala
+            centroidi[j] = centroidi[piu_pesante] + perturbazione
+            centroidi[piu_pesante] -= perturbazione
+            pesi[j] = pesi[piu_pesante] = pesi[piu_pesante] / 2
+
+
+# --- Benchmark: cluster che si spostano nel tempo (drift) ---
+
+def flusso_blob_con_drift(n_blocchi, dimensione_blocco, n_centri=5, velocita=0.05, random_state=42):
+    """Blocchi di punti attorno a `n_centri` centri che si muovono in linea retta.
+
+    Ad ogni blocco ogni centro si sposta di `velocita` (deviazione standard dei cluster: 0.5).
+    """
+    rng = np.random.default_rng(random_state)
+    centri = rng.uniform(-10.0, 10.0, (n_centri, 2))
+    direzioni = rng.standard_normal((n_centri, 2))
+    direzioni /= np.linalg.norm(direzioni, axis=1, keepdims=True)
+    for _ in range(n_blocchi):
+        etichette = rng.integers(0, n_centri, dimensione_blocco)
+        yield centri[etichette] + rng.standard_normal((dimensione_blocco, 2)) * 0.5
+        centri = centri + direzioni * velocita
+
+
+def benchmark_drift(n_blocchi=300, dimensione_blocco=500, n_clusters=5, finestra=5000, ogni=20,
+                    random_state=42):
+    """Confronta KMeansStreaming con il riaddestramento periodico di KMeans.
+
+    Errore "prequenziale": ogni blocco viene prima valutato con i centroidi attuali
+    (distanza al quadrato media dal centroide più vicino) e solo dopo usato per aggiornarli.
+    - finestra: punti ricordati (oblio 1 - 1/finestra; punti usati dal riaddestramento).
+    - ogni: KMeans viene riaddestrato da zero ogni `ogni` blocchi.
+    """
+    from collections import deque
+    from sklearn.cluster import KMeans
+
+    class RiaddestramentoPeriodico:
+        # KMeans rifatto da zero sugli ultimi `finestra` punti ogni `ogni` blocchi
+        def __init__(self):
+            self.blocchi, self.n_visti, self.modello = deque(maxlen=max(1, finestra // dimensione_blocco)), 0, None
+
+        def partial_fit(self, X):
+            self.blocchi.append(X)
+            self.n_visti += 1
+            if self.modello is None or self.n_visti % ogni == 0:
+                self.modello = KMeans(n_clusters=n_clusters, n_init='auto',
+                                      random_state=random_state).fit(np.vstack(self.blocchi))
+
+        def score(self, X):
+            return self.modello.score(X)
+
+    modelli = {
+        f'streaming, oblio 1-1/{finestra}': KMeansStreaming(n_clusters, fattore_oblio=1 - 1 / finestra,
+                                                            random_state=random_state),
+        'streaming, senza oblio': KMeansStreaming(n_clusters, random_state=random_state),
+        f'KMeans ogni {ogni} blocchi': RiaddestramentoPeriodico(),
+    }
+    risultati = {nome: {'errore': 0.0, 'n': 0, 'tempi': []} for nome in modelli}
+    for t, X in enumerate(flusso_blob_con_drift(n_blocchi, dimensione_blocco, n_clusters, random_state=random_state)):
+        for nome, modello in modelli.items():
+            r = risultati[nome]
+            if t > 0:
+                r['errore'] -= modello.score(X)
+                r['n'] += len(X)
+            inizio = time.perf_counter()
+            modello.partial_fit(X)
+            r['tempi'].append(time.perf_counter() - inizio)
+    return {nome: {'inerzia_media': r['errore'] / r['n'], 'tempo_totale_s': sum(r['tempi']),
+                   'aggiornamento_max_ms': max(r['tempi']) * 1000}
+            for nome, r in risultati.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="K-Means online contro riaddestramento periodico su dati con drift")
+    parser.add_argument("--blocchi", type=int, default=300, help="Numero di blocchi del flusso")
+    parser.add_argument("--dimensione-blocco", type=int, default=500, help="Punti per blocco")
+    parser.add_argument("--finestra", type=int, default=5000,
+                        help="Punti ricordati dal modello online e usati dal riaddestramento")
+    parser.add_argument("--ogni", type=int, default=20, help="Blocchi tra due riaddestramenti completi")
+    args = parser.parse_args()
+
+    print("--- K-Means online vs riaddestramento periodico (cluster in movimento) ---")
+    print(f"{'modello':<30} {'inerzia media':>14} {'tempo totale':>13} {'agg. max':>10}")
+    for nome, r in benchmark_drift(args.blocchi, args.dimensione_blocco, finestra=args.finestra,
+                                   ogni=args.ogni).items():
+        print(f"{nome:<30} {r['inerzia_media']:>14.3f} {r['tempo_totale_s']:>12.3f}s "
+              f"{r['aggiornamento_max_ms']:>8.2f}ms")
+    print("(Inerzia media prequenziale: distanza al quadrato dal centroide più vicino, calcolata prima "
+          "dell'aggiornamento; il minimo teorico è 2 · 0.5² = 0.5)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# Scelta del numero di cluster k per K-Means
+#
+# In un caso reale non conosciamo il numero di cluster: si addestra K-Means per diversi
+# valori di k e si confrontano due curve:
+#
+# - Inertia (metodo del gomito): diminuisce sempre all'aumentare di k; si sceglie il k
+#   dopo il quale la diminuzione rallenta (il "gomito" della curva).
+# - Silhouette: per ogni punto confronta la distanza media dal proprio cluster (a) con
+#   quella dal cluster più vicino (b): s = (b - a) / max(a, b). Si sceglie il k con la
+#   silhouette media più alta.
+#
+# silhouette_score di scikit-learn calcola le distanze tra TUTTE le coppie di punti
+# (n² distanze): con milioni di punti non termina. Qui la stimiamo su un campione di
+# punti, confrontandoli con tutti gli altri a blocchi: la memoria usata non dipende da n.
+#
+# Per risparmiare iterazioni, ogni k parte dai centroidi già trovati per il k precedente
+# (più i centroidi mancanti scelti come in k-means++). I valori di k vengono divisi in
+# segmenti consecutivi, uno per processo, e i processi leggono X da memoria condivisa.
+#
+# Esempio:
+#   risultato = seleziona_k(X_scaled, range(2, 21), processi=4)
+#   print(risultato['k_consigliato'])
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from kmeans_accelerato import KMeansAccelerato, _distanze_quadrate, _kmeans_plusplus
+
+# Dati condivisi visti da ciascun processo (impostati da _inizializza_processo)
+_DATI = {}
+_SEGMENTI = []
+
+
+def _inizializza_processo(cartella, nome, forma, dtype):
+    """Eseguita una volta per processo: collega X condiviso senza copiarlo."""
+    import sys
+    from threadpoolctl import threadpool_limits
+
+    if cartella not in sys.path: # Per importare kmeans_accelerato anche con 'spawn'
+        sys.path.insert(0, cartella)
+    # Un thread BLAS per processo: il parallelismo lo fa già il pool
+    threadpool_limits(1)
+    segmento = shared_memory.SharedMemory(name=nome)
+    _SEGMENTI.append(segmento) # Teniamo un riferimento: la vista usa il suo buffer
+    _DATI['X'] = np.ndarray(forma, dtype=np.dtype(dtype), buffer=segmento.buf)
+
+
+def silhouette_campionata(X, etichette, n_clusters, campioni=2000, campioni_riferimento=100_000,
+                          dimensione_blocco=None, random_state=None):
+    """Stima della silhouette media con memoria limitata.
+
+    - campioni: punti di cui calcolare la silhouette (scelti a caso).
+    - campioni_riferimento: punti con cui confrontarli (None = tutti). Con None la stima
+      è la media esatta della silhouette sui punti campionati, ma il costo cresce con n.
+    - dimensione_blocco: punti di riferimento elaborati insieme; di default la matrice
+      delle distanze di un blocco occupa circa 32 MB.
+    """
+    rng = np.random.default_rng(random_state)
+    n = X.shape[0]
+    interrogati = rng.choice(n, min(campioni, n), replace=False)
+    if campioni_riferimento is None or campioni_riferimento >= n:
+        riferimento = np.arange(n)
+    else:
+        riferimento = rng.choice(n, campioni_riferimento, replace=False)
+    if dimensione_blocco is None:
+        dimensione_blocco = max(1, 2**22 // len(interrogati))
+
+    # Ordiniamo i punti di riferimento per cluster: in ogni blocco i punti dello stesso
+    # cluster sono contigui e le somme per cluster si fanno con un solo np.add.reduceat.
+    riferimento = riferimento[np.argsort(etichette[riferimento], kind='stable')]
+    etichette_rif = etichette[riferimento]
+    conteggi = np.bincount(etichette_rif, minlength=n_clusters).astype(np.float64)
+
+    interrogati = np.sort(interrogati) # Letture in ordine: più veloci se X è in memory-map
+    Xq = np.asarray(X[interrogati], dtype=np.float64)
+    somme = np.zeros((len(interrogati), n_clusters)) # Somma delle distanze da ogni cluster
+    for inizio in range(0, len(riferimento), dimensione_blocco):
+        indici = riferimento[inizio:inizio + dimensione_blocco]
+        et = etichette_rif[inizio:inizio + dimensione_blocco]
+        D = _distanze_quadrate(Xq, np.asarray(X[indici], dtype=np.float64))
+        np.sqrt(D, out=D)
+        inizi = np.flatnonzero(np.r_[True, et[1:] != et[:-1]])
+        somme[:, et[inizi]] += np.add.reduceat(D, inizi, axis=1)
+
+    proprio = etichette[interrogati]
+    righe = np.arange(len(interrogati))
+    # Se il punto è tra quelli di riferimento, la distanza da sé stesso (0) non va contata
+    incluso = np.isin(interrogati, riferimento)
+    denominatore = conteggi[proprio] - incluso
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = somme[righe, proprio] / denominatore
+        medie = somme / conteggi
+    medie[righe, proprio] = np.inf
+    medie[:, conteggi == 0] = np.inf
+    b = medie.min(axis=1)
+    s = (b - a) / np.maximum(a, b)
+    s[denominatore <= 0] = 0.0 # Cluster con un solo punto: silhouette 0, come in scikit-learn
+    return float(np.mean(s))
+
+
+def _aggiungi_centroidi(X, centroidi, k, rng, dimensione_blocco=65536):
+    """Porta i centroidi a k aggiungendo, uno alla volta, punti scelti come in k-means++."""
+    d2 = np.concatenate([_distanze_quadrate(X[i:i + dimensione_blocco], centroidi).min(axis=1)
+                         for i in range(0, X.shape[0], dimensione_blocco)])
+    nuovi = [centroidi]
+    n_tentativi = 2 + int(np.log(k))
+    for _ in range(k - len(centroidi)):
+        candidati = np.minimum(np.searchsorted(np.cumsum(d2), rng.random(n_tentativi) * d2.sum()), len(d2) - 1)
+        d2_candidati = np.minimum(d2, _distanze_quadrate(X, X[candidati]).T)
+        migliore = np.argmin(d2_candidati.sum(axis=1))
+        nuovi.append(X[candidati[migliore]][None, :])
+        d2 = d2_candidati[migliore]
+    return np.concatenate(nuovi)
+
+
+def _valuta_catena(valori_k, parametri, X=None):
+    """Addestra K-Means per i valori di k di un segmento, ognuno partendo dal precedente."""
+    X = _DATI['X'] if X is None else X
+    risultati = []
+    centroidi = None
+    for k in valori_k:
+        inizio = time.perf_counter()
+        rng = np.random.default_rng([parametri['random_state'], k])
+        if centroidi is None:
+            init = _kmeans_plusplus(X, k, rng)
+        else:
+            init = _aggiungi_centroidi(X, centroidi, k, rng)
+        modello = KMeansAccelerato(n_clusters=k, algoritmo=parametri['algoritmo'], init=init,
+                                   random_state=parametri['random_state']).fit(X)
+        centroidi = modello.cluster_centers_
+        silhouette = silhouette_campionata(X, modello.labels_, k, parametri['campioni_silhouette'],
+                                           parametri['campioni_riferimento'],
+                                           random_state=parametri['random_state'])
+        risultati.append({'k': int(k), 'inerzia': modello.inertia_, 'silhouette': silhouette,
+                          'n_iter': modello.n_iter_, 'centroidi': centroidi,
+                          'tempo_s': time.perf_counter() - inizio})
+    return risultati
+
+
+def k_gomito(valori_k, inerzie):
+    """Gomito della curva dell'inertia: il punto più lontano dalla retta tra il primo e l'ultimo.
+
+    Entrambi gli assi vengono normalizzati in [0, 1], così il risultato non dipende dalla
+    scala dell'inertia.
+    """
+    k = np.asarray(valori_k, dtype=np.float64)
+    inerzie = np.asarray(inerzie, dtype=np.float64)
+    if len(k) < 3:
+        return int(k[0])
+    x = (k - k[0]) / (k[-1] - k[0])
+    y = (inerzie - inerzie.min()) / max(inerzie.max() - inerzie.min(), 1e-300)
+    return int(k[np.argmax((1 - x) - y)]) # Distanza (verticale) sotto la retta da (0, 1) a (1, 0)
+
+
+def seleziona_k(X, valori_k=range(2, 11), algoritmo='hamerly', campioni_silhouette=2000,
+                campioni_riferimento=100_000, processi=None, random_state=42, verbose=False):
+    """Addestra K-Means per ogni k in `valori_k` e suggerisce il k migliore.
+
+    Restituisce un dizionario con le curve ('k', 'inerzia', 'silhouette', 'n_iter',
+    'tempo_s'), i centroidi trovati per ogni k, 'k_gomito', 'k_silhouette' e
+    'k_consigliato' (quello con silhouette più alta).
+    - algoritmo: 'hamerly' (esatto) o 'minibatch' (per dataset enormi), vedi kmeans_accelerato.py.
+    - processi: numero di processi (None = tutti i core, 1 = nessun pool).
+    """
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    valori_k = sorted(int(k) for k in valori_k)
+    parametri = {'algoritmo': algoritmo, 'campioni_silhouette': campioni_silhouette,
+                 'campioni_riferimento': campioni_riferimento, 'random_state': random_state}
+    processi = min(processi or os.cpu_count(), len(valori_k))
+    # Segmenti di k consecutivi: dentro un segmento si riparte dai centroidi precedenti
+    segmenti = [list(s) for s in np.array_split(valori_k, processi)]
+
+    if processi == 1:
+        risultati = _valuta_catena(valori_k, parametri, X)
+    else:
+        segmento = shared_memory.SharedMemory(create=True, size=max(X.nbytes, 1))
+        try:
+            np.ndarray(X.shape, dtype=X.dtype, buffer=segmento.buf)[...] = X
+            cartella = os.path.dirname(os.path.abspath(__file__))
+            with ProcessPoolExecutor(max_workers=processi, initializer=_inizializza_processo,
+                                     initargs=(cartella, segmento.name, X.shape, X.dtype.str)) as pool:
+                risultati = [r for parte in pool.map(_valuta_catena, segmenti, [parametri] * processi)
+                             for r in parte]
+        finally:
+            segmento.close()
+            segmento.unlink()
+
+    if verbose:
+        for r in risultati:
+            print(f"k={r['k']:3d}  inertia: {r['inerzia']:12.2f}  silhouette: {r['silhouette']:.3f}  "
+                  f"iterazioni: {r['n_iter']:3d}  ({r['tempo_s']:.2f} s)")
+
+    curve = {chiave: [r[chiave] for r in risultati] for chiave in ('k', 'inerzia', 'silhouette', 'n_iter', 'tempo_s')}
+    migliore_silhouette = curve['k'][int(np.argmax(curve['silhouette']))]
+    return {
+        **curve,
+        'centroidi': {r['k']: r['centroidi'] for r in risultati},
+        'k_gomito': k_gomito(curve['k'], curve['inerzia']),
+        'k_silhouette': migliore_silhouette,
+        'k_consigliato': migliore_silhouette,
+    }
@@ -1,104 +1,201 @@
 # Import delle librerie necessarie
+from contextlib import nullcontext
+
 import numpy as np
-import pandas as pd # Pandas è utile per visualizzare le feature importances
-import matplotlib.pyplot as plt
 from sklearn.tree import DecisionTreeClassifier, plot_tree
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, confusion_matrix, ConfusionMatrixDisplay
-from sklearn.datasets import load_breast_cancer # Useremo il dataset Breast Cancer
-
-# --- 1. Caricamento e Preparazione dei Dati ---
-print("--- Alberi Decisionali (Decision Tree Classifier) ---")
-print("Caricamento del dataset Breast Cancer...")
-cancer = load_breast_cancer()
-X = cancer.data # Features
-y = cancer.target # Target (0: maligno, 1: benigno)
-feature_names = cancer.feature_names
-target_names = cancer.target_names
-
-# Visualizziamo le dimensioni dei dati
-print(f"Numero di campioni: {X.shape[0]}")
-print(f"Numero di features: {X.shape[1]}")
-# print(f"Nomi delle features: {feature_names}") # Molte features, commentato per brevità
-print(f"Classi target: {target_names} (corrispondenti a {np.unique(y)})")
-
-# --- 2. Divisione dei Dati in Training Set e Test Set ---
-# test_size=0.3 significa che il 30% dei dati sarà usato per il test.
-# random_state assicura che la divisione sia sempre la stessa.
-# stratify=y è importante per i problemi di classificazione.
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
-
-print(f"\nDimensioni Training Set: {X_train.shape[0]} campioni")
-print(f"Dimensioni Test Set: {X_test.shape[0]} campioni")
-
-# --- 3. Creazione e Addestramento del Modello ---
-# Inizializziamo il classificatore ad albero decisionale.
-# - criterion: la funzione per misurare la qualità di una divisione ('gini' o 'entropy').
-# - max_depth: la profondità massima dell'albero. Utile per prevenire l'overfitting
-#   e per rendere l'albero visualizzabile.
-# - random_state: per riproducibilità.
-max_tree_depth = 4 # Limitiamo la profondità per una migliore visualizzazione
-print(f"\nCreazione del modello Decision Tree con max_depth={max_tree_depth}")
-model = DecisionTreeClassifier(criterion='gini',
-                               max_depth=max_tree_depth,
+
+
+def main(fase=nullcontext, disegna=True, mostra_grafico=None, dimostrazioni=True, dati=None, usa_istogrammi=False,
+         usa_foresta=False):
+    """Esegue l'intero esempio sugli Alberi Decisionali e restituisce i risultati principali.
+
+    - fase: funzione che riceve il nome di una fase ('load', 'split', 'fit', 'predict',
+      'evaluate', 'plot', ...) e restituisce un context manager. Di default non fa nulla;
+      il runner utils/esegui.py la usa per misurare tempo e memoria di ogni fase.
+    - disegna: se False i grafici non vengono creati (utile su un server senza display).
+    - mostra_grafico: chiamata con il nome del grafico al posto di plt.show()
+      (es. per salvarlo su file).
+    - dimostrazioni: se False salta la dimostrazione dell'albero compilato (sezione 8).
+    - dati: coppia (X, y) da usare al posto del dataset dell'esempio, ad es. un dataset
+      grande generato con utils/dataset.py e aperto con carica_dataset (memory-map).
+    - usa_istogrammi: se True usa AlberoIstogrammi (vedi sezione 3) al posto di DecisionTreeClassifier.
+    - usa_foresta: se True addestra una foresta casuale di 200 alberi (ForestaCasuale, vedi sezione 3).
+    """
+    if disegna:
+        # matplotlib viene importato solo se servono i grafici: il solo import richiede
+        # più tempo dell'addestramento di questi esempi
+        import matplotlib.pyplot as plt
+        if mostra_grafico is None:
+            mostra_grafico = lambda nome: plt.show()
+
+    # --- 1. Caricamento e Preparazione dei Dati ---
+    print("--- Alberi Decisionali (Decision Tree Classifier) ---")
+    print("Caricamento del dataset Breast Cancer..." if dati is None else "Caricamento del dataset fornito...")
+    with fase('load'):
+        if dati is None:
+            from sklearn.datasets import load_breast_cancer # Useremo il dataset Breast Cancer
+            cancer = load_breast_cancer()
+            X = cancer.data # Features
+            y = cancer.target # Target (0: maligno, 1: benigno)
+            feature_names = cancer.feature_names
+            target_names = cancer.target_names
+        else:
+            X, y = dati
+            feature_names = np.array([f"feature {i}" for i in range(X.shape[1])])
+            target_names = np.unique(y).astype(str)
+
+    # Visualizziamo le dimensioni dei dati
+    print(f"Numero di campioni: {X.shape[0]}")
+    print(f"Numero di features: {X.shape[1]}")
+    # print(f"Nomi delle features: {feature_names}") # Molte features, commentato per brevità
+    print(f"Classi target: {target_names} (corrispondenti a {np.unique(y)})")
+
+    # --- 2. Divisione dei Dati in Training Set e Test Set ---
+    # test_size=0.3 significa che il 30% dei dati sarà usato per il test.
+    # random_state assicura che la divisione sia sempre la stessa.
+    # stratify=y è importante per i problemi di classificazione.
+    with fase('split'):
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+
+    print(f"\nDimensioni Training Set: {X_train.shape[0]} campioni")
+    print(f"Dimensioni Test Set: {X_test.shape[0]} campioni")
+
+    # --- 3. Creazione e Addestramento del Modello ---
+    # Inizializziamo il classificatore ad albero decisionale.
+    # - criterion: la funzione per misurare la qualità di una divisione ('gini' o 'entropy').
+    # - max_depth: la profondità massima dell'albero. Utile per prevenire l'overfitting
+    #   e per rendere l'albero visualizzabile.
+    # - random_state: per riproducibilità.
+    max_tree_depth = 4 # Limitiamo la profondità per una migliore visualizzazione
+    # Con tabelle molto grandi puoi usare l'albero basato su istogrammi (albero_istogrammi.py):
+    # le features vengono discretizzate una volta in al massimo 256 bin e le divisioni
+    # si cercano sugli istogrammi invece di ordinare i valori ad ogni nodo.
+    # Chiama main(usa_istogrammi=True) per usare AlberoIstogrammi.
+    # Per una accuratezza più alta si usa una foresta casuale: centinaia di alberi profondi,
+    # ognuno addestrato su un campione bootstrap e con features scelte a caso ad ogni nodo.
+    # ForestaCasuale (foresta_casuale.py) li costruisce in parallelo su più processi.
+    # Chiama main(usa_foresta=True) per usarla.
+    if usa_foresta:
+        from foresta_casuale import ForestaCasuale
+        print("\nCreazione di una foresta casuale con 200 alberi")
+        model = ForestaCasuale(n_estimators=200,
+                               criterion='gini',
+                               max_features='sqrt', # Features provate ad ogni nodo: radice quadrata del totale
                                random_state=42)
+    elif usa_istogrammi:
+        from albero_istogrammi import AlberoIstogrammi
+        print(f"\nCreazione del modello Decision Tree con max_depth={max_tree_depth}")
+        model = AlberoIstogrammi(criterion='gini',
+                                 max_depth=max_tree_depth,
+                                 max_bins=256,
+                                 random_state=42)
+    else:
+        print(f"\nCreazione del modello Decision Tree con max_depth={max_tree_depth}")
+        model = DecisionTreeClassifier(criterion='gini',
+                                       max_depth=max_tree_depth,
+                                       random_state=42)
+
+    nome_modello = "Random Forest" if usa_foresta else "Decision Tree"
+
+    # Addestriamo il modello utilizzando i dati di training
+    print(f"Addestramento del modello {nome_modello}...")
+    with fase('fit'):
+        model.fit(X_train, y_train)
+    print("Modello addestrato.")
+    print(f"Profondità effettiva dell'albero: {model.get_depth()}" if not usa_foresta
+          else f"Profondità massima degli alberi: {model.get_depth()}")
+
+    # --- 4. Effettuare Predizioni ---
+    # Usiamo il modello addestrato per fare predizioni sul test set
+    print("\nEffettuare predizioni sul Test Set...")
+    with fase('predict'):
+        y_pred = model.predict(X_test)
+
+    # --- 5. Valutazione del Modello ---
+    with fase('evaluate'):
+        # Accuratezza
+        accuracy = accuracy_score(y_test, y_pred)
+        # Matrice di Confusione
+        cm = confusion_matrix(y_test, y_pred)
+    print(f"Accuratezza del modello {nome_modello} sul Test Set: {accuracy:.3f} (ovvero {accuracy*100:.2f}%)")
+
+    if disegna:
+        print("\nGenerazione della Matrice di Confusione...")
+        with fase('plot'):
+            disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=target_names)
+            disp.plot(cmap=plt.cm.Blues)
+            plt.title("Matrice di Confusione (foresta casuale)" if usa_foresta
+                      else f"Matrice di Confusione (max_depth={max_tree_depth})")
+            mostra_grafico("albero_matrice_confusione")
+
+    # --- 6. Visualizzazione dell'Albero Decisionale ---
+    if disegna:
+        print("\nVisualizzazione dell'Albero Decisionale...")
+        if usa_istogrammi or usa_foresta:
+            # plot_tree funziona solo con gli alberi di scikit-learn
+            print(f"Visualizzazione non disponibile per {type(model).__name__}.")
+        else:
+            with fase('plot'):
+                plt.figure(figsize=(20,12)) # Imposta dimensioni più grandi per la figura
+                plot_tree(model,
+                          filled=True, # Colora i nodi per indicare la classe maggioritaria
+                          rounded=True, # Usa angoli arrotondati per i box dei nodi
+                          class_names=target_names, # Nomi delle classi target
+                          feature_names=feature_names, # Nomi delle features
+                          fontsize=10, # Dimensione del font
+                          proportion=False, # Mostra il numero di campioni invece che le proporzioni
+                          precision=2) # Numero di decimali per i valori
+                plt.title(f"Albero Decisionale (max_depth={max_tree_depth}) - Dataset Breast Cancer", fontsize=16)
+                mostra_grafico("albero_decisionale")
+
+    # --- 7. Importanza delle Features ---
+    # Gli alberi decisionali possono fornire una stima dell'importanza di ciascuna feature.
+    print("\nImportanza delle Features:")
+    with fase('evaluate'):
+        importances = model.feature_importances_
+        # Indici delle 10 features più importanti, dalla più importante
+        # (un ordinamento di NumPy basta: non serve importare pandas solo per questa tabella)
+        prime_10 = np.argsort(-importances, kind='stable')[:10]
+
+    print(f"{'feature':<25} {'importance':>10}")
+    for i in prime_10:
+        print(f"{feature_names[i]:<25} {importances[i]:>10.4f}")
+
+    # Grafico dell'importanza delle features (prime 10)
+    if disegna:
+        with fase('plot'):
+            plt.figure(figsize=(10, 6))
+            plt.title("Importanza delle Features (prime 10)")
+            plt.bar(feature_names[prime_10], importances[prime_10], color='skyblue')
+            plt.xlabel("Feature")
+            plt.ylabel("Importanza")
+            plt.xticks(rotation=45, ha="right")
+            plt.tight_layout() # Aggiusta il layout per evitare sovrapposizioni
+            mostra_grafico("albero_importanza_features")
+
+    # --- 8. Predizioni veloci con l'albero "compilato" ---
+    # Per predire una riga alla volta (es. in un servizio web) model.predict è lento: ogni
+    # chiamata controlla e converte l'input prima di fare i pochi confronti dell'albero.
+    # AlberoCompilato (compilatore_albero.py) trasforma l'albero in array contigui per i
+    # batch e in codice Python con if/else annidati per la singola riga.
+    if dimostrazioni and not usa_foresta:
+        from compilatore_albero import AlberoCompilato, tempo_per_chiamata
+        print("\nCompilazione dell'albero in array e codice Python...")
+        with fase('compilazione'):
+            compilato = AlberoCompilato(model)
+            identiche = np.array_equal(compilato.predict(X_test), y_pred)
+            riga = X_test[0]
+            tempo_predict, _ = tempo_per_chiamata(lambda: model.predict(riga.reshape(1, -1)), durata_minima=0.05)
+            tempo_codice, _ = tempo_per_chiamata(lambda: compilato.predici_riga(riga), durata_minima=0.05)
+        print(f"Predizioni identiche a model.predict sul Test Set: {'sì' if identiche else 'no'}")
+        print(f"Una riga: model.predict {tempo_predict * 1e6:.1f}µs, codice generato {tempo_codice * 1e6:.1f}µs "
+              f"({tempo_predict / tempo_codice:.0f}x più veloce)")
+
+    print("\nEsecuzione script Alberi Decisionali completata.")
+    return {'model': model, 'accuracy': accuracy, 'confusion_matrix': cm, 'X_test': X_test, 'y_test': y_test}
+
 
-# Addestriamo il modello utilizzando i dati di training
-print("Addestramento del modello Decision Tree...")
-model.fit(X_train, y_train)
-print("Modello addestrato.")
-print(f"Profondità effettiva dell'albero: {model.get_depth()}")
-
-# --- 4. Effettuare Predizioni ---
-# Usiamo il modello addestrato per fare predizioni sul test set
-print("\nEffettuare predizioni sul Test Set...")
-y_pred = model.predict(X_test)
-
-# --- 5. Valutazione del Modello ---
-# Accuratezza
-accuracy = accuracy_score(y_test, y_pred)
-print(f"Accuratezza del modello Decision Tree sul Test Set: {accuracy:.3f} (ovvero {accuracy*100:.2f}%)")
-
-# Matrice di Confusione
-print("\nGenerazione della Matrice di Confusione...")
-cm = confusion_matrix(y_test, y_pred)
-disp = ConfusionMatrixDisplay(confusion_matrix=cm, display_labels=target_names)
-disp.plot(cmap=plt.cm.Blues)
-plt.title(f"Matrice di Confusione (max_depth={max_tree_depth})")
-plt.show()
-
-# --- 6. Visualizzazione dell'Albero Decisionale ---
-print("\nVisualizzazione dell'Albero Decisionale...")
-plt.figure(figsize=(20,12)) # Imposta dimensioni più grandi per la figura
-plot_tree(model,
-          filled=True, # Colora i nodi per indicare la classe maggioritaria
-          rounded=True, # Usa angoli arrotondati per i box dei nodi
-          class_names=target_names, # Nomi delle classi target
-          feature_names=feature_names, # Nomi delle features
-          fontsize=10, # Dimensione del font
-          proportion=False, # Mostra il numero di campioni invece che le proporzioni
-          precision=2) # Numero di decimali per i valori
-plt.title(f"Albero Decisionale (max_depth={max_tree_depth}) - Dataset Breast Cancer", fontsize=16)
-plt.show()
-
-# --- 7. Importanza delle Features ---
-# Gli alberi decisionali possono fornire una stima dell'importanza di ciascuna feature.
-print("\nImportanza delle Features:")
-importances = model.feature_importances_
-# Creiamo un DataFrame Pandas per una visualizzazione più chiara
-feature_importance_df = pd.DataFrame({'feature': feature_names, 'importance': importances})
-feature_importance_df = feature_importance_df.sort_values('importance', ascending=False)
-
-print(feature_importance_df.head(10)) # Mostra le 10 features più importanti
-
-# Grafico dell'importanza delle features (prime 10)
-plt.figure(figsize=(10, 6))
-plt.title("Importanza delle Features (prime 10)")
-plt.bar(feature_importance_df['feature'][:10], feature_importance_df['importance'][:10], color='skyblue')
-plt.xlabel("Feature")
-plt.ylabel("Importanza")
-plt.xticks(rotation=45, ha="right")
-plt.tight_layout() # Aggiusta il layout per evitare sovrapposizioni
-plt.show()
-
-print("\nEsecuzione script Alberi Decisionali completata.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
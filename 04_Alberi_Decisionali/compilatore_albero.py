@@ -0,0 +1,227 @@
+# "Compilazione" di un albero decisionale addestrato per predizioni più veloci
+#
+# Un albero di profondità 4 decide con al massimo 4 confronti, ma model.predict di
+# scikit-learn per ogni chiamata controlla l'input, lo converte, chiama il codice
+# generico dell'albero e costruisce il risultato: per UNA riga questo costa decine di
+# microsecondi, molto più dei confronti veri e propri. Qui l'albero addestrato viene
+# trasformato in due predittori specializzati:
+#
+# (a) array contigui (feature, soglia, figli, classe di ogni nodo) percorsi da tutte le
+#     righe insieme, un livello alla volta: per i batch grandi;
+# (b) codice Python generato con if/else annidati e le soglie scritte come costanti:
+#     per una riga alla volta non serve NumPy, bastano pochi confronti tra float.
+#
+# DecisionTreeClassifier confronta le features dopo averle convertite in float32.
+# Per non dover convertire ogni riga, ogni soglia t viene sostituita dalla soglia
+# float64 t' per cui  x <= t'  vale esattamente quando  float32(x) <= t
+# (vedi soglie_equivalenti_float64): le predizioni restano identiche.
+#
+# Confronto dei tempi con model.predict a batch di 1, 100 e 1 milione di righe:
+#   python compilatore_albero.py
+import argparse
+import time
+
+import numpy as np
+
+FOGLIA = -1 # Stesso valore usato da scikit-learn (TREE_LEAF) per i figli delle foglie
+PROFONDITA_MASSIMA_CODICE = 90 # Python non accetta più di 100 livelli di indentazione
+
+
+def soglie_equivalenti_float64(soglie):
+    """Soglie t' tali che (x <= t') == (float32(x) <= t) per ogni x float64.
+
+    float32(x) è un float32, quindi float32(x) <= t equivale a float32(x) <= T, dove T è
+    il float32 più grande non oltre t. L'arrotondamento a float32 è monotono: vale
+    quando x è sotto il punto medio m tra T e il float32 successivo; se x == m si
+    arrotonda al valore con mantissa pari, quindi m è incluso solo se T è pari.
+    """
+    t = np.asarray(soglie, dtype=np.float64)
+    with np.errstate(over='ignore'):
+        T = t.astype(np.float32)
+    T = np.where(T.astype(np.float64) > t, np.nextafter(T, np.float32(-np.inf)), T)
+    successivo = np.nextafter(T, np.float32(np.inf))
+    medio = (T.astype(np.float64) + successivo.astype(np.float64)) / 2 # Esatto: bastano 25 bit
+    pari = (T.view(np.int32) & 1) == 0
+    return np.where(pari, medio, np.nextafter(medio, -np.inf))
+
+
+def esporta_albero(modello):
+    """Array dei nodi di un albero addestrato: DecisionTreeClassifier o AlberoIstogrammi.
+
+    Restituisce un dizionario con children_left, children_right, feature, threshold
+    (già equivalenti ai confronti del modello su input float64), la classe predetta in
+    ogni nodo e la profondità.
+    """
+    if hasattr(modello, 'tree_'): # DecisionTreeClassifier: confronti in float32
+        albero = modello.tree_
+        sinistra, destra, feature = albero.children_left, albero.children_right, albero.feature
+        soglie = soglie_equivalenti_float64(albero.threshold)
+        valori = albero.value[:, 0, :]
+    elif hasattr(modello, 'children_left'): # AlberoIstogrammi: confronti già in float64
+        sinistra, destra, feature = modello.children_left, modello.children_right, modello.feature
+        soglie = np.asarray(modello.threshold, dtype=np.float64)
+        valori = modello.value
+    else:
+        raise TypeError(f"{type(modello).__name__} non è un albero decisionale addestrato")
+    foglia = sinistra == FOGLIA
+    return {
+        'children_left': np.ascontiguousarray(sinistra, dtype=np.intp),
+        'children_right': np.ascontiguousarray(destra, dtype=np.intp),
+        'feature': np.where(foglia, FOGLIA, feature).astype(np.intp),
+        'threshold': np.where(foglia, np.inf, soglie),
+        'classe': modello.classes_[np.argmax(valori, axis=1)],
+        'profondita': int(modello.get_depth()),
+    }
+
+
+def genera_codice(array, nome_funzione='predici_riga'):
+    """Sorgente Python di una funzione che predice una riga (lista di float) con if/else annidati."""
+    if array['profondita'] > PROFONDITA_MASSIMA_CODICE:
+        raise ValueError(f"Albero troppo profondo per il codice generato ({array['profondita']} livelli)")
+    righe = [f"def {nome_funzione}(x):"]
+
+    def scrivi(nodo, rientro):
+        spazi = "    " * rientro
+        if array['children_left'][nodo] == FOGLIA:
+            righe.append(f"{spazi}return {array['classe'][nodo].item()!r}")
+            return
+        righe.append(f"{spazi}if x[{array['feature'][nodo]}] <= {float(array['threshold'][nodo])!r}:")
+        scrivi(array['children_left'][nodo], rientro + 1)
+        righe.append(f"{spazi}else:")
+        scrivi(array['children_right'][nodo], rientro + 1)
+
+    scrivi(0, 1)
+    return "\n".join(righe) + "\n"
+
+
+class AlberoCompilato:
+    """Predittore veloce costruito da un albero decisionale addestrato.
+
+    - predict(X): percorso vettoriale sugli array dei nodi, a blocchi di righe.
+    - predici_riga(riga): funzione generata con if/else (codice in `codice_`).
+    Le predizioni sono identiche a quelle di modello.predict.
+    """
+
+    def __init__(self, modello, dimensione_blocco=8192):
+        array = esporta_albero(modello)
+        self.classes_ = modello.classes_
+        self.n_features_in_ = int(modello.n_features_in_)
+        self.profondita = array['profondita']
+        self.dimensione_blocco = dimensione_blocco
+        self.feature = array['feature']
+        self.threshold = array['threshold']
+        self.classe = array['classe']
+        # Le foglie puntano a sé stesse e usano la feature 0: tutte le righe possono fare
+        # esattamente `profondita` passi, senza controllare chi è già arrivato in foglia.
+        # I due figli di un nodo sono vicini: posizione 2 * nodo (sinistra) e 2 * nodo + 1 (destra).
+        foglia = array['children_left'] == FOGLIA
+        nodi = np.arange(len(foglia))
+        self.figli = np.stack([np.where(foglia, nodi, array['children_left']),
+                               np.where(foglia, nodi, array['children_right'])], axis=1).ravel()
+        self._feature_percorso = np.where(foglia, 0, self.feature)
+
+        self.codice_ = None
+        if self.profondita <= PROFONDITA_MASSIMA_CODICE:
+            self.codice_ = genera_codice(array)
+            spazio = {}
+            exec(compile(self.codice_, '<albero_compilato>', 'exec'), spazio)
+            self._funzione_riga = spazio['predici_riga']
+
+    def apply(self, X):
+        """Nodo foglia raggiunto da ogni riga di X."""
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        X_piatto, n_features = X.ravel(), X.shape[1]
+        foglie = np.empty(X.shape[0], dtype=np.intp)
+        for inizio in range(0, X.shape[0], self.dimensione_blocco):
+            n = min(self.dimensione_blocco, X.shape[0] - inizio)
+            # Posizione in X_piatto del primo valore di ogni riga del blocco
+            inizio_riga = np.arange(inizio * n_features, (inizio + n) * n_features, n_features)
+            nodi = np.zeros(n, dtype=np.intp)
+            for _ in range(self.profondita):
+                a_destra = X_piatto[inizio_riga + self._feature_percorso[nodi]] > self.threshold[nodi]
+                nodi = self.figli[2 * nodi + a_destra]
+            foglie[inizio:inizio + n] = nodi
+        return foglie
+
+    def predict(self, X):
+        return self.classe[self.apply(X)]
+
+    def predici_riga(self, riga):
+        """Classe predetta per una sola riga (lista, tupla o array 1D)."""
+        if self.codice_ is None:
+            return self.predict(np.asarray(riga, dtype=np.float64)[None, :])[0]
+        if isinstance(riga, np.ndarray):
+            riga = riga.tolist() # Con i float Python i confronti sono più veloci che con gli scalari NumPy
+        return self._funzione_riga(riga)
+
+    def salva_codice(self, percorso):
+        """Scrive il codice generato in un file .py importabile (funzione predici_riga)."""
+        if self.codice_ is None:
+            raise ValueError("Codice non generato: l'albero è troppo profondo")
+        with open(percorso, 'w') as f:
+            f.write("# Generato da compilatore_albero.py\n")
+            f.write(self.codice_)
+
+
+# --- Benchmark ---
+
+def tempo_per_chiamata(funzione, durata_minima=0.2):
+    """Tempo medio di una chiamata, ripetendola finché non passano almeno `durata_minima` secondi."""
+    ripetizioni, totale = 0, 0.0
+    while totale < durata_minima:
+        inizio = time.perf_counter()
+        risultato = funzione()
+        totale += time.perf_counter() - inizio
+        ripetizioni += 1
+    return totale / ripetizioni, risultato
+
+
+def confronta(dimensioni=(1, 100, 1_000_000), max_depth=4, random_state=42):
+    """Tempi di model.predict e dei predittori compilati, con lo stesso albero dello script."""
+    from sklearn.datasets import load_breast_cancer
+    from sklearn.model_selection import train_test_split
+    from sklearn.tree import DecisionTreeClassifier
+
+    X, y = load_breast_cancer(return_X_y=True)
+    X_train, X_test, y_train, _ = train_test_split(X, y, test_size=0.3, random_state=random_state, stratify=y)
+    modello = DecisionTreeClassifier(criterion='gini', max_depth=max_depth, random_state=random_state)
+    modello.fit(X_train, y_train)
+    compilato = AlberoCompilato(modello)
+
+    rng = np.random.default_rng(random_state)
+    risultati = []
+    for n in dimensioni:
+        # Righe del test set con un po' di rumore, per avere batch di qualsiasi dimensione
+        X_batch = X_test[rng.integers(0, len(X_test), n)] * rng.normal(1.0, 0.05, (n, X.shape[1]))
+        riferimento_s, atteso = tempo_per_chiamata(lambda: modello.predict(X_batch))
+        array_s, y_array = tempo_per_chiamata(lambda: compilato.predict(X_batch))
+        codice_s, y_codice = tempo_per_chiamata(
+            lambda: np.array([compilato.predici_riga(riga) for riga in X_batch.tolist()]))
+        risultati.append({'n': n, 'predict_s': riferimento_s, 'array_s': array_s, 'codice_s': codice_s,
+                          'identiche': bool(np.array_equal(atteso, y_array) and np.array_equal(atteso, y_codice))})
+    return compilato, risultati
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confronto tra model.predict e l'albero compilato")
+    parser.add_argument("--dimensioni", nargs='+', type=int, default=[1, 100, 1_000_000],
+                        help="Numero di righe per chiamata")
+    parser.add_argument("--max-depth", type=int, default=4, help="Profondità dell'albero (4 come nello script)")
+    parser.add_argument("--mostra-codice", action='store_true', help="Stampa il codice generato")
+    args = parser.parse_args()
+
+    compilato, risultati = confronta(args.dimensioni, args.max_depth)
+    if args.mostra_codice:
+        print(compilato.codice_)
+    print(f"{'righe':>9} {'model.predict':>14} {'array':>22} {'codice generato':>22} {'identiche':>10}")
+    for r in risultati:
+        print(f"{r['n']:>9} {1e6 * r['predict_s']:>12.1f}µs "
+              f"{1e6 * r['array_s']:>12.1f}µs ({r['predict_s'] / r['array_s']:5.1f}x) "
+              f"{1e6 * r['codice_s']:>12.1f}µs ({r['predict_s'] / r['codice_s']:5.1f}x) "
+              f"{'sì' if r['identiche'] else 'no':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# Foresta casuale (Random Forest) con alberi costruiti in parallelo
+#
+# Un solo albero decisionale è instabile: cambiando pochi campioni di training può
+# cambiare molto. Una foresta casuale addestra centinaia di alberi, ognuno:
+#
+# - su un campione "bootstrap" del training set (n estrazioni con reinserimento);
+# - cercando ad ogni nodo la divisione migliore solo tra sqrt(n_features) features
+#   scelte a caso (max_features='sqrt').
+#
+# La predizione è la media delle probabilità di tutti gli alberi. Gli alberi sono
+# indipendenti, quindi:
+#
+# - l'addestramento viene diviso tra più processi, che leggono X_train da memoria
+#   condivisa (una sola copia, in float32 come la usano gli alberi di scikit-learn);
+#   il bootstrap non copia le righe: si passa a fit il numero di estrazioni di ogni
+#   riga come sample_weight, come fa RandomForestClassifier;
+# - ogni albero viene salvato come array piatti (figli, feature, soglia, valori) e gli
+#   array di tutti gli alberi vengono concatenati: la predizione fa scendere insieme
+#   tutte le coppie (campione, albero), un livello alla volta, senza un ciclo Python
+#   sugli alberi.
+#
+# Con lo stesso random_state gli alberi sono identici a quelli di RandomForestClassifier
+# (stessi semi e stessi campioni bootstrap), quindi anche le predizioni coincidono.
+#
+# Esempio:
+#   python foresta_casuale.py --alberi 200 --processi 4
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+FOGLIA = -1 # Stesso valore usato da scikit-learn (TREE_LEAF) per i figli delle foglie
+
+# Dati condivisi visti da ciascun processo (impostati da _inizializza_processo)
+_DATI = {}
+_SEGMENTI = []
+
+
+def _in_memoria_condivisa(array):
+    """Copia un array in un segmento di memoria condivisa e restituisce (segmento, descrittore)."""
+    segmento = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    vista = np.ndarray(array.shape, dtype=array.dtype, buffer=segmento.buf)
+    vista[...] = array
+    return segmento, (segmento.name, array.shape, array.dtype.str)
+
+
+def _inizializza_processo(descrittori):
+    """Eseguita una volta per processo: collega gli array condivisi senza copiarli."""
+    from threadpoolctl import threadpool_limits
+
+    # Un thread per processo: il parallelismo lo fa già il pool
+    threadpool_limits(1)
+    for nome_array, (nome, forma, dtype) in descrittori.items():
+        segmento = shared_memory.SharedMemory(name=nome)
+        _SEGMENTI.append(segmento) # Teniamo un riferimento: la vista usa il suo buffer
+        _DATI[nome_array] = np.ndarray(forma, dtype=np.dtype(dtype), buffer=segmento.buf)
+
+
+def _costruisci_alberi(semi, parametri, dati=None):
+    """Addestra un albero per ogni seme e restituisce i suoi array piatti."""
+    from sklearn.tree import DecisionTreeClassifier
+
+    dati = _DATI if dati is None else dati
+    X, y = dati['X'], dati['y']
+    n = X.shape[0]
+    alberi = []
+    for seme in semi:
+        albero = DecisionTreeClassifier(criterion=parametri['criterion'], max_depth=parametri['max_depth'],
+                                        min_samples_leaf=parametri['min_samples_leaf'],
+                                        max_features=parametri['max_features'], random_state=seme)
+        pesi = None
+        if parametri['bootstrap']:
+            # Stesso campione bootstrap di RandomForestClassifier: n estrazioni con reinserimento
+            estratti = np.random.RandomState(seme).randint(0, n, n, dtype=np.int32)
+            pesi = np.bincount(estratti, minlength=n).astype(np.float64)
+        albero.fit(X, y, sample_weight=pesi)
+        struttura = albero.tree_
+        valori = struttura.value[:, 0, :]
+        alberi.append({
+            'children_left': struttura.children_left, 'children_right': struttura.children_right,
+            'feature': struttura.feature, 'threshold': struttura.threshold,
+            'value': valori / valori.sum(axis=1, keepdims=True), # Probabilità per classe di ogni nodo
+            'feature_importances': albero.feature_importances_, 'profondita': albero.get_depth(),
+        })
+    return alberi
+
+
+class ForestaCasuale:
+    """Random forest per classificazione con addestramento parallelo e predizione vettoriale.
+
+    Parametri come RandomForestClassifier (n_estimators, criterion, max_depth,
+    min_samples_leaf, max_features, bootstrap, random_state); `processi` è il numero di
+    processi usati da fit (None = tutti i core, 1 = nessun pool).
+    Dopo `fit` sono disponibili `classes_`, `feature_importances_` (media sugli alberi),
+    `get_depth()` (profondità massima), `predict_proba`, `predict` e `apply`.
+    """
+
+    def __init__(self, n_estimators=100, criterion='gini', max_depth=None, min_samples_leaf=1,
+                 max_features='sqrt', bootstrap=True, processi=None, dimensione_blocco=4096, random_state=None):
+        self.n_estimators = n_estimators
+        self.criterion = criterion
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.max_features = max_features
+        self.bootstrap = bootstrap
+        self.processi = processi
+        self.dimensione_blocco = dimensione_blocco
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        self.classes_, y_codificato = np.unique(y, return_inverse=True)
+        y_codificato = y_codificato.astype(np.float64) # Gli alberi di scikit-learn vogliono y in float64
+        self.n_features_in_ = X.shape[1]
+        # Stessi semi di RandomForestClassifier(random_state=...)
+        rs = self.random_state if isinstance(self.random_state, np.random.RandomState) \
+            else np.random.RandomState(self.random_state)
+        semi = rs.randint(np.iinfo(np.int32).max, size=self.n_estimators)
+        parametri = {'criterion': self.criterion, 'max_depth': self.max_depth,
+                     'min_samples_leaf': self.min_samples_leaf, 'max_features': self.max_features,
+                     'bootstrap': self.bootstrap}
+
+        processi = min(self.processi or os.cpu_count(), self.n_estimators)
+        if processi == 1:
+            alberi = _costruisci_alberi(semi, parametri, {'X': X, 'y': y_codificato})
+        else:
+            # Qualche gruppo di alberi per processo: se un gruppo è più lento, gli altri
+            # processi intanto prendono i gruppi rimanenti
+            gruppi = np.array_split(semi, min(4 * processi, self.n_estimators))
+            segmenti, descrittori = [], {}
+            try:
+                for nome, array in (('X', X), ('y', y_codificato)):
+                    segmento, descrittori[nome] = _in_memoria_condivisa(array)
+                    segmenti.append(segmento)
+                with ProcessPoolExecutor(max_workers=processi, initializer=_inizializza_processo,
+                                         initargs=(descrittori,)) as pool:
+                    alberi = [a for parte in pool.map(_costruisci_alberi, gruppi, [parametri] * len(gruppi))
+                              for a in parte]
+            finally:
+                for segmento in segmenti:
+                    segmento.close()
+                    segmento.unlink()
+        self._unisci_alberi(alberi)
+        return self
+
+    def _unisci_alberi(self, alberi):
+        """Concatena gli array dei nodi di tutti gli alberi, spostando gli indici dei figli."""
+        dimensioni = np.array([len(a['feature']) for a in alberi])
+        self.radici_ = np.concatenate([[0], np.cumsum(dimensioni)[:-1]]).astype(np.intp)
+        for nome in ('children_left', 'children_right'):
+            figli = np.concatenate([a[nome] for a in alberi]).astype(np.intp)
+            spostamento = np.repeat(self.radici_, dimensioni)
+            # Le foglie (FOGLIA) restano tali, gli altri indici diventano globali
+            setattr(self, f'{nome}_', np.where(figli == FOGLIA, FOGLIA, figli + spostamento))
+        self.feature_ = np.concatenate([a['feature'] for a in alberi]).astype(np.intp)
+        self.threshold_ = np.concatenate([a['threshold'] for a in alberi])
+        self.value_ = np.concatenate([a['value'] for a in alberi])
+        # Per la predizione ogni foglia punta a sé stessa (e usa la feature 0): un campione
+        # arrivato in foglia può fare altri passi senza muoversi, così non serve toglierlo
+        # subito dall'elenco dei percorsi attivi. I due figli di un nodo sono vicini in
+        # `_figli`: posizione 2 * nodo (sinistra) e 2 * nodo + 1 (destra).
+        self._interno = self.children_left_ != FOGLIA
+        nodi = np.arange(len(self.feature_))
+        self._figli = np.stack([np.where(self._interno, self.children_left_, nodi),
+                                np.where(self._interno, self.children_right_, nodi)], axis=1).ravel()
+        self._feature_percorso = np.where(self._interno, self.feature_, 0)
+        self._profondita = max(a['profondita'] for a in alberi)
+        # Come RandomForestClassifier: media delle importanze degli alberi con almeno una divisione
+        importanze = [a['feature_importances'] for a in alberi if len(a['feature']) > 1]
+        if importanze:
+            media = np.mean(importanze, axis=0)
+            self.feature_importances_ = media / media.sum()
+        else:
+            self.feature_importances_ = np.zeros(self.n_features_in_)
+
+    def get_depth(self):
+        return self._profondita
+
+    def apply(self, X):
+        """Foglia (indice globale) raggiunta in ogni albero: matrice (n_campioni, n_alberi)."""
+        X = np.ascontiguousarray(X, dtype=np.float32) # Gli alberi di scikit-learn confrontano in float32
+        n_alberi, n_features = len(self.radici_), X.shape[1]
+        X_piatto = X.ravel()
+        nodi = np.tile(self.radici_, X.shape[0]) # Coppia (campione i, albero t) -> posizione i * n_alberi + t
+        attive = np.arange(len(nodi))
+        inizio_riga = np.repeat(np.arange(X.shape[0]) * n_features, n_alberi) # Posizione della riga in X_piatto
+        while True:
+            n = nodi[attive]
+            interne = self._interno[n]
+            n_interne = np.count_nonzero(interne)
+            if n_interne == 0:
+                break
+            if n_interne < len(attive) // 2:
+                # Compattiamo solo quando più di metà dei percorsi è già in una foglia
+                attive, n, inizio_riga = attive[interne], n[interne], inizio_riga[interne]
+            a_destra = X_piatto[inizio_riga + self._feature_percorso[n]] > self.threshold_[n]
+            nodi[attive] = self._figli[2 * n + a_destra]
+        return nodi.reshape(X.shape[0], n_alberi)
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        proba = np.empty((X.shape[0], len(self.classes_)))
+        # A blocchi di righe: le coppie (campione, albero) di un blocco restano in cache
+        for inizio in range(0, X.shape[0], self.dimensione_blocco):
+            foglie = self.apply(X[inizio:inizio + self.dimensione_blocco])
+            proba[inizio:inizio + len(foglie)] = self.value_[foglie].mean(axis=1)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+def confronta(n_estimators=200, processi=None, n_campioni=20_000, random_state=42):
+    """Tempi di fit/predict di ForestaCasuale e di RandomForestClassifier sugli stessi dati."""
+    from sklearn.datasets import make_classification
+    from sklearn.ensemble import RandomForestClassifier
+
+    X, y = make_classification(n_samples=n_campioni, n_features=30, n_informative=10, random_state=random_state)
+    modelli = {
+        'RandomForestClassifier (1 processo)': RandomForestClassifier(n_estimators=n_estimators,
+                                                                       random_state=random_state),
+        f'RandomForestClassifier (n_jobs={processi or -1})': RandomForestClassifier(
+            n_estimators=n_estimators, n_jobs=processi or -1, random_state=random_state),
+        f'ForestaCasuale (processi={processi or os.cpu_count()})': ForestaCasuale(
+            n_estimators=n_estimators, processi=processi, random_state=random_state),
+    }
+    risultati, predizioni = {}, []
+    for nome, modello in modelli.items():
+        inizio = time.perf_counter()
+        modello.fit(X, y)
+        durata_fit = time.perf_counter() - inizio
+        inizio = time.perf_counter()
+        predizioni.append(modello.predict(X))
+        risultati[nome] = {'fit_s': durata_fit, 'predict_s': time.perf_counter() - inizio}
+    return risultati, all(np.array_equal(p, predizioni[0]) for p in predizioni)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confronto tra ForestaCasuale e RandomForestClassifier")
+    parser.add_argument("--alberi", type=int, default=200, help="Numero di alberi")
+    parser.add_argument("--processi", type=int, default=None, help="Numero di processi (default: tutti i core)")
+    parser.add_argument("--campioni", type=int, default=20_000, help="Righe del dataset sintetico")
+    args = parser.parse_args()
+
+    print(f"--- Foresta casuale: {args.alberi} alberi, {args.campioni} campioni ---")
+    risultati, uguali = confronta(args.alberi, args.processi, args.campioni)
+    print(f"{'modello':<40} {'fit':>8} {'predict':>9}")
+    for nome, r in risultati.items():
+        print(f"{nome:<40} {r['fit_s']:>7.2f}s {r['predict_s']:>8.3f}s")
+    print(f"Predizioni identiche: {'sì' if uguali else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
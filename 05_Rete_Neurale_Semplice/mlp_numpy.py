@@ -0,0 +1,412 @@
+# Addestramento di un MLP in NumPy puro, con buffer preallocati e precisione float32
+#
+# MLPClassifier (solver='adam') lavora in float64 e ad ogni mini-batch crea nuovi array
+# per le attivazioni, i gradienti e gli aggiornamenti di Adam. Con dataset di immagini
+# grandi questo significa tempo speso ad allocare memoria e il doppio dello spazio
+# rispetto a float32. MLPNumpy implementa lo stesso algoritmo ma:
+#
+# - alloca UNA volta, prima della prima epoca, tutti i buffer (attivazioni, delta,
+#   gradienti, momenti di Adam) e li riusa per ogni batch con le operazioni `out=`;
+# - può lavorare in float32 (dtype=np.float32): metà memoria e moltiplicazioni più veloci.
+#
+# Con dtype=np.float64 e lo stesso random_state riproduce MLPClassifier: stessa
+# inizializzazione dei pesi, stessa divisione per l'early stopping, stesso ordine dei
+# batch, quindi stessi loss_curve_, validation_scores_ e n_iter_.
+#
+# Confronto dei tempi con MLPClassifier su Digits e su versioni ingrandite:
+#   python mlp_numpy.py --scale 1 10 50
+import argparse
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+from scipy.special import expit
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.model_selection import train_test_split
+
+
+def _stato_casuale(random_state):
+    """Stesso generatore che userebbe scikit-learn (check_random_state)."""
+    if random_state is None:
+        return np.random.mtrand._rand
+    if isinstance(random_state, np.random.RandomState):
+        return random_state
+    return np.random.RandomState(random_state)
+
+
+# Attivazioni e derivate, tutte "in place". `tmp` è un buffer della stessa forma.
+def _relu(A):
+    np.maximum(A, 0, out=A)
+
+
+def _tanh(A):
+    np.tanh(A, out=A)
+
+
+def _logistica(A):
+    expit(A, out=A)
+
+
+ATTIVAZIONI = {'identity': lambda A: None, 'relu': _relu, 'tanh': _tanh, 'logistic': _logistica}
+
+
+def _derivata(attivazione, A, D, tmp):
+    """Moltiplica il delta D per la derivata dell'attivazione, calcolata dall'uscita A."""
+    if attivazione == 'relu':
+        np.greater(A, 0, out=tmp)
+        D *= tmp
+    elif attivazione == 'tanh': # 1 - tanh²
+        np.multiply(A, A, out=tmp)
+        np.subtract(1, tmp, out=tmp)
+        D *= tmp
+    elif attivazione == 'logistic': # σ (1 - σ)
+        np.subtract(1, A, out=tmp)
+        tmp *= A
+        D *= tmp
+
+
+class MLPNumpy:
+    """Classificatore MLP addestrato con Adam a mini-batch, senza allocazioni per batch.
+
+    Parametri e attributi (coefs_, intercepts_, loss_curve_, n_iter_, validation_scores_,
+    best_validation_score_, classes_, ...) seguono MLPClassifier con solver='adam'.
+    - dtype: np.float32 per dimezzare memoria e tempo, np.float64 per riprodurre MLPClassifier.
+    """
+
+    def __init__(self, hidden_layer_sizes=(100,), activation='relu', alpha=0.0001, batch_size='auto',
+                 learning_rate_init=0.001, max_iter=200, shuffle=True, random_state=None, tol=1e-4,
+                 verbose=False, early_stopping=False, validation_fraction=0.1, beta_1=0.9, beta_2=0.999,
+                 epsilon=1e-8, n_iter_no_change=10, dtype=np.float32):
+        if activation not in ATTIVAZIONI:
+            raise ValueError(f"Attivazione sconosciuta: {activation!r}")
+        self.hidden_layer_sizes = hidden_layer_sizes
+        self.activation = activation
+        self.alpha = alpha
+        self.batch_size = batch_size
+        self.learning_rate_init = learning_rate_init
+        self.max_iter = max_iter
+        self.shuffle = shuffle
+        self.random_state = random_state
+        self.tol = tol
+        self.verbose = verbose
+        self.early_stopping = early_stopping
+        self.validation_fraction = validation_fraction
+        self.beta_1 = beta_1
+        self.beta_2 = beta_2
+        self.epsilon = epsilon
+        self.n_iter_no_change = n_iter_no_change
+        self.dtype = dtype
+
+    def fit(self, X, y):
+        dtype = np.dtype(self.dtype)
+        rs = _stato_casuale(self.random_state)
+        y = np.asarray(y)
+        self.classes_, y_codificato = np.unique(y, return_inverse=True)
+        # Come LabelBinarizer: una colonna per classe, oppure una sola colonna se le classi sono 2
+        if len(self.classes_) > 2:
+            Y = np.zeros((len(y), len(self.classes_)), dtype=bool)
+            Y[np.arange(len(y)), y_codificato] = True
+            self.out_activation_ = 'softmax'
+        else:
+            Y = (y_codificato == 1)[:, None]
+            self.out_activation_ = 'logistic'
+
+        n_features = X.shape[1]
+        nascosti = list(np.atleast_1d(self.hidden_layer_sizes))
+        unita = [n_features] + nascosti + [Y.shape[1]]
+        self.n_layers_ = len(unita)
+        self.n_outputs_ = Y.shape[1]
+        self.n_features_in_ = n_features
+
+        # Inizializzazione di Glorot, con la stessa sequenza casuale di MLPClassifier
+        fattore = 2.0 if self.activation == 'logistic' else 6.0
+        self.coefs_, self.intercepts_ = [], []
+        for fan_in, fan_out in zip(unita[:-1], unita[1:]):
+            limite = np.sqrt(fattore / (fan_in + fan_out))
+            self.coefs_.append(rs.uniform(-limite, limite, (fan_in, fan_out)).astype(dtype))
+            self.intercepts_.append(rs.uniform(-limite, limite, fan_out).astype(dtype))
+
+        indici = np.arange(X.shape[0])
+        if self.early_stopping:
+            # Stessa divisione di MLPClassifier, che stratifica solo quando l'uscita è
+            # una colonna (classificazione binaria)
+            indici, indici_val = train_test_split(indici, random_state=rs, test_size=self.validation_fraction,
+                                                  stratify=Y if Y.shape[1] == 1 else None)
+            X_val = np.asarray(X[indici_val], dtype=dtype)
+            y_val = self.classes_[y_codificato[indici_val]]
+        # Una sola copia dei dati di training, già nel dtype giusto (a blocchi, per non
+        # creare prima una copia intera in float64)
+        X_train = np.empty((len(indici), n_features), dtype=dtype)
+        for inizio in range(0, len(indici), 8192):
+            X_train[inizio:inizio + 8192] = X[indici[inizio:inizio + 8192]]
+        Y_train = Y[indici].astype(dtype)
+        n = X_train.shape[0]
+        batch = min(200, n) if self.batch_size == 'auto' else int(np.clip(self.batch_size, 1, n))
+
+        # --- Buffer preallocati ---
+        attivazioni = [np.empty((batch, u), dtype=dtype) for u in unita]
+        delta = [np.empty((batch, u), dtype=dtype) for u in unita[1:]]
+        temporanei = [np.empty((batch, u), dtype=dtype) for u in unita[1:]]
+        Y_batch = np.empty((batch, unita[-1]), dtype=dtype)
+        per_riga = np.empty(batch, dtype=dtype)
+        parametri = self.coefs_ + self.intercepts_
+        gradienti = [np.empty_like(p) for p in parametri]
+        momenti_1 = [np.zeros_like(p) for p in parametri]
+        momenti_2 = [np.zeros_like(p) for p in parametri]
+        tmp_1 = [np.empty_like(p) for p in parametri]
+        tmp_2 = [np.empty_like(p) for p in parametri]
+        if self.early_stopping:
+            migliori = [p.copy() for p in parametri]
+            attivazioni_val = [np.empty((len(X_val), u), dtype=dtype) for u in unita[1:]]
+            riga_val = np.empty(len(X_val), dtype=dtype)
+
+        self.loss_curve_ = []
+        self.validation_scores_ = [] if self.early_stopping else None
+        self.best_validation_score_ = -np.inf if self.early_stopping else None
+        self.best_loss_ = None if self.early_stopping else np.inf
+        self.t_ = 0
+        self.n_iter_ = 0
+        passi_adam = 0
+        senza_miglioramenti = 0
+        ordine = np.arange(n)
+        permutazione = np.empty(n, dtype=ordine.dtype)
+
+        for _ in range(self.max_iter):
+            if self.shuffle:
+                # Come sklearn.utils.shuffle: permutazione degli indici con lo stesso generatore
+                permutazione[:] = np.arange(n)
+                rs.shuffle(permutazione)
+                np.take(ordine, permutazione, out=ordine)
+            loss_accumulata = 0.0
+            for inizio in range(0, n, batch):
+                m = min(batch, n - inizio)
+                righe = ordine[inizio:inizio + m]
+                np.take(X_train, righe, axis=0, out=attivazioni[0][:m])
+                np.take(Y_train, righe, axis=0, out=Y_batch[:m])
+                loss = self._passo(attivazioni, delta, temporanei, Y_batch, per_riga, gradienti, tmp_1, m)
+                loss_accumulata += loss * m
+
+                # Aggiornamento di Adam, tutto in place
+                passi_adam += 1
+                # float Python, non np.float64: altrimenti con float32 ogni operazione converte i tipi
+                lr = float(self.learning_rate_init * np.sqrt(1 - self.beta_2 ** passi_adam)
+                           / (1 - self.beta_1 ** passi_adam))
+                for p, g, m1, m2, t1, t2 in zip(parametri, gradienti, momenti_1, momenti_2, tmp_1, tmp_2):
+                    m1 *= self.beta_1
+                    np.multiply(g, 1 - self.beta_1, out=t1)
+                    m1 += t1
+                    m2 *= self.beta_2
+                    np.multiply(g, g, out=t1)
+                    t1 *= 1 - self.beta_2
+                    m2 += t1
+                    np.sqrt(m2, out=t1)
+                    t1 += self.epsilon
+                    np.multiply(m1, -lr, out=t2)
+                    t2 /= t1
+                    p += t2
+
+            self.n_iter_ += 1
+            self.t_ += n
+            self.loss_ = loss_accumulata / n
+            self.loss_curve_.append(self.loss_)
+            if self.verbose:
+                print("Iteration %d, loss = %.8f" % (self.n_iter_, self.loss_))
+
+            if self.early_stopping:
+                self._avanti(X_val, attivazioni_val, riga_val, len(X_val))
+                punteggio = float(np.mean(self._etichette(attivazioni_val[-1]) == y_val))
+                self.validation_scores_.append(punteggio)
+                if self.verbose:
+                    print("Validation score: %f" % punteggio)
+                senza_miglioramenti = senza_miglioramenti + 1 if punteggio < self.best_validation_score_ + self.tol else 0
+                if punteggio > self.best_validation_score_:
+                    self.best_validation_score_ = punteggio
+                    for migliore, p in zip(migliori, parametri):
+                        np.copyto(migliore, p)
+            else:
+                senza_miglioramenti = senza_miglioramenti + 1 if self.loss_ > self.best_loss_ - self.tol else 0
+                self.best_loss_ = min(self.best_loss_, self.loss_)
+
+            if senza_miglioramenti > self.n_iter_no_change:
+                if self.verbose:
+                    criterio = "Validation score" if self.early_stopping else "Training loss"
+                    print(f"{criterio} did not improve more than tol={self.tol:f} for "
+                          f"{self.n_iter_no_change} consecutive epochs. Stopping.")
+                break
+            if self.n_iter_ == self.max_iter:
+                warnings.warn(f"Stochastic Optimizer: Maximum iterations ({self.max_iter}) reached and the "
+                              "optimization hasn't converged yet.", ConvergenceWarning)
+
+        if self.early_stopping: # Ripristiniamo i pesi con il miglior punteggio di validazione
+            for migliore, p in zip(migliori, parametri):
+                np.copyto(p, migliore)
+        return self
+
+    # --- Passi dell'addestramento (solo sulle prime m righe dei buffer) ---
+
+    def _avanti(self, X, attivazioni, per_riga, m):
+        """Passaggio in avanti; `attivazioni` sono i buffer dei layer dopo quello di input."""
+        ingresso = X[:m]
+        for i, (W, b) in enumerate(zip(self.coefs_, self.intercepts_)):
+            A = attivazioni[i][:m]
+            np.matmul(ingresso, W, out=A)
+            A += b
+            if i < len(self.coefs_) - 1:
+                ATTIVAZIONI[self.activation](A)
+            ingresso = A
+        if self.out_activation_ == 'logistic':
+            expit(ingresso, out=ingresso)
+        else: # Softmax stabile, come in scikit-learn
+            np.max(ingresso, axis=1, out=per_riga[:m])
+            ingresso -= per_riga[:m, None]
+            np.exp(ingresso, out=ingresso)
+            np.sum(ingresso, axis=1, out=per_riga[:m])
+            ingresso /= per_riga[:m, None]
+
+    def _passo(self, attivazioni, delta, temporanei, Y_batch, per_riga, gradienti, tmp_parametri, m):
+        """Forward e backpropagation su un batch di m righe; restituisce la loss del batch.
+
+        I gradienti vengono scritti in `gradienti` (prima i pesi, poi i bias);
+        `tmp_parametri` sono buffer con la forma dei parametri.
+        """
+        self._avanti(attivazioni[0], attivazioni[1:], per_riga, m)
+        uscita, Y = attivazioni[-1][:m], Y_batch[:m]
+        tmp, riga = temporanei[-1][:m], per_riga[:m]
+
+        # Log-loss: la probabilità assegnata alla classe giusta (tagliata come in scikit-learn)
+        eps = np.finfo(uscita.dtype).eps
+        if self.out_activation_ == 'logistic': # |1 - y - p| = p se y = 1, 1 - p se y = 0
+            np.subtract(1, Y, out=tmp)
+            tmp -= uscita
+            np.abs(tmp[:, 0], out=riga)
+        else:
+            np.multiply(Y, uscita, out=tmp)
+            np.sum(tmp, axis=1, out=riga)
+        np.clip(riga, eps, 1 - eps, out=riga)
+        np.log(riga, out=riga)
+        loss = -float(riga.sum()) / m
+        loss += 0.5 * self.alpha * sum(float(np.vdot(W, W)) for W in self.coefs_) / m
+
+        # Backpropagation: delta dell'ultimo layer = uscita - y (softmax/sigmoide + log-loss)
+        n_layer = len(self.coefs_)
+        gradienti_coef, gradienti_intercetta = gradienti[:n_layer], gradienti[n_layer:]
+        np.subtract(uscita, Y, out=delta[-1][:m])
+        for i in range(n_layer - 1, -1, -1):
+            D = delta[i][:m]
+            np.matmul(attivazioni[i][:m].T, D, out=gradienti_coef[i])
+            np.multiply(self.coefs_[i], self.alpha, out=tmp_parametri[i])
+            gradienti_coef[i] += tmp_parametri[i]
+            gradienti_coef[i] /= m
+            np.sum(D, axis=0, out=gradienti_intercetta[i])
+            gradienti_intercetta[i] /= m
+            if i > 0:
+                np.matmul(D, self.coefs_[i].T, out=delta[i - 1][:m])
+                _derivata(self.activation, attivazioni[i][:m], delta[i - 1][:m], temporanei[i - 1][:m])
+        return loss
+
+    def _etichette(self, uscita):
+        if self.out_activation_ == 'logistic':
+            return self.classes_[(uscita[:, 0] > 0.5).astype(np.intp)]
+        return self.classes_[uscita.argmax(axis=1)]
+
+    # --- Predizione ---
+
+    def predict_proba(self, X):
+        X = np.asarray(X, dtype=self.coefs_[0].dtype)
+        attivazioni = [np.empty((len(X), W.shape[1]), dtype=X.dtype) for W in self.coefs_]
+        self._avanti(X, attivazioni, np.empty(len(X), dtype=X.dtype), len(X))
+        uscita = attivazioni[-1]
+        return np.hstack([1 - uscita, uscita]) if self.out_activation_ == 'logistic' else uscita
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        return self.classes_[proba.argmax(axis=1)] if self.out_activation_ == 'softmax' \
+            else self.classes_[(proba[:, 1] > 0.5).astype(np.intp)]
+
+
+# --- Benchmark rispetto a MLPClassifier ---
+
+def digits_ingrandito(scala, rumore=1.0, random_state=42):
+    """Dataset Digits ripetuto `scala` volte, con un po' di rumore sui pixel (valori 0-16)."""
+    from sklearn.datasets import load_digits
+
+    X, y = load_digits(return_X_y=True)
+    if scala == 1:
+        return X, y
+    rng = np.random.default_rng(random_state)
+    X = np.tile(X, (scala, 1))
+    X += rng.normal(0.0, rumore, X.shape)
+    np.clip(X, 0, 16, out=X)
+    return X, np.tile(y, scala)
+
+
+def _addestra(crea, max_iter, X_train, y_train):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        return crea(max_iter).fit(X_train, y_train)
+
+
+def _misura(crea, max_iter, X_train, y_train, X_test, y_test):
+    """Tempo dell'addestramento completo e picco di memoria (misurato su 2 epoche).
+
+    tracemalloc rallenta ogni allocazione, quindi non lo teniamo attivo durante la
+    misura del tempo; il picco di memoria si raggiunge già nelle prime epoche.
+    """
+    inizio = time.perf_counter()
+    modello = _addestra(crea, max_iter, X_train, y_train)
+    durata = time.perf_counter() - inizio
+    tracemalloc.start()
+    _addestra(crea, 2, X_train, y_train)
+    picco = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return {'tempo_s': durata, 'picco_memoria_mb': picco, 'n_iter': modello.n_iter_,
+            'loss_finale': modello.loss_curve_[-1], 'accuratezza': float(np.mean(modello.predict(X_test) == y_test)),
+            'loss_curve': modello.loss_curve_}
+
+
+def confronta(scale=(1, 10), max_iter=300, random_state=42):
+    """Stessa configurazione di rete_neurale_mlp.py, addestrata con le tre implementazioni."""
+    from sklearn.neural_network import MLPClassifier
+    from sklearn.preprocessing import StandardScaler
+
+    parametri = dict(hidden_layer_sizes=(100, 50), activation='relu', alpha=0.0001, learning_rate_init=0.001,
+                     early_stopping=True, validation_fraction=0.1, n_iter_no_change=10, random_state=random_state)
+    risultati = []
+    for scala in scale:
+        X, y = digits_ingrandito(scala, random_state=random_state)
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+        scaler = StandardScaler().fit(X_train)
+        X_train, X_test = scaler.transform(X_train), scaler.transform(X_test)
+        modelli = {
+            'MLPClassifier': lambda n: MLPClassifier(solver='adam', max_iter=n, **parametri),
+            'MLPNumpy float64': lambda n: MLPNumpy(dtype=np.float64, max_iter=n, **parametri),
+            'MLPNumpy float32': lambda n: MLPNumpy(dtype=np.float32, max_iter=n, **parametri),
+        }
+        misure = {nome: _misura(crea, max_iter, X_train, y_train, X_test, y_test) for nome, crea in modelli.items()}
+        riferimento = misure['MLPClassifier']['loss_curve']
+        for nome, misura in misure.items():
+            curva = misura.pop('loss_curve')
+            n_comuni = min(len(curva), len(riferimento))
+            misura['differenza_loss_curve'] = float(np.max(np.abs(np.subtract(curva[:n_comuni], riferimento[:n_comuni]))))
+            risultati.append({'scala': scala, 'righe_training': len(X_train), 'modello': nome, **misura})
+    return risultati
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confronta MLPNumpy con MLPClassifier su Digits ingrandito")
+    parser.add_argument("--scale", type=int, nargs='+', default=[1, 10],
+                        help="Quante volte ripetere Digits (con rumore) per ogni prova")
+    parser.add_argument("--max-iter", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'scala':>5} {'righe':>8}  {'modello':<18} {'tempo':>8} {'memoria':>10} {'epoche':>6} "
+          f"{'loss':>8} {'accuratezza':>11} {'diff. loss':>10}")
+    for r in confronta(args.scale, args.max_iter):
+        print(f"{r['scala']:>5} {r['righe_training']:>8}  {r['modello']:<18} {r['tempo_s']:7.2f}s "
+              f"{r['picco_memoria_mb']:7.1f} MB {r['n_iter']:>6} {r['loss_finale']:8.4f} "
+              f"{r['accuratezza']:11.3f} {r['differenza_loss_curve']:10.2e}")
+
+
+if __name__ == "__main__":
+    main()
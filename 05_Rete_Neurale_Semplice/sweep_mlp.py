@@ -0,0 +1,186 @@
+# Ricerca degli iperparametri dell'MLP in parallelo (sweep)
+#
+# Provare decine di combinazioni di hidden_layer_sizes, alpha e learning_rate_init
+# una dopo l'altra lascia inutilizzati gli altri core della macchina. Questo script:
+#
+# - distribuisce le configurazioni su un pool di processi;
+# - mette X_train_scaled (e il test set) in memoria condivisa: i processi leggono
+#   gli stessi dati senza che vengano copiati (pickle) per ogni configurazione;
+# - usa il "successive halving": tutte le configurazioni partono con poche epoche,
+#   solo la frazione migliore (in base al punteggio di validazione dell'early
+#   stopping) passa al turno successivo con un budget di epoche più grande;
+# - scrive una tabella dei risultati ordinata dal migliore al peggiore.
+#
+# Esempio:
+#   python sweep_mlp.py --hidden 100,50 64,32 128 --alpha 0.0001 0.001 --lr 0.001 0.01 --processi 4
+import argparse
+import csv
+import itertools
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Dati condivisi visti da ciascun processo (impostati da _inizializza_processo)
+_DATI = {}
+_SEGMENTI = []
+
+
+def _in_memoria_condivisa(array):
+    """Copia un array in un segmento di memoria condivisa e restituisce (segmento, descrittore)."""
+    segmento = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    vista = np.ndarray(array.shape, dtype=array.dtype, buffer=segmento.buf)
+    vista[...] = array
+    return segmento, (segmento.name, array.shape, array.dtype.str)
+
+
+def _inizializza_processo(descrittori):
+    """Eseguita una volta per processo: collega gli array condivisi senza copiarli."""
+    from threadpoolctl import threadpool_limits
+
+    # Un thread BLAS per processo: il parallelismo lo fa già il pool
+    threadpool_limits(1)
+    for nome_array, (nome, forma, dtype) in descrittori.items():
+        segmento = shared_memory.SharedMemory(name=nome)
+        _SEGMENTI.append(segmento)  # Teniamo un riferimento: la vista usa il suo buffer
+        _DATI[nome_array] = np.ndarray(forma, dtype=np.dtype(dtype), buffer=segmento.buf)
+
+
+def _addestra_configurazione(configurazione, max_iter, random_state):
+    """Addestra un MLP con il budget di epoche indicato e restituisce i suoi punteggi."""
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.neural_network import MLPClassifier
+
+    inizio = time.perf_counter()
+    model = MLPClassifier(hidden_layer_sizes=configurazione['hidden_layer_sizes'],
+                          activation='relu',
+                          solver='adam',
+                          alpha=configurazione['alpha'],
+                          learning_rate_init=configurazione['learning_rate_init'],
+                          max_iter=max_iter,
+                          early_stopping=True,
+                          validation_fraction=0.1,
+                          n_iter_no_change=10,
+                          random_state=random_state)
+    with warnings.catch_warnings():
+        # Nei primi turni il budget è volutamente piccolo: il modello non converge
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        model.fit(_DATI['X_train'], _DATI['y_train'])
+    return {
+        **configurazione,
+        'max_iter': max_iter,
+        'n_iter': model.n_iter_,
+        'validation_score': float(model.best_validation_score_),
+        'test_accuracy': float(np.mean(model.predict(_DATI['X_test']) == _DATI['y_test'])),
+        'tempo_s': time.perf_counter() - inizio,
+    }
+
+
+def successive_halving(configurazioni, X_train, y_train, X_test, y_test, budget_iniziale=20,
+                       max_iter=300, eta=3, processi=None, random_state=42, verbose=True):
+    """Esegue lo sweep con successive halving e restituisce i risultati ordinati.
+
+    Ad ogni turno il budget di epoche viene moltiplicato per `eta` e solo le migliori
+    1/eta configurazioni (per punteggio di validazione) vengono mantenute, finché non
+    resta una sola configurazione o si raggiunge `max_iter`.
+    Ogni risultato contiene il turno raggiunto: più è alto, migliore è la configurazione.
+    """
+    segmenti, descrittori = [], {}
+    try:
+        for nome, array in (('X_train', X_train), ('y_train', y_train),
+                            ('X_test', X_test), ('y_test', y_test)):
+            segmento, descrittori[nome] = _in_memoria_condivisa(np.ascontiguousarray(array))
+            segmenti.append(segmento)
+
+        risultati = {}
+        in_gara = list(range(len(configurazioni)))
+        budget, turno = budget_iniziale, 0
+        with ProcessPoolExecutor(max_workers=processi or os.cpu_count(),
+                                 initializer=_inizializza_processo, initargs=(descrittori,)) as pool:
+            while True:
+                budget = min(budget, max_iter)
+                if verbose:
+                    print(f"Turno {turno}: {len(in_gara)} configurazioni, max_iter={budget}")
+                futuri = {i: pool.submit(_addestra_configurazione, configurazioni[i], budget, random_state)
+                          for i in in_gara}
+                for i, futuro in futuri.items():
+                    risultati[i] = {**futuro.result(), 'turno': turno}
+                if len(in_gara) == 1 or budget >= max_iter:
+                    break
+                in_gara.sort(key=lambda i: risultati[i]['validation_score'], reverse=True)
+                in_gara = in_gara[:max(1, len(in_gara) // eta)]
+                budget *= eta
+                turno += 1
+    finally:
+        for segmento in segmenti:
+            segmento.close()
+            segmento.unlink()
+
+    return sorted(risultati.values(), key=lambda r: (r['turno'], r['validation_score']), reverse=True)
+
+
+def scrivi_tabella(risultati, percorso):
+    """Scrive i risultati ordinati in un file CSV (la prima riga è la configurazione migliore)."""
+    campi = ['rank', 'hidden_layer_sizes', 'alpha', 'learning_rate_init', 'turno', 'max_iter', 'n_iter',
+             'validation_score', 'test_accuracy', 'tempo_s']
+    with open(percorso, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=campi)
+        writer.writeheader()
+        for rank, r in enumerate(risultati, start=1):
+            writer.writerow({**{c: r[c] for c in campi if c != 'rank'}, 'rank': rank,
+                             'hidden_layer_sizes': '-'.join(map(str, r['hidden_layer_sizes']))})
+
+
+def prepara_dati_digits(random_state=42):
+    """Stessa preparazione di rete_neurale_mlp.py: Digits, divisione 70/30 e standardizzazione."""
+    from sklearn.datasets import load_digits
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    digits = load_digits()
+    X_train, X_test, y_train, y_test = train_test_split(digits.data, digits.target, test_size=0.3,
+                                                        random_state=random_state, stratify=digits.target)
+    scaler = StandardScaler()
+    return scaler.fit_transform(X_train), y_train, scaler.transform(X_test), y_test
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep parallelo degli iperparametri di MLPClassifier")
+    parser.add_argument("--hidden", nargs='+', default=['100,50', '64,32', '128', '256,128'],
+                        help="Architetture da provare, es. 100,50 (due layer nascosti)")
+    parser.add_argument("--alpha", nargs='+', type=float, default=[0.0001, 0.001, 0.01])
+    parser.add_argument("--lr", nargs='+', type=float, default=[0.001, 0.01],
+                        help="Valori di learning_rate_init")
+    parser.add_argument("--budget-iniziale", type=int, default=20, help="Epoche al primo turno")
+    parser.add_argument("--max-iter", type=int, default=300, help="Epoche massime all'ultimo turno")
+    parser.add_argument("--eta", type=int, default=3, help="Fattore di riduzione ad ogni turno")
+    parser.add_argument("--processi", type=int, default=None, help="Numero di processi (default: tutti i core)")
+    parser.add_argument("--output", default="risultati_sweep.csv", help="File CSV con la tabella dei risultati")
+    args = parser.parse_args()
+
+    configurazioni = [{'hidden_layer_sizes': tuple(int(n) for n in h.split(',')), 'alpha': a,
+                       'learning_rate_init': lr}
+                      for h, a, lr in itertools.product(args.hidden, args.alpha, args.lr)]
+
+    print("--- Sweep degli iperparametri MLPClassifier ---")
+    print(f"Configurazioni da provare: {len(configurazioni)}")
+    X_train_scaled, y_train, X_test_scaled, y_test = prepara_dati_digits()
+    inizio = time.perf_counter()
+    risultati = successive_halving(configurazioni, X_train_scaled, y_train, X_test_scaled, y_test,
+                                   budget_iniziale=args.budget_iniziale, max_iter=args.max_iter,
+                                   eta=args.eta, processi=args.processi)
+    print(f"Sweep completato in {time.perf_counter() - inizio:.1f} s")
+
+    scrivi_tabella(risultati, args.output)
+    print(f"\n{'rank':>4}  {'hidden':<10} {'alpha':>8} {'lr':>8} {'turno':>5} {'val':>6} {'test':>6}")
+    for rank, r in enumerate(risultati[:10], start=1):
+        print(f"{rank:>4}  {'-'.join(map(str, r['hidden_layer_sizes'])):<10} {r['alpha']:>8g} "
+              f"{r['learning_rate_init']:>8g} {r['turno']:>5} {r['validation_score']:>6.3f} {r['test_accuracy']:>6.3f}")
+    print(f"\nTabella completa salvata in {args.output}")
+
+
+if __name__ == "__main__":
+    main()
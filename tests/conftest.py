@@ -0,0 +1,17 @@
+# Configurazione comune dei test (eseguili dalla cartella principale: python -m pytest -q)
+#
+# Le cartelle degli esempi iniziano con un numero e non sono pacchetti importabili:
+# come fa utils.pipeline.importa_modulo, le aggiungiamo a sys.path, così i test possono
+# scrivere ad esempio `from regressione_streaming import RegressioneLineareStreaming`.
+import os
+import sys
+
+CARTELLA_PROGETTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if CARTELLA_PROGETTO not in sys.path:
+    sys.path.insert(0, CARTELLA_PROGETTO)
+
+from utils.pipeline import PIPELINE, cartella_pipeline  # noqa: E402
+
+for _nome in PIPELINE:
+    if cartella_pipeline(_nome) not in sys.path:
+        sys.path.insert(0, cartella_pipeline(_nome))
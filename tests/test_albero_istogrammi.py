@@ -0,0 +1,66 @@
+# Test dell'albero decisionale a istogrammi (04_Alberi_Decisionali/albero_istogrammi.py)
+import numpy as np
+import pytest
+from sklearn.datasets import load_breast_cancer, make_classification
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+from albero_istogrammi import FOGLIA, AlberoIstogrammi, Discretizzatore
+
+
+def _dati(seed=0):
+    X, y = make_classification(n_samples=3000, n_features=8, n_informative=5, n_classes=3,
+                               random_state=seed)
+    return X, y
+
+
+def test_istogramma_come_conteggio_diretto():
+    X, y = _dati()
+    albero = AlberoIstogrammi(max_bins=32, max_depth=1).fit(X, y)
+    Xb = albero.discretizzatore_.transform(X)
+    indici = np.random.default_rng(0).choice(len(X), 500, replace=False)
+    istogramma = albero._istogramma(Xb, y, indici)
+    atteso = np.zeros_like(istogramma)
+    for i in indici:
+        for f in range(X.shape[1]):
+            atteso[f, Xb[i, f], y[i]] += 1
+    np.testing.assert_array_equal(istogramma, atteso)
+
+
+@pytest.mark.parametrize('criterion', ['gini', 'entropy'])
+def test_sottrazione_tra_fratelli(criterion):
+    # I conteggi di ogni nodo vengono dagli istogrammi, metà dei quali ottenuti per
+    # sottrazione: devono coincidere con le classi dei campioni che arrivano nel nodo
+    X, y = _dati(seed=1)
+    albero = AlberoIstogrammi(criterion=criterion, max_depth=8, random_state=0).fit(X, y)
+    foglie = albero.apply(X)
+    interni = np.flatnonzero(albero.children_left != FOGLIA)
+    for foglia in np.flatnonzero(albero.children_left == FOGLIA):
+        np.testing.assert_array_equal(albero.value[foglia], np.bincount(y[foglie == foglia], minlength=3))
+        assert albero.n_node_samples[foglia] == np.count_nonzero(foglie == foglia)
+    for nodo in interni:
+        sinistro, destro = albero.children_left[nodo], albero.children_right[nodo]
+        np.testing.assert_array_equal(albero.value[nodo], albero.value[sinistro] + albero.value[destro])
+    assert albero.value[0].sum() == len(X)
+    assert albero.get_depth() <= 8
+
+
+def test_discretizzatore_rispetta_le_soglie():
+    X, _ = _dati()
+    discretizzatore = Discretizzatore(max_bins=16).fit(X)
+    Xb = discretizzatore.transform(X)
+    assert Xb.dtype == np.uint8 and Xb.max() < 16
+    for f, soglie in enumerate(discretizzatore.soglie_):
+        for b, soglia in enumerate(soglie):
+            # "bin <= b" equivale a "x <= soglie[b]"
+            np.testing.assert_array_equal(Xb[:, f] <= b, X[:, f] <= soglia)
+
+
+def test_accuratezza_come_decision_tree():
+    X, y = load_breast_cancer(return_X_y=True)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42, stratify=y)
+    istogrammi = AlberoIstogrammi(max_depth=4, random_state=42).fit(X_train, y_train)
+    sklearn = DecisionTreeClassifier(max_depth=4, random_state=42).fit(X_train, y_train)
+    assert np.mean(istogrammi.predict(X_test) == y_test) >= np.mean(sklearn.predict(X_test) == y_test) - 0.03
+    np.testing.assert_allclose(istogrammi.predict_proba(X_test).sum(axis=1), 1.0)
+    assert istogrammi.feature_importances_.sum() == pytest.approx(1.0)
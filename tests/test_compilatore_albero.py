@@ -0,0 +1,69 @@
+# Test dell'albero compilato (04_Alberi_Decisionali/compilatore_albero.py)
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.tree import DecisionTreeClassifier
+
+from albero_istogrammi import AlberoIstogrammi
+from compilatore_albero import AlberoCompilato, soglie_equivalenti_float64
+
+
+def _vicini_a(valori, rng, n):
+    """Valori float64 a pochi ulp da `valori` e dai float32 vicini: i casi in cui la
+    conversione a float32 di DecisionTreeClassifier può cambiare il confronto."""
+    v = rng.choice(np.asarray(valori, dtype=np.float64), n)
+    v32 = v.astype(np.float32)
+    candidati = [v, np.nextafter(v, np.inf), np.nextafter(v, -np.inf), v32.astype(np.float64),
+                 np.nextafter(v32, np.float32(np.inf)).astype(np.float64),
+                 (v32.astype(np.float64) + np.nextafter(v32, np.float32(np.inf)).astype(np.float64)) / 2,
+                 v + rng.normal(0.0, 1e-7, n) * np.abs(v)]
+    return np.concatenate(candidati)[rng.permutation(n * len(candidati))]
+
+
+def test_soglie_equivalenti_float64():
+    rng = np.random.default_rng(0)
+    soglie = np.concatenate([rng.normal(0.0, 100.0, 2000), rng.uniform(-1e-3, 1e-3, 2000),
+                             rng.normal(0.0, 1.0, 2000).astype(np.float32), [0.0, 1.0, -1.0, 2.5e38]])
+    equivalenti = soglie_equivalenti_float64(soglie)
+    for t, t_eq in zip(soglie, equivalenti):
+        x = _vicini_a([t, t_eq], rng, 8)
+        x = np.concatenate([x, [t_eq, np.nextafter(t_eq, np.inf), np.nextafter(t_eq, -np.inf)]])
+        with np.errstate(over='ignore'):
+            atteso = x.astype(np.float32) <= t
+        np.testing.assert_array_equal(x <= t_eq, atteso, err_msg=f"soglia {t!r}")
+
+
+@pytest.mark.parametrize('max_depth', [4, 12])
+def test_predict_come_decision_tree_vicino_alle_soglie(max_depth):
+    X, y = make_classification(n_samples=4000, n_features=10, n_informative=6, n_classes=3, random_state=0)
+    X *= 1000.0 # Valori grandi: più float64 diversi finiscono nello stesso float32
+    modello = DecisionTreeClassifier(max_depth=max_depth, random_state=0).fit(X, y)
+    rng = np.random.default_rng(0)
+    # Righe a caso in cui ogni feature è spostata vicino a una soglia dell'albero per quella feature
+    X_test = X[rng.integers(0, len(X), 20_000)].copy()
+    albero = modello.tree_
+    for f in range(X.shape[1]):
+        soglie_f = albero.threshold[albero.feature == f]
+        if len(soglie_f):
+            X_test[:, f] = _vicini_a(soglie_f, rng, len(X_test))[:len(X_test)]
+    compilato = AlberoCompilato(modello, dimensione_blocco=1000)
+    atteso = modello.predict(X_test)
+    np.testing.assert_array_equal(compilato.predict(X_test), atteso)
+    np.testing.assert_array_equal(compilato.apply(X_test), modello.apply(X_test))
+    for riga, classe in zip(X_test[:2000], atteso[:2000]):
+        assert compilato.predici_riga(riga) == classe
+
+
+def test_albero_istogrammi_compilato():
+    X, y = make_classification(n_samples=2000, n_features=6, random_state=1)
+    etichette = np.array(['no', 'sì'])[y]
+    modello = AlberoIstogrammi(max_depth=6, random_state=0).fit(X, etichette)
+    compilato = AlberoCompilato(modello)
+    atteso = modello.predict(X)
+    np.testing.assert_array_equal(compilato.predict(X), atteso)
+    assert [compilato.predici_riga(r) for r in X[:200].tolist()] == atteso[:200].tolist()
+
+
+def test_modello_non_albero():
+    with pytest.raises(TypeError):
+        AlberoCompilato(object())
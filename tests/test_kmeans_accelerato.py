@@ -0,0 +1,54 @@
+# Test del K-Means accelerato (03_K_Means_Clustering/kmeans_accelerato.py)
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.datasets import make_blobs
+
+from kmeans_accelerato import MAX_STATISTICHE, KMeansAccelerato, _kmeans_plusplus
+
+
+def _blob(n=5000, seed=0):
+    X, _ = make_blobs(n_samples=n, centers=8, n_features=3, cluster_std=1.5, random_state=seed)
+    return X
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_hamerly_come_lloyd(seed):
+    # Stessi centroidi iniziali: Hamerly salta solo distanze inutili, quindi deve
+    # arrivare alla stessa soluzione di Lloyd (KMeans di scikit-learn)
+    X = _blob(seed=seed)
+    iniziali = _kmeans_plusplus(X, 8, np.random.default_rng(seed))
+    hamerly = KMeansAccelerato(8, init=iniziali, tol=0.0, dimensione_blocco=1000).fit(X)
+    lloyd = KMeans(8, init=iniziali, n_init=1, algorithm='lloyd', tol=0.0).fit(X)
+    np.testing.assert_array_equal(hamerly.labels_, lloyd.labels_)
+    np.testing.assert_allclose(hamerly.cluster_centers_, lloyd.cluster_centers_, rtol=1e-10)
+    assert hamerly.inertia_ == pytest.approx(lloyd.inertia_, rel=1e-10)
+    np.testing.assert_array_equal(hamerly.predict(X), hamerly.labels_)
+
+
+def test_hamerly_salta_distanze():
+    X = _blob()
+    modello = KMeansAccelerato(8, random_state=0).fit(X)
+    totali = sum(r['distanze_calcolate'] + r['distanze_saltate'] for r in modello.statistiche_)
+    assert modello.distanze_calcolate_ + modello.distanze_saltate_ == totali
+    assert modello.distanze_saltate_ > modello.distanze_calcolate_
+
+
+def test_minibatch_vicino_a_hamerly_e_statistiche_limitate():
+    X = _blob(n=20_000)
+    hamerly = KMeansAccelerato(8, random_state=0).fit(X)
+    # Batch piccoli e nessun arresto anticipato: molti più passi di MAX_STATISTICHE
+    minibatch = KMeansAccelerato(8, algoritmo='minibatch', batch_size=64, max_iter=5, tol=0.0,
+                                 max_no_improvement=10**9, random_state=0).fit(X)
+    assert minibatch.inertia_ < 1.05 * hamerly.inertia_
+    passi = 5 * (len(X) // 64)
+    assert len(minibatch.statistiche_) == MAX_STATISTICHE < passi
+    assert minibatch.statistiche_[-1]['iterazione'] == passi
+    # I totali contano tutti i passi, non solo quelli rimasti in statistiche_
+    assert minibatch.distanze_calcolate_ == passi * 64 * 8
+    assert minibatch.distanze_calcolate_ + minibatch.distanze_saltate_ == passi * len(X) * 8
+
+
+def test_algoritmo_sconosciuto():
+    with pytest.raises(ValueError):
+        KMeansAccelerato(algoritmo='elkan')
@@ -0,0 +1,82 @@
+# Test delle metriche a blocchi (utils/metriche.py)
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import accuracy_score, confusion_matrix, mean_absolute_error, mean_squared_error, r2_score
+from sklearn.tree import DecisionTreeClassifier
+
+from utils.metriche import (Accuratezza, ErroreRegressione, MatriceConfusioneIncrementale, valuta_a_blocchi,
+                            valuta_in_parallelo)
+
+
+def _blocchi(n, rng):
+    """Confini casuali (anche blocchi vuoti) che dividono n righe."""
+    confini = np.sort(rng.integers(0, n + 1, 12))
+    return list(zip(np.r_[0, confini], np.r_[confini, n]))
+
+
+def _unisci(crea, y_vero, y_pred, rng):
+    """Un accumulatore per blocco, poi tutti uniti in uno: come fanno i processi."""
+    parziali = [crea().aggiorna(y_vero[a:b], y_pred[a:b]) for a, b in _blocchi(len(y_vero), rng)]
+    totale = crea()
+    for parziale in parziali:
+        totale.unisci(parziale)
+    return totale
+
+
+def test_errore_regressione_unito_come_sklearn():
+    rng = np.random.default_rng(0)
+    # Media grande rispetto alla varianza: la somma di y e y² perderebbe precisione
+    y_vero = rng.normal(1e6, 1.0, 10_000)
+    y_pred = y_vero + rng.normal(0.0, 0.5, len(y_vero))
+    metrica = _unisci(ErroreRegressione, y_vero, y_pred, rng)
+    assert metrica.n == len(y_vero)
+    assert metrica.mse == pytest.approx(mean_squared_error(y_vero, y_pred), rel=1e-9)
+    assert metrica.rmse == pytest.approx(np.sqrt(mean_squared_error(y_vero, y_pred)), rel=1e-9)
+    assert metrica.mae == pytest.approx(mean_absolute_error(y_vero, y_pred), rel=1e-9)
+    assert metrica.r2 == pytest.approx(r2_score(y_vero, y_pred), rel=1e-9)
+
+
+def test_errore_regressione_y_costante():
+    y = np.full(10, 3.0)
+    assert ErroreRegressione().aggiorna(y, y).r2 == r2_score(y, y)
+    assert ErroreRegressione().aggiorna(y, y + 1).r2 == r2_score(y, y + 1)
+    assert np.isnan(ErroreRegressione().mse)
+
+
+def test_accuratezza_e_matrice_unite_come_sklearn():
+    rng = np.random.default_rng(1)
+    classi = np.array(['gatto', 'cane', 'topo'])
+    y_vero = rng.choice(classi, 5000)
+    y_pred = np.where(rng.random(5000) < 0.7, y_vero, rng.choice(classi, 5000))
+    accuratezza = _unisci(Accuratezza, y_vero, y_pred, rng)
+    matrice = _unisci(lambda: MatriceConfusioneIncrementale(np.sort(classi)), y_vero, y_pred, rng)
+    assert accuratezza.accuratezza == pytest.approx(accuracy_score(y_vero, y_pred), rel=1e-12)
+    np.testing.assert_array_equal(matrice.matrice, confusion_matrix(y_vero, y_pred, labels=np.sort(classi)))
+    assert matrice.accuratezza == pytest.approx(accuracy_score(y_vero, y_pred), rel=1e-12)
+    assert matrice.n_campioni == len(y_vero)
+
+
+def test_matrice_errori():
+    matrice = MatriceConfusioneIncrementale([0, 1])
+    with pytest.raises(ValueError):
+        matrice.aggiorna([0, 2], [0, 1])
+    with pytest.raises(ValueError):
+        matrice.unisci(MatriceConfusioneIncrementale([0, 1, 2]))
+
+
+@pytest.mark.parametrize('processi', [1, 2])
+def test_valuta_a_blocchi_e_in_parallelo(processi):
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(3001, 4))
+    y_reg = X @ np.array([1.0, -2.0, 0.5, 3.0]) + rng.normal(0, 0.1, len(X))
+    y_cls = (X[:, 0] + X[:, 1] > 0).astype(int)
+    regressione = LinearRegression().fit(X, y_reg)
+    albero = DecisionTreeClassifier(max_depth=3, random_state=0).fit(X, y_cls)
+
+    errore, = valuta_in_parallelo(regressione, X, y_reg, [ErroreRegressione()], processi=processi,
+                                  dimensione_blocco=100)
+    assert errore.mse == pytest.approx(mean_squared_error(y_reg, regressione.predict(X)), rel=1e-9)
+    assert errore.r2 == pytest.approx(r2_score(y_reg, regressione.predict(X)), rel=1e-9)
+    matrice, = valuta_a_blocchi(albero, X, y_cls, [MatriceConfusioneIncrementale([0, 1])], dimensione_blocco=7)
+    np.testing.assert_array_equal(matrice.matrice, confusion_matrix(y_cls, albero.predict(X)))
@@ -0,0 +1,58 @@
+# Test dell'MLP in NumPy (05_Rete_Neurale_Semplice/mlp_numpy.py)
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.datasets import load_digits
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.neural_network import MLPClassifier
+from sklearn.preprocessing import StandardScaler
+
+from mlp_numpy import MLPNumpy
+
+
+@pytest.fixture(scope='module')
+def digits():
+    X, y = load_digits(return_X_y=True)
+    return StandardScaler().fit_transform(X), y
+
+
+def _addestra(modello, X, y):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        return modello.fit(X, y)
+
+
+@pytest.mark.parametrize('parametri', [
+    dict(hidden_layer_sizes=(32, 16), activation='relu', early_stopping=True),
+    dict(hidden_layer_sizes=(20,), activation='tanh', batch_size=50),
+    dict(hidden_layer_sizes=(20,), activation='logistic', alpha=0.01),
+])
+def test_float64_riproduce_mlpclassifier(digits, parametri):
+    X, y = digits
+    riferimento = _addestra(MLPClassifier(solver='adam', max_iter=15, random_state=0, **parametri), X, y)
+    modello = _addestra(MLPNumpy(dtype=np.float64, max_iter=15, random_state=0, **parametri), X, y)
+    assert modello.n_iter_ == riferimento.n_iter_
+    np.testing.assert_allclose(modello.loss_curve_, riferimento.loss_curve_, rtol=1e-7)
+    for W, W_rif in zip(modello.coefs_, riferimento.coefs_):
+        np.testing.assert_allclose(W, W_rif, rtol=1e-6, atol=1e-9)
+    np.testing.assert_allclose(modello.predict_proba(X), riferimento.predict_proba(X), atol=1e-7)
+    np.testing.assert_array_equal(modello.predict(X), riferimento.predict(X))
+
+
+def test_float32_e_classi_binarie(digits):
+    X, y = digits
+    binario = np.where(y < 5, 'piccola', 'grande') # Due classi: una sola uscita logistica
+    riferimento = _addestra(MLPClassifier(hidden_layer_sizes=(32,), max_iter=30, random_state=0), X, binario)
+    modello = _addestra(MLPNumpy(hidden_layer_sizes=(32,), max_iter=30, random_state=0), X, binario)
+    assert modello.coefs_[0].dtype == np.float32
+    assert modello.predict_proba(X).shape == (len(X), 2)
+    assert set(modello.predict(X)) <= set(modello.classes_)
+    # In float32 i numeri cambiano un po', l'accuratezza praticamente no
+    assert np.mean(modello.predict(X) == binario) == pytest.approx(np.mean(riferimento.predict(X) == binario), abs=0.01)
+    np.testing.assert_allclose(modello.loss_curve_, riferimento.loss_curve_, rtol=1e-3)
+
+
+def test_attivazione_sconosciuta():
+    with pytest.raises(ValueError):
+        MLPNumpy(activation='softplus')
@@ -0,0 +1,75 @@
+# Test della regressione lineare a blocchi (01_Regressione_Lineare/regressione_streaming.py)
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_squared_error, r2_score
+
+from regressione_streaming import RegressioneLineareStreaming
+
+
+def _dati(n=5000, n_features=3, seed=0):
+    rng = np.random.default_rng(seed)
+    # Media grande rispetto alla varianza: mette alla prova la traslazione dei dati
+    X = rng.normal(1000.0, 5.0, (n, n_features))
+    y = X @ np.array([2.5, -1.0, 0.3])[:n_features] + 20 + rng.normal(0.0, 3.0, n)
+    return X, y
+
+
+def _chunk(X, y, dimensione):
+    for inizio in range(0, len(X), dimensione):
+        yield X[inizio:inizio + dimensione], y[inizio:inizio + dimensione]
+
+
+@pytest.mark.parametrize('dimensione', [1, 37, 1000, 10_000])
+def test_partial_fit_come_linear_regression(dimensione):
+    X, y = _dati()
+    riferimento = LinearRegression().fit(X, y)
+    modello = RegressioneLineareStreaming(fattore_oblio=1.0)
+    for X_chunk, y_chunk in _chunk(X, y, dimensione):
+        modello.partial_fit(X_chunk, y_chunk)
+    np.testing.assert_allclose(modello.coef_, riferimento.coef_, rtol=1e-7)
+    np.testing.assert_allclose(modello.intercept_, riferimento.intercept_, rtol=1e-7)
+    y_pred = riferimento.predict(X)
+    np.testing.assert_allclose(modello.predict(X), y_pred, rtol=1e-9)
+    assert modello.mse_ == pytest.approx(mean_squared_error(y, y_pred), rel=1e-6)
+    assert modello.r2_ == pytest.approx(r2_score(y, y_pred), rel=1e-9)
+    assert modello.n_samples_seen_ == len(X)
+
+
+def test_fit_chunks_come_partial_fit():
+    X, y = _dati(seed=1)
+    a = RegressioneLineareStreaming().fit_chunks(_chunk(X, y, 100))
+    b = RegressioneLineareStreaming()
+    for X_chunk, y_chunk in _chunk(X, y, 100):
+        b.partial_fit(X_chunk, y_chunk)
+    np.testing.assert_allclose(a.coef_, b.coef_, rtol=1e-12)
+    assert a.intercept_ == pytest.approx(b.intercept_, rel=1e-12)
+
+
+def test_chunk_vuoti_e_errori():
+    X, y = _dati(n=200, n_features=1)
+    modello = RegressioneLineareStreaming()
+    modello.partial_fit(X[:0], y[:0]) # Un chunk vuoto non addestra e non solleva errori
+    with pytest.raises(AttributeError):
+        modello.coef_
+    modello.partial_fit(X[:, 0], y) # Un array 1D è una sola feature
+    with pytest.raises(ValueError):
+        modello.partial_fit(np.hstack([X, X]), y)
+    with pytest.raises(ValueError):
+        RegressioneLineareStreaming().fit_chunks([])
+    with pytest.raises(ValueError):
+        RegressioneLineareStreaming(fattore_oblio=0.0)
+
+
+def test_fattore_oblio_segue_il_cambiamento():
+    # Con oblio il modello deve seguire la pendenza dei dati più recenti
+    rng = np.random.default_rng(2)
+    X = rng.uniform(50, 150, (20_000, 1))
+    y = np.where(np.arange(len(X)) < 10_000, 2.0, 4.0) * X[:, 0] + rng.normal(0, 1, len(X))
+    con_oblio = RegressioneLineareStreaming(fattore_oblio=0.999)
+    senza_oblio = RegressioneLineareStreaming()
+    for X_chunk, y_chunk in _chunk(X, y, 500):
+        con_oblio.partial_fit(X_chunk, y_chunk)
+        senza_oblio.partial_fit(X_chunk, y_chunk)
+    assert con_oblio.coef_[0] == pytest.approx(4.0, abs=0.05)
+    assert senza_oblio.coef_[0] < 3.5
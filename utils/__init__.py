@@ -0,0 +1 @@
+# Script di utilità condivisi dagli esempi (runner, misure dei tempi, ...).
@@ -0,0 +1,379 @@
+# Suite di benchmark riproducibile per le cinque pipeline, con confronto tra versioni.
+#
+# Ogni pipeline viene eseguita (senza grafici né dimostrazioni) su dataset sintetici di
+# dimensioni diverse generati con utils/dataset.py (seed fisso: sempre gli stessi dati)
+# e con un numero diverso di thread per le librerie numeriche (BLAS, OpenMP). Ogni
+# combinazione viene ripetuta più volte (servono più campioni per capire se una
+# differenza è reale o solo rumore) e ogni ripetizione gira in un processo Python nuovo:
+# così il limite di thread vale davvero e il picco di memoria residente (RSS), che in un
+# processo non può che crescere, è una misura indipendente per ogni ripetizione.
+#
+# I risultati vengono salvati in un file JSON "baseline" con la versione del formato, il
+# commit git, le versioni delle librerie e la macchina. Il comando `confronta` legge due
+# baseline e segnala le regressioni: throughput (righe al secondo di fit e predict) più
+# basso o memoria più alta, solo se la differenza supera una soglia (es. 5%) ED è
+# statisticamente significativa (test t di Welch unilaterale sulle ripetizioni).
+#
+# Il comando `avvio` misura invece il tempo di avvio a freddo: un processo nuovo che
+# importa una pipeline ed esegue solo fit e predict, con `python -X importtime`, che
+# riporta il tempo di import di ogni modulo. Con `--rispetto-a <commit>` la stessa misura
+# viene ripetuta su una versione precedente del progetto, per vedere cosa è cambiato.
+#
+# Esempi (dalla cartella principale del progetto):
+#   python -m utils.benchmark esegui                                   # griglia predefinita
+#   python -m utils.benchmark esegui knn albero --dimensioni 1e4 1e5 --thread 1 4 --ripetizioni 5
+#   python -m utils.benchmark confronta benchmark/baseline_A.json benchmark/baseline_B.json
+#   python -m utils.benchmark avvio --rispetto-a HEAD~1
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+import numpy as np
+
+from utils.pipeline import CARTELLA_PROGETTO, PIPELINE
+
+VERSIONE_FORMATO = 2 # 2: una ripetizione per processo (RSS indipendente tra le ripetizioni)
+
+# Dataset sintetico (utils/dataset.py) con la stessa forma di quello di ogni script
+DATASET = {
+    'regressione': ('regressione', {}),
+    'knn': ('classificazione', {'n_features': 4, 'n_informative': 4, 'n_classi': 3}), # Come Iris
+    'kmeans': ('blob', {}),
+    'albero': ('classificazione', {}), # Come Breast Cancer
+    'mlp': ('cifre', {}),
+}
+
+# Per ogni metrica: True se un valore più alto è meglio
+METRICHE = {
+    'throughput_fit': True, # Righe di training al secondo
+    'throughput_predict': True, # Righe predette al secondo
+    'tempo_totale_s': False, # Tutte le fasi della pipeline tranne import e caricamento
+    'rss_massimo_mb': False, # Picco di memoria residente del processo (esecuzione di prova + misura)
+}
+
+# Pacchetti di cui riportare il tempo di import nel comando `avvio`
+PACCHETTI_AVVIO = ('sklearn', 'scipy', 'pandas', 'matplotlib')
+
+VARIABILI_THREAD = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+
+
+# --- Una misura: una pipeline, un dataset, un numero di thread (in un processo nuovo) ---
+
+def _misura_singola(nome, percorso_dati, thread):
+    """Eseguita nel processo figlio: una ripetizione della pipeline, preceduta da un'esecuzione di prova."""
+    from threadpoolctl import threadpool_limits
+
+    from utils.dataset import carica_dataset
+    from utils.esegui import esegui_pipeline
+    from utils.misure import Misuratore, rss_massimo_mb
+
+    threadpool_limits(thread)
+    X, y = carica_dataset(percorso_dati)
+    # Le pipeline usano il 70% delle righe per il training e il 30% per il test
+    # (la regressione e K-Means usano tutte le righe per entrambe le fasi)
+    n_fit = len(y) if nome in ('regressione', 'kmeans') else int(round(len(y) * 0.7))
+    n_predict = len(y) - n_fit if nome != 'regressione' else len(y)
+    # La prima esecuzione (scartata) importa lo script e scalda le cache
+    esegui_pipeline(nome, Misuratore(memoria=False), dimostrazioni=False, silenzioso=True, dati=percorso_dati)
+    _, riepilogo = esegui_pipeline(nome, Misuratore(memoria=False), dimostrazioni=False, silenzioso=True,
+                                   dati=percorso_dati)
+    fasi = riepilogo['fasi']
+    misura = {
+        'throughput_fit': n_fit / fasi['fit']['tempo_s'],
+        # K-Means non ha una vera fase di predict (legge solo kmeans.labels_): non la misuriamo
+        'throughput_predict': n_predict / fasi['predict']['tempo_s'] if n_predict else None,
+        'tempo_totale_s': sum(v['tempo_s'] for f, v in fasi.items() if f not in ('import', 'load')),
+        'rss_massimo_mb': rss_massimo_mb(),
+        'fasi_s': {f: v['tempo_s'] for f, v in fasi.items()},
+    }
+    return {'n_campioni': int(len(y)), 'n_features': int(X.shape[1]), 'misura': misura}
+
+
+def _esegui_in_processo(nome, percorso_dati, thread, ripetizioni):
+    """`ripetizioni` misure della pipeline, ognuna in un processo Python nuovo."""
+    ambiente = {**os.environ, **{variabile: str(thread) for variabile in VARIABILI_THREAD}, 'MPLBACKEND': 'Agg'}
+    comando = [sys.executable, '-m', 'utils.benchmark', '_singola', nome, percorso_dati, '--thread', str(thread)]
+    misure = []
+    for _ in range(ripetizioni):
+        uscita = subprocess.run(comando, cwd=CARTELLA_PROGETTO, env=ambiente, capture_output=True, text=True)
+        if uscita.returncode != 0:
+            raise RuntimeError(f"Benchmark di {nome} fallito:\n{uscita.stderr}")
+        risultato = json.loads(uscita.stdout.strip().splitlines()[-1])
+        misure.append(risultato.pop('misura'))
+    return {**risultato, 'misure': misure}
+
+
+def _ambiente():
+    """Informazioni per capire se due baseline sono confrontabili."""
+    import numpy
+    import sklearn
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=CARTELLA_PROGETTO,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        modificato = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                         cwd=CARTELLA_PROGETTO, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, modificato = None, None
+    return {'commit': commit, 'modifiche_non_salvate': modificato, 'python': platform.python_version(),
+            'numpy': numpy.__version__, 'scikit-learn': sklearn.__version__, 'piattaforma': platform.platform(),
+            'processore': platform.processor() or platform.machine(), 'n_cpu': os.cpu_count()}
+
+
+def esegui_suite(nomi=tuple(PIPELINE), dimensioni=(10_000, 100_000), thread=(1,), ripetizioni=5, seed=42,
+                 cartella_dati='dati', verbose=True):
+    """Esegue la griglia pipeline x dimensioni x thread e restituisce la baseline (dizionario JSON)."""
+    from utils.dataset import genera_dataset
+
+    baseline = {'versione_formato': VERSIONE_FORMATO, 'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'ambiente': _ambiente(),
+                'configurazione': {'pipeline': list(nomi), 'dimensioni': [int(n) for n in dimensioni],
+                                   'thread': list(thread), 'ripetizioni': ripetizioni, 'seed': seed},
+                'risultati': []}
+    for nome in nomi:
+        tipo, parametri = DATASET[nome]
+        for n in dimensioni:
+            percorso = genera_dataset(tipo, int(n), cartella=cartella_dati, seed=seed, verbose=False, **parametri)
+            for t in thread:
+                inizio = time.perf_counter()
+                risultato = _esegui_in_processo(nome, os.path.abspath(percorso), t, ripetizioni)
+                risultato.update({'pipeline': nome, 'thread': t})
+                baseline['risultati'].append(risultato)
+                if verbose:
+                    mediane = {m: np.median([r[m] or np.nan for r in risultato['misure']]) for m in METRICHE}
+                    print(f"{nome:<12} n={int(n):>10} thread={t:<3} fit {mediane['throughput_fit']:>12,.0f} righe/s  "
+                          f"predict {mediane['throughput_predict']:>12,.0f} righe/s  "
+                          f"RSS {mediane['rss_massimo_mb']:>7.1f} MB  ({time.perf_counter() - inizio:.1f} s)")
+    return baseline
+
+
+# --- Confronto tra due baseline ---
+
+def _chiave(risultato):
+    return risultato['pipeline'], risultato['n_campioni'], risultato['thread']
+
+
+def confronta_baseline(base, nuova, soglia=0.05, alpha=0.05):
+    """Confronta le metriche di due baseline per ogni combinazione presente in entrambe.
+
+    Una differenza è una regressione se il valore mediano peggiora più di `soglia`
+    (frazione) e il test t di Welch unilaterale sulle ripetizioni (una per processo,
+    quindi indipendenti) ha p < alpha. Se entrambe le serie sono costanti il test non è
+    definito e basta la soglia.
+    """
+    from scipy import stats
+
+    for baseline in (base, nuova):
+        if baseline.get('versione_formato') != VERSIONE_FORMATO:
+            raise ValueError(f"Formato della baseline non supportato: {baseline.get('versione_formato')}")
+    precedenti = {_chiave(r): r for r in base['risultati']}
+    righe = []
+    for risultato in nuova['risultati']:
+        precedente = precedenti.get(_chiave(risultato))
+        if precedente is None:
+            continue
+        for metrica, piu_alto_meglio in METRICHE.items():
+            a = [m[metrica] for m in precedente['misure']]
+            b = [m[metrica] for m in risultato['misure']]
+            if None in a or None in b:
+                continue
+            a, b = np.array(a), np.array(b)
+            variazione = np.median(b) / np.median(a) - 1.0
+            peggioramento = -variazione if piu_alto_meglio else variazione
+            if len(a) < 2 or len(b) < 2:
+                p = float('nan') # Una sola ripetizione: impossibile dire se la differenza è significativa
+            elif a.std() == 0 and b.std() == 0:
+                p = 0.0 if np.median(a) != np.median(b) else 1.0
+            else:
+                # Test unilaterale nella direzione della variazione osservata
+                p = float(stats.ttest_ind(b, a, equal_var=False,
+                                          alternative='less' if variazione < 0 else 'greater').pvalue)
+            righe.append({'pipeline': risultato['pipeline'], 'n_campioni': risultato['n_campioni'],
+                          'thread': risultato['thread'], 'metrica': metrica,
+                          'base': float(np.median(a)), 'nuova': float(np.median(b)),
+                          'variazione': float(variazione), 'p': p,
+                          'regressione': bool(peggioramento > soglia and p < alpha),
+                          'miglioramento': bool(-peggioramento > soglia and p < alpha)})
+    return righe
+
+
+# --- Tempo di avvio a freddo (import + fit + predict in un processo nuovo) ---
+
+# Eseguito nel processo figlio con -X importtime: la pipeline senza grafici né dimostrazioni
+CODICE_AVVIO = """
+import json, sys
+from utils.esegui import esegui_pipeline
+from utils.misure import Misuratore
+_, riepilogo = esegui_pipeline(sys.argv[1], Misuratore(memoria=False), dimostrazioni=False, silenzioso=True)
+print(json.dumps({f: v['tempo_s'] for f, v in riepilogo['fasi'].items()}))
+"""
+
+
+def tempi_import(testo):
+    """Legge l'output di `python -X importtime`: (totale in secondi, {modulo: tempo proprio in secondi}).
+
+    Ogni riga è `import time: <proprio µs> | <cumulativo µs> | <modulo>`; il tempo
+    proprio esclude i moduli importati a loro volta, quindi la somma è il tempo totale.
+    """
+    moduli = {}
+    for riga in testo.splitlines():
+        if not riga.startswith('import time:') or 'self [us]' in riga:
+            continue
+        proprio, _, modulo = riga[len('import time:'):].split('|')
+        moduli[modulo.strip()] = int(proprio) / 1e6
+    return sum(moduli.values()), moduli
+
+
+def misura_avvio(nome, cartella=CARTELLA_PROGETTO, ripetizioni=5):
+    """Mediana su `ripetizioni` processi nuovi del tempo di avvio della pipeline `nome`.
+
+    Restituisce il tempo del processo (dall'avvio dell'interprete alla fine di predict),
+    il tempo totale di import, quello di ogni pacchetto di PACCHETTI_AVVIO (0 se non
+    viene importato) e i tempi delle fasi fit e predict.
+    """
+    ambiente = {**os.environ, 'MPLBACKEND': 'Agg'}
+    misure = []
+    # La prima esecuzione (scartata) porta i file dei moduli nella cache del disco
+    for ripetizione in range(ripetizioni + 1):
+        inizio = time.perf_counter()
+        uscita = subprocess.run([sys.executable, '-X', 'importtime', '-c', CODICE_AVVIO, nome], cwd=cartella,
+                                env=ambiente, capture_output=True, text=True)
+        processo = time.perf_counter() - inizio
+        if uscita.returncode != 0:
+            raise RuntimeError(f"Avvio di {nome} fallito:\n{uscita.stderr[-2000:]}")
+        if ripetizione == 0:
+            continue
+        totale, moduli = tempi_import(uscita.stderr)
+        fasi = json.loads(uscita.stdout.strip().splitlines()[-1])
+        misura = {'processo_s': processo, 'import_s': totale, 'fit_s': fasi['fit'], 'predict_s': fasi['predict']}
+        for pacchetto in PACCHETTI_AVVIO:
+            misura[pacchetto] = sum(t for m, t in moduli.items() if m == pacchetto or m.startswith(pacchetto + '.'))
+        misure.append(misura)
+    return {chiave: float(np.median([m[chiave] for m in misure])) for chiave in misure[0]}
+
+
+def _estrai_versione(riferimento, destinazione):
+    """Copia in `destinazione` i file del progetto al commit `riferimento` (git archive)."""
+    archivio = subprocess.run(['git', 'archive', '--format=tar', riferimento], cwd=CARTELLA_PROGETTO,
+                              capture_output=True, check=True).stdout
+    with tempfile.TemporaryFile() as f:
+        f.write(archivio)
+        f.seek(0)
+        with tarfile.open(fileobj=f) as tar:
+            tar.extractall(destinazione, filter='data')
+
+
+def confronta_avvio(nomi=tuple(PIPELINE), riferimento=None, ripetizioni=5):
+    """Tempi di avvio della versione attuale ({nome: misure}) e, se indicato, del commit `riferimento`."""
+    attuale = {nome: misura_avvio(nome, ripetizioni=ripetizioni) for nome in nomi}
+    if riferimento is None:
+        return attuale, None
+    with tempfile.TemporaryDirectory() as cartella:
+        _estrai_versione(riferimento, cartella)
+        precedente = {nome: misura_avvio(nome, cartella, ripetizioni) for nome in nomi}
+    return attuale, precedente
+
+
+def _stampa_avvio(attuale, precedente, riferimento):
+    print(f"{'pipeline':<12} {'versione':<12} {'processo':>9} {'import':>8} {'fit':>8} {'predict':>8}"
+          + ''.join(f" {p:>11}" for p in PACCHETTI_AVVIO))
+    for nome, misura in attuale.items():
+        versioni = [('attuale', misura)]
+        if precedente is not None:
+            versioni.insert(0, (riferimento, precedente[nome]))
+        for versione, m in versioni:
+            print(f"{nome:<12} {versione:<12.12} {m['processo_s'] * 1e3:>7.0f}ms {m['import_s'] * 1e3:>6.0f}ms "
+                  f"{m['fit_s'] * 1e3:>6.1f}ms {m['predict_s'] * 1e3:>6.1f}ms"
+                  + ''.join(f" {m[p] * 1e3:>9.0f}ms" for p in PACCHETTI_AVVIO))
+        if precedente is not None:
+            prima, dopo = precedente[nome]['processo_s'], misura['processo_s']
+            print(f"{'':<12} avvio {(1 - dopo / prima) * 100:.0f}% più veloce ({(prima - dopo) * 1e3:.0f} ms in meno)")
+
+
+def _carica(percorso):
+    with open(percorso) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark delle pipeline e confronto tra baseline")
+    comandi = parser.add_subparsers(dest='comando', required=True)
+
+    esegui = comandi.add_parser('esegui', help="Esegue la suite e salva una baseline JSON")
+    esegui.add_argument("pipeline", nargs='*', help=f"Pipeline tra {', '.join(PIPELINE)} (default: tutte)")
+    esegui.add_argument("--dimensioni", nargs='+', type=float, default=[1e4, 1e5], help="Righe dei dataset")
+    esegui.add_argument("--thread", nargs='+', type=int, default=sorted({1, os.cpu_count()}),
+                        help="Numeri di thread per BLAS/OpenMP (default: 1 e tutti i core)")
+    esegui.add_argument("--ripetizioni", type=int, default=5, help="Esecuzioni per ogni combinazione")
+    esegui.add_argument("--seed", type=int, default=42)
+    esegui.add_argument("--cartella-dati", default='dati', help="Dove generare (o riusare) i dataset")
+    esegui.add_argument("--uscita", default=None,
+                        help="File della baseline (default: benchmark/baseline_<data>_<commit>.json)")
+
+    confronta = comandi.add_parser('confronta', help="Confronta due baseline e segnala le regressioni")
+    confronta.add_argument("base", help="Baseline di riferimento")
+    confronta.add_argument("nuova", help="Baseline da controllare")
+    confronta.add_argument("--soglia", type=float, default=0.05, help="Variazione minima (frazione) da segnalare")
+    confronta.add_argument("--alpha", type=float, default=0.05, help="Livello di significatività del test")
+
+    avvio = comandi.add_parser('avvio', help="Tempo di avvio a freddo (import + fit + predict) con -X importtime")
+    avvio.add_argument("pipeline", nargs='*', help=f"Pipeline tra {', '.join(PIPELINE)} (default: tutte)")
+    avvio.add_argument("--rispetto-a", default=None, help="Commit git con cui confrontare (es. HEAD~1)")
+    avvio.add_argument("--ripetizioni", type=int, default=5, help="Processi per ogni misura (si usa la mediana)")
+
+    singola = comandi.add_parser('_singola') # Uso interno: una misura nel processo figlio
+    singola.add_argument("nome")
+    singola.add_argument("percorso_dati")
+    singola.add_argument("--thread", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.comando == '_singola':
+        print(json.dumps(_misura_singola(args.nome, args.percorso_dati, args.thread)))
+        return
+
+    if args.comando in ('esegui', 'avvio'):
+        sconosciute = set(args.pipeline) - set(PIPELINE)
+        if sconosciute:
+            parser.error(f"pipeline sconosciute: {', '.join(sorted(sconosciute))}")
+
+    if args.comando == 'avvio':
+        attuale, precedente = confronta_avvio(args.pipeline or tuple(PIPELINE), args.rispetto_a, args.ripetizioni)
+        _stampa_avvio(attuale, precedente, args.rispetto_a)
+        return
+
+    if args.comando == 'esegui':
+        baseline = esegui_suite(args.pipeline or tuple(PIPELINE), [int(n) for n in args.dimensioni], args.thread,
+                                args.ripetizioni, args.seed, args.cartella_dati)
+        uscita = args.uscita or os.path.join(
+            'benchmark', f"baseline_{time.strftime('%Y%m%d_%H%M%S')}_{baseline['ambiente']['commit'] or 'nogit'}.json")
+        os.makedirs(os.path.dirname(uscita) or '.', exist_ok=True)
+        with open(uscita, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline salvata in {uscita}")
+        return
+
+    base, nuova = _carica(args.base), _carica(args.nuova)
+    for chiave in ('commit', 'n_cpu', 'processore', 'numpy', 'scikit-learn'):
+        if base['ambiente'].get(chiave) != nuova['ambiente'].get(chiave):
+            print(f"Attenzione: {chiave} diverso ({base['ambiente'].get(chiave)} -> {nuova['ambiente'].get(chiave)})")
+    righe = confronta_baseline(base, nuova, args.soglia, args.alpha)
+    print(f"{'pipeline':<12} {'righe':>10} {'thread':>6} {'metrica':<20} {'base':>12} {'nuova':>12} "
+          f"{'variazione':>10} {'p':>7}")
+    for r in righe:
+        esito = "REGRESSIONE" if r['regressione'] else ("migliorato" if r['miglioramento'] else "")
+        print(f"{r['pipeline']:<12} {r['n_campioni']:>10} {r['thread']:>6} {r['metrica']:<20} {r['base']:>12.4g} "
+              f"{r['nuova']:>12.4g} {r['variazione'] * 100:>9.1f}% {r['p']:>7.3f}  {esito}")
+    regressioni = sum(r['regressione'] for r in righe)
+    print(f"\n{regressioni} regressioni significative su {len(righe)} confronti "
+          f"(soglia {args.soglia * 100:.0f}%, alpha {args.alpha})")
+    sys.exit(1 if regressioni else 0)
+
+
+if __name__ == "__main__":
+    main()
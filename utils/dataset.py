@@ -0,0 +1,203 @@
+# Generatore di dataset sintetici di grandi dimensioni, salvati su disco in formato .npy.
+#
+# Gli esempi usano dataset giocattolo (50 punti, Iris, 300 blob, Breast Cancer, Digits)
+# che non mostrano come si comportano gli algoritmi con 10^6-10^8 righe. Questo modulo
+# genera dati simili a quelli degli esempi ma di dimensione configurabile:
+#
+# - 'regressione': dimensione casa (mq) -> prezzo, come in regressione_lineare.py;
+# - 'blob': cluster gaussiani, come make_blobs in kmeans_clustering.py;
+# - 'classificazione': classi gaussiane con features informative e di rumore,
+#   simile a Breast Cancer in alberi_decisionali.py;
+# - 'cifre': immagini 8x8 con valori 0-16 simili a Digits in rete_neurale_mlp.py.
+#
+# I dati vengono scritti UNA volta, a blocchi (la memoria usata non dipende dal numero
+# di righe), in X.npy e y.npy insieme a un file meta.json. Le esecuzioni successive
+# con gli stessi parametri riusano i file, che vengono aperti in memory-map (zero-copy).
+#
+# Esempio (dalla cartella principale del progetto):
+#   python -m utils.dataset cifre 10000000 --cartella dati
+#   python -m utils.esegui mlp --dati dati/cifre_n10000000_s42
+import argparse
+import json
+import os
+
+import numpy as np
+
+VERSIONE_FORMATO = 1
+DIMENSIONE_BLOCCO = 1_000_000 # Righe generate per blocco: fissata, fa parte della riproducibilità
+
+# Parametri predefiniti di ogni tipo di dataset
+PARAMETRI_PREDEFINITI = {
+    'regressione': {'n_features': 1, 'rumore': 50.0},
+    'blob': {'n_features': 2, 'n_centri': 15, 'cluster_std': 0.7},
+    'classificazione': {'n_features': 30, 'n_informative': 10, 'n_classi': 2, 'separazione': 1.0},
+    'cifre': {'rumore': 3.0},
+}
+
+
+# --- Generatori: ognuno produce un blocco di righe dato un generatore casuale ---
+# `stato` contiene ciò che deve essere uguale per tutti i blocchi (es. i centri dei cluster).
+
+def _stato_regressione(rng, p):
+    coefficienti = np.full(p['n_features'], 2.5)
+    if p['n_features'] > 1:
+        coefficienti = rng.uniform(0.5, 5.0, p['n_features'])
+    return {'coefficienti': coefficienti}
+
+
+def _blocco_regressione(rng, n, p, stato):
+    X = rng.random((n, p['n_features'])) * 100 + 50 # Dimensioni case tra 50 e 150 mq
+    y = X @ stato['coefficienti'] + rng.standard_normal(n) * p['rumore'] + 20
+    return X, y
+
+
+def _stato_blob(rng, p):
+    return {'centri': rng.uniform(-10.0, 10.0, (p['n_centri'], p['n_features']))}
+
+
+def _blocco_blob(rng, n, p, stato):
+    y = rng.integers(0, p['n_centri'], n)
+    X = stato['centri'][y] + rng.standard_normal((n, p['n_features'])) * p['cluster_std']
+    return X, y
+
+
+def _stato_classificazione(rng, p):
+    medie = np.zeros((p['n_classi'], p['n_features']))
+    medie[:, :p['n_informative']] = rng.standard_normal((p['n_classi'], p['n_informative'])) * p['separazione']
+    return {'medie': medie}
+
+
+def _blocco_classificazione(rng, n, p, stato):
+    y = rng.integers(0, p['n_classi'], n)
+    X = stato['medie'][y] + rng.standard_normal((n, p['n_features']))
+    return X, y
+
+
+def _stato_cifre(rng, p):
+    # Come modelli usiamo l'immagine media di ogni cifra del dataset Digits
+    from sklearn.datasets import load_digits
+
+    digits = load_digits()
+    return {'modelli': np.stack([digits.data[digits.target == c].mean(axis=0) for c in range(10)])}
+
+
+def _blocco_cifre(rng, n, p, stato):
+    y = rng.integers(0, 10, n)
+    X = stato['modelli'][y] + rng.standard_normal((n, 64)) * p['rumore']
+    return np.clip(np.rint(X), 0, 16), y
+
+
+GENERATORI = {
+    'regressione': (_stato_regressione, _blocco_regressione),
+    'blob': (_stato_blob, _blocco_blob),
+    'classificazione': (_stato_classificazione, _blocco_classificazione),
+    'cifre': (_stato_cifre, _blocco_cifre),
+}
+
+
+def nome_dataset(tipo, n_campioni, seed=42, **parametri):
+    """Nome della cartella del dataset: i parametri diversi dai predefiniti entrano nel nome."""
+    extra = ''.join(f"_{k}{v}" for k, v in sorted(parametri.items())
+                    if v != PARAMETRI_PREDEFINITI[tipo].get(k))
+    return f"{tipo}_n{n_campioni}_s{seed}{extra}"
+
+
+def genera_dataset(tipo, n_campioni, cartella='dati', seed=42, dtype='float64', sovrascrivi=False,
+                   verbose=True, **parametri):
+    """Genera (o riusa, se esiste già) un dataset e restituisce il percorso della sua cartella.
+
+    - tipo: 'regressione', 'blob', 'classificazione' o 'cifre'.
+    - n_campioni: numero di righe (anche centinaia di milioni: i dati vengono scritti a blocchi).
+    - seed: a parità di seed e parametri i dati generati sono identici.
+    - dtype: tipo delle features ('float64' come negli esempi, 'float32' per dimezzare lo spazio).
+    - parametri: sostituiscono quelli in PARAMETRI_PREDEFINITI[tipo].
+    """
+    if tipo not in GENERATORI:
+        raise ValueError(f"Tipo di dataset sconosciuto: {tipo!r} (disponibili: {', '.join(GENERATORI)})")
+    sconosciuti = set(parametri) - set(PARAMETRI_PREDEFINITI[tipo])
+    if sconosciuti:
+        raise ValueError(f"Parametri non validi per {tipo!r}: {', '.join(sorted(sconosciuti))}")
+    if n_campioni < 1:
+        raise ValueError(f"n_campioni deve essere almeno 1, ricevuto {n_campioni}")
+    p = {**PARAMETRI_PREDEFINITI[tipo], **parametri}
+    percorso = os.path.join(cartella, nome_dataset(tipo, n_campioni, seed, **parametri))
+    if dtype != 'float64':
+        percorso += f"_{dtype}"
+
+    meta = {'versione': VERSIONE_FORMATO, 'tipo': tipo, 'n_campioni': int(n_campioni), 'seed': seed,
+            'dtype': dtype, 'parametri': p, 'dimensione_blocco': DIMENSIONE_BLOCCO}
+    file_meta = os.path.join(percorso, 'meta.json')
+    if not sovrascrivi and os.path.exists(file_meta):
+        with open(file_meta) as f:
+            if json.load(f) == meta:
+                if verbose:
+                    print(f"Dataset già presente, nessuna rigenerazione: {percorso}")
+                return percorso
+
+    os.makedirs(percorso, exist_ok=True)
+    crea_stato, genera_blocco = GENERATORI[tipo]
+    stato = crea_stato(np.random.default_rng([seed, 0]), p)
+
+    X = y = None
+    for indice, inizio in enumerate(range(0, n_campioni, DIMENSIONE_BLOCCO)):
+        n = min(DIMENSIONE_BLOCCO, n_campioni - inizio)
+        # Ogni blocco ha il suo generatore (seed, indice + 1): i blocchi sono indipendenti
+        X_blocco, y_blocco = genera_blocco(np.random.default_rng([seed, indice + 1]), n, p, stato)
+        if X is None:
+            # open_memmap scrive direttamente nel file .npy senza tenere tutto in RAM
+            X = np.lib.format.open_memmap(os.path.join(percorso, 'X.npy'), mode='w+', dtype=dtype,
+                                          shape=(n_campioni, X_blocco.shape[1]))
+            y = np.lib.format.open_memmap(os.path.join(percorso, 'y.npy'), mode='w+',
+                                          dtype=np.float64 if tipo == 'regressione' else np.int64,
+                                          shape=(n_campioni,))
+        X[inizio:inizio + n] = X_blocco
+        y[inizio:inizio + n] = y_blocco
+        if verbose:
+            print(f"  scritte {inizio + n}/{n_campioni} righe")
+    X.flush()
+    y.flush()
+    del X, y
+
+    # meta.json viene scritto per ultimo: se manca, il dataset è incompleto e verrà rigenerato
+    with open(file_meta, 'w') as f:
+        json.dump(meta, f, indent=2)
+    if verbose:
+        print(f"Dataset salvato in {percorso}")
+    return percorso
+
+
+def carica_dataset(percorso, mmap=True):
+    """Restituisce (X, y) del dataset in `percorso`. Con mmap=True i file non vengono letti
+    in RAM: le righe vengono caricate dal disco solo quando servono (zero-copy)."""
+    if not os.path.exists(os.path.join(percorso, 'meta.json')):
+        raise FileNotFoundError(f"{percorso} non contiene un dataset completo (manca meta.json)")
+    modo = 'r' if mmap else None
+    return (np.load(os.path.join(percorso, 'X.npy'), mmap_mode=modo),
+            np.load(os.path.join(percorso, 'y.npy'), mmap_mode=modo))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un dataset sintetico su disco (.npy)")
+    parser.add_argument("tipo", choices=list(GENERATORI))
+    parser.add_argument("n_campioni", type=float, help="Numero di righe (es. 1e7)")
+    parser.add_argument("--cartella", default='dati', help="Cartella in cui salvare i dataset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dtype", choices=['float64', 'float32'], default='float64')
+    parser.add_argument("--parametro", action='append', default=[], metavar='NOME=VALORE',
+                        help="Sostituisce un parametro predefinito, es. --parametro n_centri=100")
+    parser.add_argument("--sovrascrivi", action='store_true', help="Rigenera anche se il dataset esiste")
+    args = parser.parse_args()
+    if int(args.n_campioni) < 1:
+        parser.error(f"n_campioni deve essere almeno 1, ricevuto {args.n_campioni:g}")
+
+    parametri = {}
+    for voce in args.parametro:
+        nome, valore = voce.split('=', 1)
+        tipo_valore = type(PARAMETRI_PREDEFINITI[args.tipo].get(nome, 0.0))
+        parametri[nome] = tipo_valore(valore)
+    genera_dataset(args.tipo, int(args.n_campioni), cartella=args.cartella, seed=args.seed,
+                   dtype=args.dtype, sovrascrivi=args.sovrascrivi, **parametri)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Runner unico per i cinque esempi.
+#
+# Esegue una o più pipeline senza bloccarsi su plt.show(), quindi funziona anche su un
+# server senza display, e misura tempo reale, tempo di CPU, memoria e numero di chiamate
+# di ogni fase (load, split, scale, fit, predict, evaluate, plot) salvandoli in JSON o
+# come Chrome trace. Una fase a scelta può essere profilata (vedi utils/misure.py).
+#
+# Esempi (dalla cartella principale del progetto):
+#   python -m utils.esegui knn                          # grafici disattivati
+#   python -m utils.esegui tutte --json tempi.json      # tutte le pipeline, tempi su file
+#   python -m utils.esegui mlp --grafici file --cartella-grafici grafici/
+#   python -m utils.esegui mlp --dati dati/cifre_n10000000_s42   # dataset grande (utils/dataset.py)
+#   python -m utils.esegui tutte --chrome-trace trace.json       # linea temporale delle fasi
+#   python -m utils.esegui knn --profila fit --profilatore campionamento
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+from utils.dataset import carica_dataset
+from utils.misure import PROFILATORI, Misuratore, rss_massimo_mb, salva_chrome_trace
+from utils.pipeline import PIPELINE, carica_pipeline
+
+
+def _funzione_grafici(modalita, cartella):
+    """Restituisce (disegna, mostra_grafico) per la modalità scelta: 'no', 'file' o 'mostra'."""
+    if modalita == 'mostra':
+        return True, None
+    if modalita == 'no':
+        return False, None # Gli script importano matplotlib solo se devono disegnare
+    import matplotlib
+    matplotlib.use('Agg') # Backend senza finestre: nessun plt.show() bloccante
+
+    import matplotlib.pyplot as plt
+    os.makedirs(cartella, exist_ok=True)
+
+    def salva(nome):
+        plt.savefig(os.path.join(cartella, f"{nome}.png"), dpi=100)
+        plt.close('all')
+    return True, salva
+
+
+def esegui_pipeline(nome, misuratore=None, grafici='no', cartella_grafici='grafici',
+                    dimostrazioni=True, silenzioso=False, dati=None):
+    """Esegue la pipeline `nome` e restituisce (risultati del main, misure per fase).
+
+    `dati` è la cartella di un dataset generato con utils/dataset.py: viene aperto in
+    memory-map durante la fase 'load', al posto del dataset giocattolo dello script.
+    """
+    misuratore = misuratore or Misuratore()
+    disegna, mostra_grafico = _funzione_grafici(grafici, cartella_grafici)
+    output = io.StringIO() if silenzioso else sys.stdout
+    with contextlib.redirect_stdout(output):
+        with misuratore.fase('import'):
+            modulo = carica_pipeline(nome)
+        argomenti = {}
+        if dati is not None:
+            with misuratore.fase('load'):
+                argomenti['dati'] = carica_dataset(dati)
+        risultati = modulo.main(fase=misuratore.fase, disegna=disegna, mostra_grafico=mostra_grafico,
+                                dimostrazioni=dimostrazioni, **argomenti)
+    return risultati, misuratore.riepilogo()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Esegue gli esempi misurando tempi e memoria di ogni fase")
+    parser.add_argument("pipeline", nargs='+', choices=list(PIPELINE) + ['tutte'],
+                        help="Pipeline da eseguire ('tutte' per eseguirle tutte)")
+    parser.add_argument("--grafici", choices=['no', 'file', 'mostra'], default='no',
+                        help="no: nessun grafico; file: salva i PNG; mostra: finestre come negli script")
+    parser.add_argument("--cartella-grafici", default='grafici', help="Dove salvare i grafici con --grafici file")
+    parser.add_argument("--json", default=None, help="File in cui salvare le misure ('-' per stamparle)")
+    parser.add_argument("--dati", default=None,
+                        help="Cartella di un dataset creato con 'python -m utils.dataset' da usare al posto "
+                             "di quello dello script")
+    parser.add_argument("--senza-dimostrazioni", action='store_true',
+                        help="Salta le sezioni di confronto extra degli script")
+    parser.add_argument("--senza-memoria", action='store_true',
+                        help="Non misura la memoria (tracemalloc rallenta un po' l'esecuzione)")
+    parser.add_argument("--silenzioso", action='store_true', help="Nasconde l'output degli script")
+    parser.add_argument("--profila", default=None, metavar="FASE",
+                        help="Profila la fase indicata (es. fit) di ogni pipeline")
+    parser.add_argument("--profilatore", choices=list(PROFILATORI), default='cprofile',
+                        help="cprofile: ogni chiamata di funzione; campionamento: stack letto ogni 5 ms")
+    parser.add_argument("--cartella-profili", default='profili',
+                        help="Dove salvare i profili (.prof per cProfile, .folded per il campionamento)")
+    parser.add_argument("--chrome-trace", default=None,
+                        help="File JSON in cui salvare le fasi come Chrome trace (chrome://tracing, Perfetto)")
+    args = parser.parse_args()
+
+    nomi = list(PIPELINE) if 'tutte' in args.pipeline else args.pipeline
+    silenzioso = args.silenzioso or args.json == '-'
+    if not args.senza_memoria:
+        import tracemalloc
+        tracemalloc.start()
+
+    rapporto = {
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'piattaforma': platform.platform(),
+        'pipeline': {},
+    }
+    misuratori = {}
+    for nome in nomi:
+        misuratore = Misuratore(memoria=not args.senza_memoria, profila=args.profila,
+                                profilatore=args.profilatore)
+        _, misure = esegui_pipeline(nome, misuratore, grafici=args.grafici,
+                                    cartella_grafici=args.cartella_grafici,
+                                    dimostrazioni=not args.senza_dimostrazioni, silenzioso=silenzioso,
+                                    dati=args.dati)
+        if args.profila is not None and args.profila in misuratore.fasi:
+            os.makedirs(args.cartella_profili, exist_ok=True)
+            percorso = os.path.join(args.cartella_profili,
+                                    f"{nome}_{args.profila}{misuratore.profilatore.estensione}")
+            misuratore.profilatore.salva(percorso)
+            misure['profilo']['file'] = percorso
+        rapporto['pipeline'][nome] = misure
+        misuratori[nome] = misuratore
+    rapporto['rss_massimo_mb'] = rss_massimo_mb()
+    if args.chrome_trace:
+        salva_chrome_trace(args.chrome_trace, misuratori)
+
+    if args.json == '-':
+        print(json.dumps(rapporto, indent=2))
+        return
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rapporto, f, indent=2)
+    for nome, misure in rapporto['pipeline'].items():
+        print(f"\n--- Tempi pipeline '{nome}' (totale {misure['tempo_totale_s']:.3f} s, "
+              f"CPU {misure['cpu_totale_s']:.3f} s) ---")
+        print(f"  {'fase':<18} {'tempo':>11} {'CPU':>11} {'chiamate':>9} {'memoria':>11} {'RSS max':>11} "
+              f"{'RSS +':>11}")
+        for fase, voce in misure['fasi'].items():
+            memoria = f"{voce['picco_memoria_mb']:8.2f} MB" if voce['picco_memoria_mb'] is not None else ""
+            aumento = f"{voce['rss_aumento_mb']:8.1f} MB" if voce['rss_aumento_mb'] is not None else ""
+            print(f"  {fase:<18} {voce['tempo_s']:9.4f} s {voce['cpu_s']:9.4f} s {voce['chiamate']:>9} "
+                  f"{memoria:>11} {voce['rss_massimo_mb']:8.1f} MB {aumento:>11}")
+        if 'profilo' in misure:
+            profilo = misure['profilo']
+            print(f"  Funzioni più costose nella fase '{profilo['fase']}' (tempo cumulativo):")
+            for voce in profilo['funzioni'][:10]:
+                print(f"    {voce['tempo_cumulativo_s']:9.4f} s  {voce['funzione']}")
+            if 'file' in profilo:
+                print(f"  Profilo completo salvato in {profilo['file']}")
+    print(f"\nPicco di memoria residente del processo: {rapporto['rss_massimo_mb']:.1f} MB")
+    if args.chrome_trace:
+        print(f"Chrome trace salvato in {args.chrome_trace} (aprilo con chrome://tracing o https://ui.perfetto.dev)")
+
+
+if __name__ == "__main__":
+    main()
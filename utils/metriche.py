@@ -0,0 +1,283 @@
+# Metriche di valutazione calcolate a blocchi, con memoria costante.
+#
+# Gli script calcolano mean_squared_error, r2_score, accuracy_score e confusion_matrix
+# su tutto l'array y_pred: con miliardi di righe (vedi utils/dataset.py) né y_pred né
+# y_vero stanno in memoria. Qui ogni metrica è un piccolo accumulatore:
+#
+# - aggiorna(y_vero, y_pred) consuma un blocco di predizioni e tiene solo pochi numeri
+#   (conteggi, somme, medie), quindi la memoria non dipende dal numero di righe;
+# - unisci(altro) somma due accumulatori calcolati su parti diverse dei dati: ogni
+#   processo valuta le sue righe e alla fine i risultati si combinano.
+#
+# R² richiede la varianza di y_vero. Invece di sommare y e y² (che perde precisione
+# quando la media è grande rispetto alla varianza) ogni accumulatore tiene numero di
+# campioni, media e somma dei quadrati degli scarti dalla media, e le combina con la
+# formula di Chan et al. (la stessa dell'algoritmo di Welford, per gruppi di campioni).
+#
+# Verifica sugli esempi: stessi numeri di scikit-learn, calcolati a blocchi e in parallelo.
+#   python -m utils.metriche
+#   python -m utils.metriche knn mlp --blocco 7 --processi 2
+import argparse
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DIMENSIONE_BLOCCO = 65536 # Righe predette insieme
+
+
+def _unisci_momenti(n_a, media_a, m2_a, n_b, media_b, m2_b):
+    """(n, media, somma dei quadrati degli scarti) di due gruppi di campioni messi insieme."""
+    n = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
+    delta = media_b - media_a
+    media = media_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+    return n, media, m2
+
+
+class ErroreRegressione:
+    """MSE, RMSE, MAE e R² accumulati un blocco di predizioni alla volta.
+
+    Stessi valori di mean_squared_error, mean_absolute_error e r2_score di scikit-learn
+    (a meno degli arrotondamenti dell'ultima cifra) per y monodimensionale.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.media_y = 0.0
+        self.m2_y = 0.0 # Somma dei quadrati degli scarti di y dalla sua media
+        self.sse = 0.0 # Somma dei quadrati dei residui
+        self.sae = 0.0 # Somma dei valori assoluti dei residui
+
+    def aggiorna(self, y_vero, y_pred):
+        y_vero = np.asarray(y_vero, dtype=np.float64).ravel()
+        residui = y_vero - np.asarray(y_pred, dtype=np.float64).ravel()
+        if len(y_vero) == 0:
+            return self
+        media = y_vero.mean()
+        scarti = y_vero - media
+        self.n, self.media_y, self.m2_y = _unisci_momenti(self.n, self.media_y, self.m2_y,
+                                                          len(y_vero), float(media), float(scarti @ scarti))
+        self.sse += float(residui @ residui)
+        self.sae += float(np.abs(residui).sum())
+        return self
+
+    def unisci(self, altro):
+        self.n, self.media_y, self.m2_y = _unisci_momenti(self.n, self.media_y, self.m2_y,
+                                                          altro.n, altro.media_y, altro.m2_y)
+        self.sse += altro.sse
+        self.sae += altro.sae
+        return self
+
+    @property
+    def mse(self):
+        return self.sse / self.n if self.n else float('nan')
+
+    @property
+    def rmse(self):
+        return float(np.sqrt(self.mse))
+
+    @property
+    def mae(self):
+        return self.sae / self.n if self.n else float('nan')
+
+    @property
+    def r2(self):
+        # Come r2_score: con y costante vale 1 se le predizioni sono perfette, altrimenti 0
+        if self.m2_y == 0:
+            return 1.0 if self.sse == 0 else 0.0
+        return 1.0 - self.sse / self.m2_y
+
+    def risultati(self):
+        return {'n_campioni': self.n, 'mse': self.mse, 'rmse': self.rmse, 'mae': self.mae, 'r2': self.r2}
+
+
+class Accuratezza:
+    """Frazione di predizioni corrette, accumulata a blocchi (non serve conoscere le classi)."""
+
+    def __init__(self):
+        self.corrette = 0
+        self.n = 0
+
+    def aggiorna(self, y_vero, y_pred):
+        self.corrette += int(np.count_nonzero(np.asarray(y_vero) == np.asarray(y_pred)))
+        self.n += len(y_vero)
+        return self
+
+    def unisci(self, altra):
+        self.corrette += altra.corrette
+        self.n += altra.n
+        return self
+
+    @property
+    def accuratezza(self):
+        return self.corrette / self.n if self.n else float('nan')
+
+    def risultati(self):
+        return {'n_campioni': self.n, 'accuratezza': self.accuratezza}
+
+
+class MatriceConfusioneIncrementale:
+    """Matrice di confusione aggiornata un blocco di predizioni alla volta.
+
+    Righe: classi vere, colonne: classi predette, nell'ordine di `classi` (ordinate,
+    come confusion_matrix di scikit-learn). Due matrici calcolate su parti diverse dei
+    dati si possono sommare con `unisci`.
+    """
+
+    def __init__(self, classi):
+        self.classi = np.asarray(classi)
+        self.matrice = np.zeros((len(self.classi), len(self.classi)), dtype=np.int64)
+
+    def _indici(self, etichette):
+        etichette = np.asarray(etichette)
+        indici = np.searchsorted(self.classi, etichette)
+        sconosciute = (indici == len(self.classi)) | (self.classi[np.minimum(indici, len(self.classi) - 1)] != etichette)
+        if sconosciute.any():
+            raise ValueError(f"Etichette non presenti in classi: {np.unique(etichette[sconosciute]).tolist()}")
+        return indici
+
+    def aggiorna(self, y_vero, y_pred):
+        n_classi = len(self.classi)
+        vero, pred = self._indici(y_vero), self._indici(y_pred)
+        # Un solo bincount: coppia (vera, predetta) -> casella vera * n_classi + predetta
+        self.matrice += np.bincount(vero * n_classi + pred, minlength=n_classi * n_classi).reshape(n_classi, n_classi)
+        return self
+
+    def unisci(self, altra):
+        if not np.array_equal(self.classi, altra.classi):
+            raise ValueError("Le due matrici di confusione hanno classi diverse")
+        self.matrice += altra.matrice
+        return self
+
+    @property
+    def n_campioni(self):
+        return int(self.matrice.sum())
+
+    @property
+    def accuratezza(self):
+        return float(np.trace(self.matrice) / max(self.n_campioni, 1))
+
+    def risultati(self):
+        return {'n_campioni': self.n_campioni, 'accuratezza': self.accuratezza, 'matrice_confusione': self.matrice}
+
+
+# --- Valutazione di un modello a blocchi, anche su più processi ---
+
+def valuta_a_blocchi(modello, X, y, metriche, scaler=None, dimensione_blocco=DIMENSIONE_BLOCCO,
+                     inizio=0, fine=None):
+    """Predice le righe [inizio, fine) di X a blocchi e aggiorna ogni accumulatore in `metriche`.
+
+    In memoria c'è un solo blocco alla volta: X e y possono essere in memory-map.
+    `scaler` (es. lo StandardScaler dello script) viene applicato ad ogni blocco.
+    """
+    fine = len(X) if fine is None else fine
+    for inizio_blocco in range(inizio, fine, dimensione_blocco):
+        fine_blocco = min(inizio_blocco + dimensione_blocco, fine)
+        X_blocco = X[inizio_blocco:fine_blocco]
+        if scaler is not None:
+            X_blocco = scaler.transform(X_blocco)
+        y_pred = modello.predict(X_blocco)
+        y_blocco = y[inizio_blocco:fine_blocco]
+        for metrica in metriche:
+            metrica.aggiorna(y_blocco, y_pred)
+    return metriche
+
+
+def _valuta_intervallo(intervallo, parametri):
+    """Eseguita in un processo: valuta le righe `intervallo` con copie vuote degli accumulatori."""
+    from utils.validazione import _DATI
+
+    metriche = copy.deepcopy(parametri['metriche'])
+    return valuta_a_blocchi(parametri['modello'], _DATI['X'], _DATI['y'], metriche, parametri['scaler'],
+                            parametri['dimensione_blocco'], *intervallo)
+
+
+def valuta_in_parallelo(modello, X, y, metriche, scaler=None, processi=None, dimensione_blocco=DIMENSIONE_BLOCCO):
+    """Come valuta_a_blocchi, dividendo le righe tra `processi` processi (None = tutti i core).
+
+    `metriche` sono accumulatori vuoti: ogni processo ne riempie una copia con le sue
+    righe, poi vengono uniti in quelli passati, che vengono restituiti. X e y sono
+    condivisi come in utils/validazione.py (memoria condivisa o riapertura del memory-map).
+    """
+    processi = max(1, min(processi or os.cpu_count(), -(-len(X) // dimensione_blocco)))
+    if processi == 1:
+        return valuta_a_blocchi(modello, X, y, metriche, scaler, dimensione_blocco)
+
+    from utils.validazione import _descrivi, _inizializza_processo
+
+    # Intervalli contigui allineati ai blocchi: ogni processo legge una parte del file
+    confini = np.linspace(0, -(-len(X) // dimensione_blocco), processi + 1).astype(int) * dimensione_blocco
+    intervalli = [(int(a), int(min(b, len(X)))) for a, b in zip(confini[:-1], confini[1:]) if a < len(X)]
+    parametri = {'modello': modello, 'metriche': metriche, 'scaler': scaler, 'dimensione_blocco': dimensione_blocco}
+    segmenti, descrittori = [], {}
+    try:
+        for nome, array in (('X', X), ('y', y)):
+            segmento, descrittori[nome] = _descrivi(array)
+            if segmento is not None:
+                segmenti.append(segmento)
+        with ProcessPoolExecutor(max_workers=processi, initializer=_inizializza_processo,
+                                 initargs=(descrittori,)) as pool:
+            for parziali in pool.map(_valuta_intervallo, intervalli, [parametri] * len(intervalli)):
+                for metrica, parziale in zip(metriche, parziali):
+                    metrica.unisci(parziale)
+    finally:
+        for segmento in segmenti:
+            segmento.close()
+            segmento.unlink()
+    return metriche
+
+
+# --- Verifica sugli esempi ---
+
+def confronta_con_script(nome, dimensione_blocco=DIMENSIONE_BLOCCO, processi=None):
+    """Esegue la pipeline `nome` e ricalcola le sue metriche a blocchi sul suo test set.
+
+    Restituisce {metrica: (valore dello script, valore a blocchi)}.
+    """
+    from utils.esegui import esegui_pipeline
+    from utils.misure import Misuratore
+
+    risultati, _ = esegui_pipeline(nome, Misuratore(memoria=False), dimostrazioni=False, silenzioso=True)
+    modello, X_test, y_test = risultati['model'], risultati['X_test'], risultati['y_test']
+    if nome == 'regressione':
+        errore, = valuta_in_parallelo(modello, X_test, y_test, [ErroreRegressione()],
+                                      processi=processi, dimensione_blocco=dimensione_blocco)
+        return {'mse': (risultati['mse'], errore.mse), 'r2': (risultati['r2'], errore.r2)}
+    accuratezza, confusione = valuta_in_parallelo(
+        modello, X_test, y_test, [Accuratezza(), MatriceConfusioneIncrementale(modello.classes_)],
+        scaler=risultati.get('scaler'), processi=processi, dimensione_blocco=dimensione_blocco)
+    return {'accuratezza': (risultati['accuracy'], accuratezza.accuratezza),
+            'matrice_confusione': (risultati['confusion_matrix'], confusione.matrice)}
+
+
+def main():
+    from utils.modelli import SERVIBILI
+
+    parser = argparse.ArgumentParser(description="Metriche a blocchi confrontate con quelle degli script")
+    parser.add_argument("pipeline", nargs='*', help=f"Pipeline da verificare tra {', '.join(SERVIBILI)} (default: tutte)")
+    parser.add_argument("--blocco", type=int, default=16,
+                        help="Righe per blocco (piccolo, per usare davvero molti blocchi sui test set degli esempi)")
+    parser.add_argument("--processi", type=int, default=2, help="Numero di processi (1 = nessun pool)")
+    args = parser.parse_args()
+    sconosciute = set(args.pipeline) - set(SERVIBILI)
+    if sconosciute:
+        parser.error(f"pipeline sconosciute: {', '.join(sorted(sconosciute))}")
+
+    print(f"{'pipeline':<12} {'metrica':<19} {'scikit-learn':>14} {'a blocchi':>14} {'uguali':>7}")
+    for nome in args.pipeline or SERVIBILI:
+        for metrica, (atteso, calcolato) in confronta_con_script(nome, args.blocco, args.processi).items():
+            if metrica == 'matrice_confusione':
+                uguali = np.array_equal(atteso, calcolato)
+                atteso, calcolato = f"somma {int(np.sum(atteso))}", f"somma {int(np.sum(calcolato))}"
+            else:
+                uguali = bool(np.isclose(atteso, calcolato, rtol=1e-12, atol=0))
+                atteso, calcolato = f"{atteso:.10g}", f"{calcolato:.10g}"
+            print(f"{nome:<12} {metrica:<19} {atteso:>14} {calcolato:>14} {'sì' if uguali else 'no':>7}")
+
+
+if __name__ == "__main__":
+    main()
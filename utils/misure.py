@@ -0,0 +1,283 @@
+# Misura del tempo e della memoria di ogni fase di una pipeline.
+#
+# Uso:
+#     misuratore = Misuratore()
+#     with misuratore.fase('fit'):
+#         model.fit(X, y)
+#     print(misuratore.riepilogo())
+#
+# Per ogni fase registriamo:
+# - tempo_s: tempo reale (wall-clock);
+# - cpu_s: tempo di CPU del processo e dei processi figli terminati durante la fase.
+#   Se è più grande di tempo_s la fase ha usato più core (thread BLAS, pool di processi);
+# - picco_memoria_mb: picco di memoria allocata durante la fase (oltre a quella già in
+#   uso), misurato con tracemalloc, che vede anche gli array NumPy;
+# - rss_massimo_mb: picco di memoria residente (RSS) del processo durante la fase,
+#   campionato da un thread ogni pochi millisecondi (su Linux legge /proc/self/statm).
+#   Comprende anche la memoria non vista da tracemalloc (librerie C, BLAS, mmap);
+# - rss_aumento_mb: quanto il picco supera l'RSS all'inizio della fase, cioè la memoria
+#   residente usata dalla fase stessa;
+# - chiamate: quante volte la fase è stata eseguita.
+#
+# Con `profila='fit'` la fase scelta viene anche profilata, con cProfile (ogni chiamata
+# di funzione, preciso ma rallenta il codice Python) o con un profilatore a
+# campionamento (legge lo stack ogni pochi millisecondi, rallenta poco). Le singole
+# esecuzioni delle fasi si possono esportare come Chrome trace (chrome://tracing o
+# https://ui.perfetto.dev) per vedere su una linea temporale dove va il tempo.
+import collections
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+def rss_massimo_mb():
+    """Picco di memoria residente (RSS) del processo dall'avvio, in MB (non diminuisce mai)."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Su Linux ru_maxrss è in KB, su macOS in byte
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def rss_attuale_mb():
+    """Memoria residente (RSS) del processo in questo momento, in MB (None se /proc non esiste)."""
+    try:
+        with open('/proc/self/statm') as f:
+            pagine = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pagine * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+
+class CampionatoreRSS:
+    """Picco di RSS tra avvia() e ferma(): un thread legge l'RSS ogni `intervallo` secondi.
+
+    ru_maxrss è il picco dall'avvio del processo e non scende mai: dopo la prima fase
+    che alloca molta memoria tutte le fasi successive riporterebbero lo stesso valore.
+    Dove /proc/self/statm non esiste (macOS) si usa comunque ru_maxrss.
+    """
+
+    def __init__(self, intervallo=0.005):
+        self.intervallo = intervallo
+        self._ferma = threading.Event()
+        self._thread = None
+
+    def avvia(self):
+        self.iniziale = rss_attuale_mb()
+        self.picco = self.iniziale
+        if self.iniziale is not None:
+            self._ferma.clear()
+            self._thread = threading.Thread(target=self._campiona, daemon=True)
+            self._thread.start()
+
+    def _campiona(self):
+        while not self._ferma.wait(self.intervallo):
+            self.picco = max(self.picco, rss_attuale_mb())
+
+    def ferma(self):
+        """Restituisce (picco durante la fase, aumento rispetto all'inizio) in MB."""
+        if self.iniziale is None:
+            return rss_massimo_mb(), None
+        self._ferma.set()
+        self._thread.join()
+        self.picco = max(self.picco, rss_attuale_mb())
+        return self.picco, self.picco - self.iniziale
+
+
+def _tempo_cpu():
+    """Secondi di CPU (utente + sistema) del processo e dei processi figli già terminati."""
+    processo = resource.getrusage(resource.RUSAGE_SELF)
+    figli = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return processo.ru_utime + processo.ru_stime + figli.ru_utime + figli.ru_stime
+
+
+# --- Profilatori per la fase scelta ---
+
+class ProfilatoreCProfile:
+    """cProfile attivato solo durante la fase scelta (le chiamate ripetute si sommano)."""
+
+    estensione = '.prof'
+
+    def __init__(self):
+        self._profilo = cProfile.Profile()
+
+    def avvia(self):
+        self._profilo.enable()
+
+    def ferma(self):
+        self._profilo.disable()
+
+    def funzioni_piu_costose(self, n=15):
+        """Le `n` funzioni con il tempo cumulativo (incluse le funzioni chiamate) più alto."""
+        statistiche = pstats.Stats(self._profilo, stream=io.StringIO())
+        righe = []
+        for (file, riga, funzione), (_, chiamate, proprio, cumulativo, _) in statistiche.stats.items():
+            righe.append({'funzione': f"{funzione} ({os.path.basename(file)}:{riga})", 'chiamate': chiamate,
+                          'tempo_proprio_s': proprio, 'tempo_cumulativo_s': cumulativo})
+        return sorted(righe, key=lambda r: r['tempo_cumulativo_s'], reverse=True)[:n]
+
+    def salva(self, percorso):
+        """File .prof leggibile con `python -m pstats` o con snakeviz."""
+        self._profilo.dump_stats(percorso)
+
+
+class ProfilatoreCampionamento:
+    """Profilatore a campionamento: un thread legge lo stack del thread misurato ogni `intervallo` secondi.
+
+    Il tempo di una funzione è stimato dal numero di campioni in cui compare. Il codice
+    misurato gira a velocità quasi normale, quindi va bene anche per fasi lunghe su
+    dataset grandi. Le pile vengono salvate nel formato "folded" (una riga
+    `main;fit;_funzione numero_campioni`) letto da flamegraph.pl e da speedscope.
+    """
+
+    estensione = '.folded'
+
+    def __init__(self, intervallo=0.005):
+        self.intervallo = intervallo
+        self.pile = collections.Counter()
+        self._ferma = threading.Event()
+        self._thread = None
+
+    def avvia(self):
+        self._misurato = threading.get_ident()
+        # Frame già attivi all'inizio della fase (runner, main dello script): non li contiamo
+        self._esterni, frame = set(), sys._getframe()
+        while frame is not None:
+            self._esterni.add(id(frame))
+            frame = frame.f_back
+        self._ferma.clear()
+        self._thread = threading.Thread(target=self._campiona, daemon=True)
+        self._thread.start()
+
+    def ferma(self):
+        self._ferma.set()
+        self._thread.join()
+
+    def _campiona(self):
+        while not self._ferma.wait(self.intervallo):
+            frame = sys._current_frames().get(self._misurato)
+            pila = []
+            while frame is not None and id(frame) not in self._esterni:
+                codice = frame.f_code
+                pila.append(f"{codice.co_name} ({os.path.basename(codice.co_filename)}:{codice.co_firstlineno})")
+                frame = frame.f_back
+            if pila:
+                self.pile[';'.join(reversed(pila))] += 1
+
+    def funzioni_piu_costose(self, n=15):
+        """Le `n` funzioni presenti nel maggior numero di campioni (tempo cumulativo stimato)."""
+        cumulativi, propri = collections.Counter(), collections.Counter()
+        for pila, campioni in self.pile.items():
+            funzioni = pila.split(';')
+            for funzione in set(funzioni):
+                cumulativi[funzione] += campioni
+            propri[funzioni[-1]] += campioni
+        return [{'funzione': funzione, 'campioni': campioni,
+                 'tempo_proprio_s': propri[funzione] * self.intervallo,
+                 'tempo_cumulativo_s': campioni * self.intervallo}
+                for funzione, campioni in cumulativi.most_common(n)]
+
+    def salva(self, percorso):
+        with open(percorso, 'w') as f:
+            for pila, campioni in self.pile.most_common():
+                f.write(f"{pila} {campioni}\n")
+
+
+PROFILATORI = {'cprofile': ProfilatoreCProfile, 'campionamento': ProfilatoreCampionamento}
+
+
+class Misuratore:
+    """Raccoglie tempo (wall-clock e CPU), memoria e numero di chiamate per fase.
+
+    Se la stessa fase viene eseguita più volte (es. più grafici), i tempi si sommano,
+    i picchi di memoria sono il massimo e `chiamate` conta le esecuzioni.
+    Le fasi non vanno annidate: il picco di tracemalloc è unico per tutto il processo.
+
+    - profila: nome della fase da profilare (None = nessuna).
+    - profilatore: 'cprofile' o 'campionamento'.
+    """
+
+    def __init__(self, memoria=True, profila=None, profilatore='cprofile'):
+        self.memoria = memoria
+        self.fasi = {}
+        self.eventi = [] # (nome, inizio, durata, cpu) di ogni esecuzione, per il Chrome trace
+        self.profila = profila
+        self.profilatore = PROFILATORI[profilatore]() if profila is not None else None
+
+    @contextmanager
+    def fase(self, nome):
+        avviato_qui = self.memoria and not tracemalloc.is_tracing()
+        if avviato_qui:
+            tracemalloc.start()
+        if self.memoria:
+            tracemalloc.reset_peak()
+            in_uso = tracemalloc.get_traced_memory()[0]
+        profilata = nome == self.profila
+        if profilata:
+            self.profilatore.avvia()
+        rss = CampionatoreRSS()
+        rss.avvia()
+        cpu = _tempo_cpu()
+        inizio = time.perf_counter()
+        try:
+            yield nome
+        finally:
+            durata = time.perf_counter() - inizio
+            cpu = _tempo_cpu() - cpu
+            picco_rss, aumento_rss = rss.ferma()
+            if profilata:
+                self.profilatore.ferma()
+            picco = (tracemalloc.get_traced_memory()[1] - in_uso) / 2**20 if self.memoria else None
+            if avviato_qui:
+                tracemalloc.stop()
+            self.eventi.append((nome, inizio, durata, cpu))
+            self._registra(nome, durata, cpu, picco, picco_rss, aumento_rss)
+
+    def _registra(self, nome, durata, cpu, picco, picco_rss, aumento_rss):
+        voce = self.fasi.setdefault(nome, {'tempo_s': 0.0, 'cpu_s': 0.0, 'picco_memoria_mb': None,
+                                           'rss_massimo_mb': 0.0, 'rss_aumento_mb': None, 'chiamate': 0})
+        voce['tempo_s'] += durata
+        voce['cpu_s'] += cpu
+        voce['chiamate'] += 1
+        voce['rss_massimo_mb'] = max(voce['rss_massimo_mb'], picco_rss)
+        if aumento_rss is not None:
+            voce['rss_aumento_mb'] = max(voce['rss_aumento_mb'] or 0.0, aumento_rss)
+        if picco is not None:
+            voce['picco_memoria_mb'] = max(voce['picco_memoria_mb'] or 0.0, picco)
+
+    def riepilogo(self):
+        """Dizionario serializzabile in JSON con le misure di tutte le fasi."""
+        riepilogo = {
+            'fasi': {nome: dict(voce) for nome, voce in self.fasi.items()},
+            'tempo_totale_s': sum(voce['tempo_s'] for voce in self.fasi.values()),
+            'cpu_totale_s': sum(voce['cpu_s'] for voce in self.fasi.values()),
+        }
+        if self.profilatore is not None and self.profila in self.fasi:
+            riepilogo['profilo'] = {'fase': self.profila, 'profilatore': type(self.profilatore).__name__,
+                                    'funzioni': self.profilatore.funzioni_piu_costose()}
+        return riepilogo
+
+
+def salva_chrome_trace(percorso, misuratori):
+    """Salva le fasi di più misuratori ({nome: Misuratore}) nel formato Chrome trace (JSON).
+
+    Ogni misuratore (ad es. una pipeline) è una riga della linea temporale; ogni
+    esecuzione di una fase è un rettangolo con la sua durata, e il tempo di CPU compare
+    tra i dettagli. Il file si apre con chrome://tracing o https://ui.perfetto.dev.
+    """
+    origine = min((inizio for m in misuratori.values() for _, inizio, _, _ in m.eventi), default=0.0)
+    eventi = []
+    for riga, (nome_riga, misuratore) in enumerate(misuratori.items(), start=1):
+        eventi.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': riga,
+                       'args': {'name': nome_riga}})
+        for nome, inizio, durata, cpu in misuratore.eventi:
+            eventi.append({'name': nome, 'cat': nome_riga, 'ph': 'X', 'pid': os.getpid(), 'tid': riga,
+                           'ts': (inizio - origine) * 1e6, 'dur': durata * 1e6, 'args': {'cpu_s': round(cpu, 6)}})
+    with open(percorso, 'w') as f:
+        json.dump({'traceEvents': eventi, 'displayTimeUnit': 'ms'}, f)
@@ -0,0 +1,202 @@
+# Salvataggio e caricamento dei modelli addestrati dagli esempi.
+#
+# Gli script addestrano il modello, fanno le loro predizioni e poi terminano: il modello
+# (e lo StandardScaler) vanno persi. Qui addestriamo le pipeline una volta e salviamo
+# ogni coppia (scaler, modello) su disco, così un altro processo (ad es. il servizio di
+# inferenza utils/servizio.py) può caricarla senza riaddestrare.
+#
+# Formato: una cartella per modello con un meta.json (tipo e parametri) e un file .npy
+# per ogni array che serve a predire (vedi utils/predittori.py): la matrice di training
+# per KNN, gli array dei nodi per l'albero, coefs_/intercepts_ per l'MLP. Al caricamento
+# gli array vengono aperti in memory-map e scikit-learn non viene importato: l'avvio
+# richiede millisecondi invece di un import di scikit-learn più un riaddestramento.
+#
+# Esempio (dalla cartella principale del progetto):
+#   python -m utils.modelli                      # addestra e salva regressione, knn, albero, mlp
+#   python -m utils.modelli knn mlp --cartella modelli/
+#   python -m utils.modelli --misura-avvio       # tempo di caricamento in un processo nuovo
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from utils.predittori import AlberoCompatto, KNNCompatto, MLPCompatto, RegressioneCompatta, ScalerCompatto
+
+VERSIONE_FORMATO = 1
+
+# Pipeline supervisionate che ha senso servire (K-Means non ha un target da predire)
+SERVIBILI = ('regressione', 'knn', 'albero', 'mlp')
+
+
+def addestra_pipeline(nome, dati=None):
+    """Esegue la pipeline `nome` senza grafici né output e restituisce (scaler, modello).
+
+    Lo scaler è None per le pipeline che non standardizzano le features (regressione, albero).
+    """
+    from utils.esegui import esegui_pipeline # Importa gli script (e scikit-learn) solo se serve
+    from utils.misure import Misuratore
+
+    risultati, _ = esegui_pipeline(nome, Misuratore(memoria=False), dimostrazioni=False,
+                                   silenzioso=True, dati=dati)
+    return risultati.get('scaler'), risultati['model']
+
+
+# --- Esportazione: da oggetto addestrato a (tipo, parametri, array) ---
+
+def _esporta(oggetto):
+    """Riconosce il modello dagli attributi (come fa scikit-learn) ed estrae gli array necessari."""
+    if hasattr(oggetto, 'tree_'): # DecisionTreeClassifier
+        albero = oggetto.tree_
+        array = {'children_left': albero.children_left, 'children_right': albero.children_right,
+                 'feature': albero.feature, 'threshold': albero.threshold,
+                 'value': albero.value[:, 0, :], 'classes_': oggetto.classes_}
+        return 'albero', {'n_features_in_': int(oggetto.n_features_in_), 'input_float32': True}, array
+    if hasattr(oggetto, 'children_left'): # AlberoIstogrammi (stessi array, confronti in float64)
+        array = {nome: getattr(oggetto, nome) for nome in
+                 ('children_left', 'children_right', 'feature', 'threshold', 'value', 'classes_')}
+        return 'albero', {'n_features_in_': int(oggetto.n_features_in_), 'input_float32': False}, array
+    if hasattr(oggetto, 'coefs_'): # MLPClassifier
+        array = {f'coefs_{i}': W for i, W in enumerate(oggetto.coefs_)}
+        array.update({f'intercepts_{i}': b for i, b in enumerate(oggetto.intercepts_)})
+        array['classes_'] = oggetto.classes_
+        parametri = {'n_layers': len(oggetto.coefs_), 'activation': oggetto.activation,
+                     'out_activation_': oggetto.out_activation_}
+        return 'mlp', parametri, array
+    if hasattr(oggetto, '_fit_X'): # KNeighborsClassifier
+        if oggetto.weights != 'uniform' or oggetto.effective_metric_ != 'euclidean':
+            raise ValueError("Formato compatto disponibile solo per KNN con voto uniforme e distanza euclidea")
+        array = {'X_train': oggetto._fit_X, 'y_codificato': oggetto._y, 'classes_': oggetto.classes_}
+        return 'knn', {'n_neighbors': int(oggetto.n_neighbors)}, array
+    if hasattr(oggetto, 'coef_'): # LinearRegression, RegressioneLineareStreaming
+        return 'regressione', {'intercept_': float(oggetto.intercept_)}, {'coef_': np.ravel(oggetto.coef_)}
+    if hasattr(oggetto, 'mean_') and hasattr(oggetto, 'scale_'): # StandardScaler
+        n = oggetto.n_features_in_
+        mean = oggetto.mean_ if oggetto.mean_ is not None else np.zeros(n)
+        scale = oggetto.scale_ if oggetto.scale_ is not None else np.ones(n)
+        return 'scaler', {}, {'mean_': mean, 'scale_': scale}
+    raise TypeError(f"Formato compatto non disponibile per {type(oggetto).__name__}")
+
+
+def _costruisci(tipo, parametri, array):
+    """Operazione inversa di _esporta: crea il predittore compatto."""
+    if tipo == 'scaler':
+        return ScalerCompatto(array['mean_'], array['scale_'])
+    if tipo == 'regressione':
+        return RegressioneCompatta(array['coef_'], parametri['intercept_'])
+    if tipo == 'knn':
+        return KNNCompatto(array['X_train'], array['y_codificato'], array['classes_'], parametri['n_neighbors'])
+    if tipo == 'albero':
+        return AlberoCompatto(array['children_left'], array['children_right'], array['feature'],
+                              array['threshold'], array['value'], array['classes_'],
+                              parametri['n_features_in_'], parametri['input_float32'])
+    if tipo == 'mlp':
+        n = parametri['n_layers']
+        return MLPCompatto([array[f'coefs_{i}'] for i in range(n)], [array[f'intercepts_{i}'] for i in range(n)],
+                           array['classes_'], parametri['activation'], parametri['out_activation_'])
+    raise ValueError(f"Tipo di modello sconosciuto: {tipo!r}")
+
+
+# --- Salvataggio e caricamento ---
+
+def salva_modello(percorso, scaler, model):
+    """Salva la coppia (scaler, modello) nella cartella `percorso` in formato compatto."""
+    os.makedirs(percorso, exist_ok=True)
+    meta = {'versione_formato': VERSIONE_FORMATO, 'componenti': {}}
+    for ruolo, oggetto in (('scaler', scaler), ('model', model)):
+        if oggetto is None:
+            continue
+        tipo, parametri, array = _esporta(oggetto)
+        for nome, valori in array.items():
+            np.save(os.path.join(percorso, f"{ruolo}.{nome}.npy"), np.ascontiguousarray(valori))
+        meta['componenti'][ruolo] = {'tipo': tipo, 'parametri': parametri, 'array': list(array)}
+    # meta.json per ultimo: se manca, il salvataggio non è stato completato
+    with open(os.path.join(percorso, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def carica_modello(percorso, mmap=True):
+    """Carica una coppia (scaler, modello) salvata con salva_modello.
+
+    Restituisce predittori compatti (utils/predittori.py) con transform/predict come in
+    scikit-learn; con mmap=True gli array vengono letti dal disco solo quando servono.
+    """
+    with open(os.path.join(percorso, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('versione_formato') != VERSIONE_FORMATO:
+        raise ValueError(f"Versione del formato non supportata in {percorso}: {meta.get('versione_formato')}")
+    componenti = {}
+    for ruolo, voce in meta['componenti'].items():
+        array = {nome: np.load(os.path.join(percorso, f"{ruolo}.{nome}.npy"), mmap_mode='r' if mmap else None)
+                 for nome in voce['array']}
+        componenti[ruolo] = _costruisci(voce['tipo'], voce['parametri'], array)
+    return componenti.get('scaler'), componenti['model']
+
+
+def percorso_modello(cartella, nome):
+    return os.path.join(cartella, nome)
+
+
+def salva_modelli(cartella='modelli', nomi=SERVIBILI, verbose=True):
+    """Addestra e salva le pipeline `nomi`; restituisce {nome: cartella del modello}."""
+    percorsi = {}
+    for nome in nomi:
+        inizio = time.perf_counter()
+        scaler, model = addestra_pipeline(nome)
+        durata = time.perf_counter() - inizio
+        percorsi[nome] = percorso_modello(cartella, nome)
+        salva_modello(percorsi[nome], scaler, model)
+        if verbose:
+            dimensione = sum(os.path.getsize(os.path.join(percorsi[nome], f)) for f in os.listdir(percorsi[nome]))
+            print(f"Salvato {nome}: {percorsi[nome]} ({dimensione / 1024:.1f} KB, addestramento {durata:.2f} s)")
+    return percorsi
+
+
+def carica_modelli(cartella='modelli', nomi=SERVIBILI, mmap=True):
+    """Carica i modelli salvati in `cartella`: {nome: (scaler, modello)}."""
+    return {nome: carica_modello(percorso_modello(cartella, nome), mmap=mmap) for nome in nomi
+            if os.path.exists(os.path.join(percorso_modello(cartella, nome), 'meta.json'))}
+
+
+def misura_avvio(cartella='modelli', nomi=SERVIBILI):
+    """Tempo per importare questo modulo e caricare i modelli in un interprete Python nuovo."""
+    codice = (
+        "import json, sys, time\n"
+        "inizio = time.perf_counter()\n"
+        "from utils.modelli import carica_modelli\n"
+        f"modelli = carica_modelli({cartella!r}, {tuple(nomi)!r})\n"
+        "print(json.dumps({'caricamento_ms': (time.perf_counter() - inizio) * 1000,\n"
+        "                  'modelli': list(modelli), 'sklearn_importato': 'sklearn' in sys.modules}))\n"
+    )
+    cartella_progetto = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', codice], cwd=cartella_progetto, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Addestra le pipeline e salva scaler e modelli su disco")
+    parser.add_argument("pipeline", nargs='*',
+                        help=f"Pipeline da salvare tra {', '.join(SERVIBILI)} (default: tutte)")
+    parser.add_argument("--cartella", default='modelli', help="Cartella in cui salvare i modelli")
+    parser.add_argument("--misura-avvio", action='store_true',
+                        help="Non addestra: misura il caricamento dei modelli già salvati in un processo nuovo")
+    args = parser.parse_args()
+    sconosciute = set(args.pipeline) - set(SERVIBILI)
+    if sconosciute:
+        parser.error(f"pipeline non servibili: {', '.join(sorted(sconosciute))}")
+    nomi = args.pipeline or SERVIBILI
+
+    if args.misura_avvio:
+        risultato = misura_avvio(os.path.abspath(args.cartella), nomi)
+        print(f"Caricati {', '.join(risultato['modelli']) or 'nessun modello'} in {risultato['caricamento_ms']:.1f} ms "
+              f"(scikit-learn importato: {'sì' if risultato['sklearn_importato'] else 'no'})")
+        return
+    salva_modelli(args.cartella, nomi)
+
+
+if __name__ == "__main__":
+    main()
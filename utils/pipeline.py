@@ -0,0 +1,49 @@
+# Caricamento degli script di esempio come moduli Python.
+#
+# Le cartelle degli esempi iniziano con un numero (es. 02_K_Nearest_Neighbors) e quindi
+# non sono importabili con un normale `import`: carichiamo ogni script dal suo percorso.
+# Ogni script espone una funzione main(fase, disegna, mostra_grafico, dimostrazioni).
+import importlib.util
+import os
+import sys
+
+CARTELLA_PROGETTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Nome breve della pipeline -> (cartella, nome dello script senza .py)
+PIPELINE = {
+    'regressione': ('01_Regressione_Lineare', 'regressione_lineare'),
+    'knn': ('02_K_Nearest_Neighbors', 'k_nearest_neighbors'),
+    'kmeans': ('03_K_Means_Clustering', 'kmeans_clustering'),
+    'albero': ('04_Alberi_Decisionali', 'alberi_decisionali'),
+    'mlp': ('05_Rete_Neurale_Semplice', 'rete_neurale_mlp'),
+}
+
+
+def cartella_pipeline(nome):
+    """Percorso assoluto della cartella dell'esempio `nome`."""
+    if nome not in PIPELINE:
+        raise ValueError(f"Pipeline sconosciuta: {nome!r} (disponibili: {', '.join(PIPELINE)})")
+    return os.path.join(CARTELLA_PROGETTO, PIPELINE[nome][0])
+
+
+def importa_modulo(nome, modulo):
+    """Importa `modulo` (es. 'indici_vicini') dalla cartella della pipeline `nome`.
+
+    La cartella viene aggiunta a sys.path, così gli import tra file della stessa
+    cartella funzionano come quando lo script viene eseguito direttamente.
+    """
+    cartella = cartella_pipeline(nome)
+    if cartella not in sys.path:
+        sys.path.insert(0, cartella)
+    if modulo in sys.modules:
+        return sys.modules[modulo]
+    spec = importlib.util.spec_from_file_location(modulo, os.path.join(cartella, modulo + '.py'))
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[modulo] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def carica_pipeline(nome):
+    """Importa lo script principale della pipeline `nome` senza eseguirne il main()."""
+    return importa_modulo(nome, PIPELINE[nome][1] if nome in PIPELINE else nome)
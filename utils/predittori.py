@@ -0,0 +1,162 @@
+# Predittori compatti: solo NumPy, niente scikit-learn.
+#
+# Per fare predizioni non serve l'intero oggetto di scikit-learn, bastano pochi array:
+# - StandardScaler: media e deviazione standard di ogni feature;
+# - LinearRegression: coefficienti e intercetta;
+# - KNeighborsClassifier: la matrice di training e le etichette (KNN non "impara" altro);
+# - DecisionTreeClassifier: gli array piatti dei nodi (figli, feature, soglia, valori);
+# - MLPClassifier: le matrici dei pesi `coefs_` e i bias `intercepts_`.
+#
+# Le classi qui sotto ricevono questi array (anche in memory-map, vedi utils/modelli.py)
+# e implementano transform/predict con le stesse regole di scikit-learn. Importare questo
+# modulo costa pochi millisecondi, contro le centinaia di un import di scikit-learn.
+import numpy as np
+
+FOGLIA = -1 # Valore dei figli di una foglia, come TREE_LEAF di scikit-learn
+
+
+class ScalerCompatto:
+    """Equivalente di StandardScaler.transform: (X - mean_) / scale_."""
+
+    def __init__(self, mean_, scale_):
+        self.mean_ = mean_
+        self.scale_ = scale_
+        self.n_features_in_ = len(mean_)
+
+    def transform(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+class RegressioneCompatta:
+    """Modello lineare: X @ coef_ + intercept_."""
+
+    def __init__(self, coef_, intercept_):
+        self.coef_ = coef_
+        self.intercept_ = float(intercept_)
+        self.n_features_in_ = len(coef_)
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
+
+
+class KNNCompatto:
+    """KNN con ricerca esatta a forza bruta (distanza euclidea, voto uniforme).
+
+    `y_codificato` contiene gli indici delle classi in `classes_` (come `_y` in scikit-learn).
+    A parità di voti vince la classe con indice più basso, come in KNeighborsClassifier.
+    """
+
+    def __init__(self, X_train, y_codificato, classes_, n_neighbors=5, dimensione_blocco=1024):
+        self.X_train = X_train
+        self.y_codificato = y_codificato
+        self.classes_ = classes_
+        self.n_neighbors = n_neighbors
+        self.dimensione_blocco = dimensione_blocco
+        self.n_features_in_ = X_train.shape[1]
+        self._norme_train = None # Calcolate alla prima predizione: il caricamento resta immediato
+
+    def kneighbors(self, X):
+        """Indici dei k vicini di ogni riga di X (non ordinati per distanza)."""
+        X = np.asarray(X, dtype=np.float64)
+        if self._norme_train is None:
+            self._norme_train = np.einsum('ij,ij->i', self.X_train, self.X_train)
+        k = self.n_neighbors
+        vicini = np.empty((X.shape[0], k), dtype=np.intp)
+        # A blocchi di righe, per non creare una matrice di distanze n_query x n_train enorme
+        for inizio in range(0, X.shape[0], self.dimensione_blocco):
+            blocco = X[inizio:inizio + self.dimensione_blocco]
+            # ||x||² è uguale per tutti i punti di training: non serve per trovare i vicini
+            distanze = self._norme_train - 2 * (blocco @ self.X_train.T)
+            vicini[inizio:inizio + len(blocco)] = np.argpartition(distanze, k - 1, axis=1)[:, :k]
+        return vicini
+
+    def predict(self, X):
+        etichette = self.y_codificato[self.kneighbors(X)]
+        n, n_classi = etichette.shape[0], len(self.classes_)
+        # Voti di tutte le righe con un solo bincount: riga i, classe c -> casella i * n_classi + c
+        caselle = (np.arange(n)[:, None] * n_classi + etichette).ravel()
+        voti = np.bincount(caselle, minlength=n * n_classi).reshape(n, n_classi)
+        return self.classes_[voti.argmax(axis=1)]
+
+
+class AlberoCompatto:
+    """Albero decisionale rappresentato da array piatti (uno per attributo dei nodi).
+
+    - value: conteggi (o frazioni) per classe di ogni nodo, forma (n_nodi, n_classi).
+    - input_float32: DecisionTreeClassifier confronta le features convertite in float32;
+      per ottenere esattamente le stesse divisioni facciamo lo stesso.
+    """
+
+    def __init__(self, children_left, children_right, feature, threshold, value, classes_,
+                 n_features_in_, input_float32=True):
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.classes_ = classes_
+        self.input_float32 = input_float32
+        self.n_features_in_ = n_features_in_
+
+    def apply(self, X):
+        """Foglia raggiunta da ogni riga: tutte le righe scendono insieme, un livello alla volta."""
+        X = np.asarray(X, dtype=np.float32 if self.input_float32 else np.float64)
+        nodi = np.zeros(X.shape[0], dtype=np.intp)
+        righe = np.arange(X.shape[0])
+        while len(righe):
+            n = nodi[righe]
+            interni = self.children_left[n] != FOGLIA
+            righe, n = righe[interni], n[interni]
+            a_sinistra = X[righe, self.feature[n]] <= self.threshold[n]
+            nodi[righe] = np.where(a_sinistra, self.children_left[n], self.children_right[n])
+        return nodi
+
+    def predict_proba(self, X):
+        valori = self.value[self.apply(X)]
+        return valori / valori.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[self.value[self.apply(X)].argmax(axis=1)]
+
+
+_ATTIVAZIONI = {
+    'identity': lambda z: z,
+    'relu': lambda z: np.maximum(z, 0, out=z),
+    'tanh': lambda z: np.tanh(z, out=z),
+    'logistic': lambda z: np.divide(1, 1 + np.exp(-z, out=z), out=z),
+}
+
+
+class MLPCompatto:
+    """Passaggio in avanti di un MLPClassifier a partire da coefs_ e intercepts_."""
+
+    def __init__(self, coefs_, intercepts_, classes_, activation='relu', out_activation_='softmax'):
+        self.coefs_ = coefs_
+        self.intercepts_ = intercepts_
+        self.classes_ = classes_
+        self.activation = activation
+        self.out_activation_ = out_activation_
+        self.n_features_in_ = coefs_[0].shape[0]
+
+    def _uscita(self, X):
+        a = np.asarray(X, dtype=np.float64)
+        for i, (W, b) in enumerate(zip(self.coefs_, self.intercepts_)):
+            a = a @ W + b
+            if i < len(self.coefs_) - 1:
+                a = _ATTIVAZIONI[self.activation](a)
+        return a # Prima dell'attivazione di uscita: argmax e soglia non ne hanno bisogno
+
+    def predict_proba(self, X):
+        z = self._uscita(X)
+        if self.out_activation_ == 'logistic': # Classificazione binaria: una sola uscita
+            p = 1 / (1 + np.exp(-z))
+            return np.hstack([1 - p, p])
+        z -= z.max(axis=1, keepdims=True)
+        np.exp(z, out=z)
+        return z / z.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        z = self._uscita(X)
+        if self.out_activation_ == 'logistic':
+            return self.classes_[(z[:, 0] > 0).astype(np.intp)] # sigmoid(z) > 0.5  <=>  z > 0
+        return self.classes_[z.argmax(axis=1)]
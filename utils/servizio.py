@@ -0,0 +1,289 @@
+# Servizio di inferenza locale con micro-batching.
+#
+# Una chiamata a model.predict() ha un costo fisso (controlli sull'input, conversioni,
+# chiamate a BLAS) che con una sola riga domina il tempo totale. Se arrivano molte
+# richieste contemporaneamente conviene raggrupparle: il servizio mette in coda le
+# richieste di ogni modello e, appena la più vecchia ha atteso `scadenza_ms` oppure la
+# coda ha raggiunto `max_batch` righe, esegue UNA sola scaler.transform + model.predict
+# vettorizzata su tutte e restituisce a ognuna la sua parte del risultato.
+#
+# Il servizio gira su asyncio: le predizioni vengono eseguite in un thread separato,
+# così nel frattempo il ciclo degli eventi continua a ricevere nuove richieste.
+#
+# Esempi (dalla cartella principale del progetto, dopo `python -m utils.modelli`):
+#   python -m utils.servizio --porta 8765          # server TCP, una richiesta JSON per riga
+#   python -m utils.servizio --benchmark            # p50/p99 e throughput con e senza batching
+#
+# Protocollo del server: ogni riga è un oggetto JSON {"modello": "knn", "x": [...], "id": 1}
+# dove "x" è una riga di features oppure una lista di righe; la risposta è
+# {"y": ..., "id": 1} oppure {"errore": "...", "id": 1}.
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.modelli import SERVIBILI, carica_modelli
+
+
+class MicroBatcher:
+    """Raggruppa le richieste concorrenti a un modello in predizioni vettorizzate.
+
+    - max_batch: numero massimo di righe per chiamata a predict (1 = nessun batching).
+    - scadenza_ms: attesa massima della richiesta più vecchia prima di eseguire il batch.
+    """
+
+    def __init__(self, model, scaler=None, max_batch=256, scadenza_ms=2.0):
+        self.model = model
+        self.scaler = scaler
+        self.max_batch = max_batch
+        self.scadenza_ms = scadenza_ms
+        self.latenze_ms = [] # Una voce per richiesta: dall'invio alla risposta
+        self.dimensioni_batch = []
+        self._coda = None
+        self._ciclo = None
+        self._esecutore = None
+        self._in_corso = [] # Richieste dell'ultimo batch raccolto (annullate se il servizio viene chiuso)
+
+    def avvia(self):
+        """Avvia il ciclo di raccolta dei batch (va chiamato dentro un ciclo asyncio)."""
+        self._coda = asyncio.Queue()
+        self._esecutore = ThreadPoolExecutor(max_workers=1)
+        self._ciclo = asyncio.get_running_loop().create_task(self._raccogli_batch())
+        return self
+
+    async def chiudi(self):
+        """Ferma il ciclo; le richieste ancora in coda o nel batch in corso ricevono un errore."""
+        self._ciclo.cancel()
+        try:
+            await self._ciclo
+        except asyncio.CancelledError:
+            pass
+        self._esecutore.shutdown()
+        richieste = list(self._in_corso)
+        while not self._coda.empty():
+            richieste.append(self._coda.get_nowait())
+        for _, futuro, _ in richieste:
+            if not futuro.done():
+                futuro.set_exception(RuntimeError("Servizio chiuso prima della risposta"))
+        self._in_corso = []
+
+    async def predici(self, x):
+        """Predizione per una riga di features (1D) o per alcune righe (2D)."""
+        inizio = time.perf_counter()
+        x = np.asarray(x, dtype=np.float64)
+        una_riga = x.ndim == 1
+        # Una riga di lunghezza sbagliata farebbe fallire l'intero batch: la rifiutiamo subito
+        n_features = getattr(self.model, 'n_features_in_', None)
+        if x.ndim not in (1, 2) or (n_features is not None and x.shape[-1] != n_features):
+            raise ValueError(f"Attese righe con {n_features} features, ricevuto un array di forma {x.shape}")
+        futuro = asyncio.get_running_loop().create_future()
+        await self._coda.put((np.atleast_2d(x), futuro, time.perf_counter()))
+        y = await futuro
+        self.latenze_ms.append((time.perf_counter() - inizio) * 1000)
+        return y[0] if una_riga else y
+
+    def _predici_batch(self, X):
+        if self.scaler is not None:
+            X = self.scaler.transform(X)
+        return self.model.predict(X)
+
+    async def _raccogli_batch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            richieste = [await self._coda.get()]
+            # La scadenza parte da quando la richiesta più vecchia è entrata in coda: se ha già
+            # atteso mentre veniva eseguito il batch precedente, il suo batch parte subito
+            scadenza = richieste[0][2] + self.scadenza_ms / 1000
+            righe = len(richieste[0][0])
+            while righe < self.max_batch:
+                # Prima prendiamo ciò che è già in coda, poi attendiamo fino alla scadenza
+                if self._coda.empty():
+                    attesa = scadenza - time.perf_counter()
+                    if attesa <= 0:
+                        break
+                    try:
+                        richiesta = await asyncio.wait_for(self._coda.get(), attesa)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    richiesta = self._coda.get_nowait()
+                richieste.append(richiesta)
+                righe += len(richiesta[0])
+
+            self._in_corso = richieste
+            try:
+                # Anche la concatenazione può fallire: l'errore va solo alle richieste di questo batch
+                X = np.concatenate([x for x, _, _ in richieste]) if len(richieste) > 1 else richieste[0][0]
+                self.dimensioni_batch.append(len(X))
+                y = await loop.run_in_executor(self._esecutore, self._predici_batch, X)
+            except Exception as errore:
+                for _, futuro, _ in richieste:
+                    if not futuro.done():
+                        futuro.set_exception(errore)
+                continue
+            inizio = 0
+            for x, futuro, _ in richieste:
+                if not futuro.done(): # Il client potrebbe aver annullato la richiesta
+                    futuro.set_result(y[inizio:inizio + len(x)])
+                inizio += len(x)
+
+
+def statistiche_latenza(latenze_ms, durata_s, dimensioni_batch):
+    """Riassunto di un insieme di richieste: percentili di latenza, throughput, batch medio."""
+    latenze = np.asarray(latenze_ms)
+    return {
+        'richieste': len(latenze),
+        'latenza_p50_ms': float(np.percentile(latenze, 50)) if len(latenze) else None,
+        'latenza_p99_ms': float(np.percentile(latenze, 99)) if len(latenze) else None,
+        'throughput_rps': len(latenze) / durata_s if durata_s > 0 else None,
+        'batch_medio': float(np.mean(dimensioni_batch)) if dimensioni_batch else None,
+    }
+
+
+class ServizioInferenza:
+    """Un MicroBatcher per ogni modello caricato; le richieste si indirizzano per nome.
+
+    `modelli` è un dizionario {nome: (scaler, modello)}, come quello di carica_modelli.
+    """
+
+    def __init__(self, modelli, max_batch=256, scadenza_ms=2.0):
+        self.batcher = {nome: MicroBatcher(model, scaler, max_batch=max_batch, scadenza_ms=scadenza_ms)
+                        for nome, (scaler, model) in modelli.items()}
+        self._inizio = None
+
+    async def __aenter__(self):
+        for batcher in self.batcher.values():
+            batcher.avvia()
+        self._inizio = time.perf_counter()
+        return self
+
+    async def __aexit__(self, *eccezione):
+        for batcher in self.batcher.values():
+            await batcher.chiudi()
+
+    async def predici(self, nome, x):
+        if nome not in self.batcher:
+            raise KeyError(f"Modello non disponibile: {nome!r} (disponibili: {', '.join(self.batcher)})")
+        return await self.batcher[nome].predici(x)
+
+    def statistiche(self):
+        """Statistiche per modello dall'avvio del servizio."""
+        durata = time.perf_counter() - self._inizio
+        return {nome: statistiche_latenza(b.latenze_ms, durata, b.dimensioni_batch)
+                for nome, b in self.batcher.items()}
+
+
+# --- Server TCP (una richiesta JSON per riga) ---
+
+async def _gestisci_richiesta(servizio, riga, writer):
+    risposta = {}
+    try:
+        richiesta = json.loads(riga)
+        if 'id' in richiesta:
+            risposta['id'] = richiesta['id']
+        y = await servizio.predici(richiesta['modello'], richiesta['x'])
+        risposta['y'] = np.asarray(y).tolist()
+    except Exception as errore:
+        risposta['errore'] = f"{type(errore).__name__}: {errore}"
+    writer.write((json.dumps(risposta) + "\n").encode())
+    await writer.drain() # Se il client legge lentamente aspettiamo invece di accumulare risposte in memoria
+
+
+async def _gestisci_connessione(servizio, reader, writer):
+    # Ogni riga diventa un task: le richieste di una connessione finiscono nello stesso
+    # batch delle altre. Le risposte possono arrivare in ordine diverso (usa "id").
+    richieste = set()
+    try:
+        while riga := await reader.readline():
+            task = asyncio.create_task(_gestisci_richiesta(servizio, riga, writer))
+            richieste.add(task)
+            task.add_done_callback(richieste.discard)
+        if richieste:
+            await asyncio.gather(*richieste)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def avvia_server(modelli, host='127.0.0.1', porta=8765, max_batch=256, scadenza_ms=2.0):
+    """Avvia il server TCP e resta in ascolto finché il processo non viene interrotto."""
+    async with ServizioInferenza(modelli, max_batch=max_batch, scadenza_ms=scadenza_ms) as servizio:
+        server = await asyncio.start_server(
+            lambda reader, writer: _gestisci_connessione(servizio, reader, writer), host, porta)
+        print(f"Servizio di inferenza in ascolto su {host}:{porta} (modelli: {', '.join(servizio.batcher)})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            print(json.dumps(servizio.statistiche(), indent=2))
+
+
+# --- Benchmark: molti client concorrenti nello stesso processo ---
+
+async def benchmark(modelli, n_richieste=5000, concorrenza=64, max_batch=256, scadenza_ms=2.0, seed=42):
+    """Invia `n_richieste` richieste di una riga per modello da `concorrenza` client.
+
+    Le righe sono casuali (la forma è quella attesa dal modello): misuriamo il costo
+    del servizio, non la qualità delle predizioni.
+    """
+    rng = np.random.default_rng(seed)
+    risultati = {}
+    async with ServizioInferenza(modelli, max_batch=max_batch, scadenza_ms=scadenza_ms) as servizio:
+        for nome, (scaler, model) in modelli.items():
+            X = rng.standard_normal((n_richieste, model.n_features_in_))
+            if scaler is not None: # Riportiamo le righe nella scala dei dati originali
+                X = X * scaler.scale_ + scaler.mean_
+            indici = iter(range(n_richieste))
+
+            async def client():
+                for i in indici:
+                    await servizio.predici(nome, X[i])
+
+            batcher = servizio.batcher[nome]
+            inizio = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(concorrenza)))
+            risultati[nome] = statistiche_latenza(batcher.latenze_ms, time.perf_counter() - inizio,
+                                                  batcher.dimensioni_batch)
+    return risultati
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servizio di inferenza con micro-batching per i modelli salvati")
+    parser.add_argument("--modelli", default='modelli', help="Cartella creata con 'python -m utils.modelli'")
+    parser.add_argument("--pipeline", nargs='+', choices=list(SERVIBILI), default=list(SERVIBILI))
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=256, help="Righe massime per chiamata a predict")
+    parser.add_argument("--scadenza-ms", type=float, default=2.0,
+                        help="Attesa massima di una richiesta prima che il suo batch venga eseguito")
+    parser.add_argument("--benchmark", action='store_true',
+                        help="Misura latenza e throughput con e senza batching invece di avviare il server")
+    parser.add_argument("--richieste", type=int, default=5000, help="Richieste per modello nel benchmark")
+    parser.add_argument("--concorrenza", type=int, default=64, help="Client concorrenti nel benchmark")
+    args = parser.parse_args()
+
+    modelli = carica_modelli(args.modelli, args.pipeline)
+    if not modelli:
+        parser.error(f"nessun modello in {args.modelli!r}: esegui prima 'python -m utils.modelli'")
+
+    if not args.benchmark:
+        try:
+            asyncio.run(avvia_server(modelli, args.host, args.porta, args.max_batch, args.scadenza_ms))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    configurazioni = {'senza batching': 1, f'batch fino a {args.max_batch}': args.max_batch}
+    for titolo, max_batch in configurazioni.items():
+        risultati = asyncio.run(benchmark(modelli, args.richieste, args.concorrenza, max_batch, args.scadenza_ms))
+        print(f"\n--- {titolo} ({args.concorrenza} client, scadenza {args.scadenza_ms} ms) ---")
+        for nome, r in risultati.items():
+            print(f"  {nome:<12} p50: {r['latenza_p50_ms']:8.3f} ms  p99: {r['latenza_p99_ms']:8.3f} ms  "
+                  f"throughput: {r['throughput_rps']:9.0f} richieste/s  batch medio: {r['batch_medio']:6.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+# Validazione incrociata e curve di apprendimento in parallelo per i classificatori.
+#
+# Gli script di KNN, albero decisionale e MLP misurano l'accuratezza su UNA sola divisione
+# train/test (70/30): con un altro random_state il numero cambia anche di qualche punto.
+# La k-fold stratificata divide i dati in k parti con le stesse proporzioni di classi e
+# usa ognuna, a turno, come test set: la media delle k accuratezze è molto più stabile.
+#
+# Con dataset grandi addestrare k modelli uno dopo l'altro è lento, quindi:
+#
+# - ogni fold viene valutata in un processo separato; X e y vengono letti dalla memoria
+#   condivisa (o direttamente dal file, se sono in memory-map come quelli di utils/dataset.py)
+#   e la divisione in fold è un solo array di interi piccoli, anch'esso condiviso;
+# - lo StandardScaler viene adattato UNA volta per fold (solo sulla parte di training) e
+#   riusato per tutti i punti della curva di apprendimento e per il test set;
+# - le predizioni vengono fatte a blocchi e accumulate in una matrice di confusione
+#   incrementale: non teniamo in memoria tutti gli y_pred, ma otteniamo comunque
+#   l'accuratezza e la matrice di confusione che stampano gli script.
+#
+# Esempi (dalla cartella principale del progetto):
+#   python -m utils.validazione knn --fold 5
+#   python -m utils.validazione mlp --curva --grafico curva_mlp.png
+#   python -m utils.validazione albero --dati dati/classificazione_n10000000_s42 --processi 4
+import argparse
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from utils.metriche import MatriceConfusioneIncrementale
+
+# Dati condivisi visti da ciascun processo (impostati da _inizializza_processo)
+_DATI = {}
+_SEGMENTI = []
+
+DIMENSIONE_BLOCCO = 65536 # Righe predette insieme
+
+
+# --- Condivisione dei dati con i processi ---
+
+def _descrivi(array):
+    """Restituisce (segmento, descrittore) per rendere `array` visibile agli altri processi.
+
+    Un array in memory-map viene riaperto dal file (segmento None); gli altri vengono
+    copiati una volta in memoria condivisa.
+    """
+    if isinstance(array, np.memmap) and array.filename is not None and array.flags.c_contiguous:
+        return None, ('file', array.filename, array.offset, array.shape, array.dtype.str)
+    array = np.ascontiguousarray(array)
+    segmento = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=segmento.buf)[...] = array
+    return segmento, ('memoria', segmento.name, 0, array.shape, array.dtype.str)
+
+
+def _collega(descrittore):
+    tipo, nome, offset, forma, dtype = descrittore
+    if tipo == 'file':
+        return np.memmap(nome, dtype=np.dtype(dtype), mode='r', offset=offset, shape=forma)
+    segmento = shared_memory.SharedMemory(name=nome)
+    _SEGMENTI.append(segmento) # Teniamo un riferimento: la vista usa il suo buffer
+    return np.ndarray(forma, dtype=np.dtype(dtype), buffer=segmento.buf)
+
+
+def _inizializza_processo(descrittori):
+    """Eseguita una volta per processo: collega X, y e la divisione in fold senza copiarli."""
+    from threadpoolctl import threadpool_limits
+
+    # Un thread BLAS per processo: il parallelismo lo fa già il pool
+    threadpool_limits(1)
+    for nome_array, descrittore in descrittori.items():
+        _DATI[nome_array] = _collega(descrittore)
+
+
+# --- Lavoro di una fold ---
+
+def assegna_fold(y, n_fold=5, random_state=42):
+    """Numero della fold di test (0..n_fold-1) di ogni riga, come StratifiedKFold(shuffle=True)."""
+    from sklearn.model_selection import StratifiedKFold
+
+    fold = np.empty(len(y), dtype=np.int8 if n_fold < 128 else np.int32)
+    divisore = StratifiedKFold(n_splits=n_fold, shuffle=True, random_state=random_state)
+    for i, (_, indici_test) in enumerate(divisore.split(np.zeros((len(y), 1)), y)):
+        fold[indici_test] = i
+    return fold
+
+
+def _predici_a_blocchi(modello, X, indici, y, scaler, classi, dimensione_blocco):
+    """Predice le righe `indici` di X a blocchi e le accumula in una matrice di confusione."""
+    confusione = MatriceConfusioneIncrementale(classi)
+    for inizio in range(0, len(indici), dimensione_blocco):
+        blocco = indici[inizio:inizio + dimensione_blocco]
+        X_blocco = X[blocco]
+        if scaler is not None:
+            X_blocco = scaler.transform(X_blocco)
+        confusione.aggiorna(y[blocco], modello.predict(X_blocco))
+    return confusione
+
+
+def _valuta_fold(fold, parametri, dati=None):
+    """Addestra e valuta il modello sulla fold `fold` per ogni dimensione del training set."""
+    from sklearn.preprocessing import StandardScaler
+
+    dati = _DATI if dati is None else dati
+    X, y, fold_di = dati['X'], dati['y'], dati['fold']
+    indici_train = np.flatnonzero(fold_di != fold)
+    indici_test = np.flatnonzero(fold_di == fold)
+    classi, blocco = parametri['classi'], parametri['dimensione_blocco']
+
+    # Ordine casuale (ma riproducibile) del training set: le curve di apprendimento usano
+    # i primi n campioni, quindi ogni sottoinsieme contiene quelli più piccoli.
+    rng = np.random.default_rng([parametri['random_state'], fold])
+    ordine = rng.permutation(len(indici_train))
+    X_train, y_train = X[indici_train], y[indici_train] # Una sola lettura del training set
+    scaler = None
+    if parametri['standardizza']:
+        # Scaler della fold: adattato solo sul training (il test set non viene mai visto),
+        # calcolato una volta e riusato per ogni dimensione della curva
+        scaler = StandardScaler()
+        X_train = scaler.fit_transform(X_train)
+
+    risultati = []
+    for punto, dimensione in enumerate(parametri['dimensioni']):
+        # Frazione del training della fold o numero di campioni; righe tenute nell'ordine
+        # originale, così con la dimensione 1.0 il modello vede gli stessi dati di cross_val_score
+        n = min(int(round(dimensione * len(ordine))) if dimensione <= 1 else int(dimensione), len(ordine))
+        scelti = np.sort(ordine[:n])
+        modello = copy.deepcopy(parametri['modello'])
+        inizio = time.perf_counter()
+        modello.fit(X_train[scelti], y_train[scelti])
+        durata_fit = time.perf_counter() - inizio
+        inizio = time.perf_counter()
+        # Lo scaler viene applicato blocco per blocco: X di test non viene copiato tutto insieme
+        confusione_test = _predici_a_blocchi(modello, X, indici_test, y, scaler, classi, blocco)
+        durata_predict = time.perf_counter() - inizio
+        risultato = {'fold': int(fold), 'punto': punto, 'n_train': int(n), 'accuratezza_test': confusione_test.accuratezza,
+                     'matrice_confusione': confusione_test.matrice, 'tempo_fit_s': durata_fit,
+                     'tempo_predict_s': durata_predict}
+        if parametri['punteggio_train']:
+            risultato['accuratezza_train'] = _predici_a_blocchi(modello, X_train, scelti, y_train,
+                                                                None, classi, blocco).accuratezza
+        risultati.append(risultato)
+    return risultati
+
+
+def _esegui_fold(modello, X, y, n_fold, dimensioni, standardizza, punteggio_train, processi,
+                 random_state, dimensione_blocco):
+    """Valuta tutte le fold (in parallelo se processi > 1) e restituisce (classi, risultati)."""
+    classi = np.unique(y)
+    fold_di = assegna_fold(y, n_fold, random_state)
+    parametri = {'modello': modello, 'classi': classi, 'dimensioni': sorted(dimensioni), 'standardizza': standardizza,
+                 'punteggio_train': punteggio_train, 'random_state': random_state,
+                 'dimensione_blocco': dimensione_blocco}
+    processi = min(processi or os.cpu_count(), n_fold)
+
+    if processi == 1:
+        dati = {'X': X, 'y': y, 'fold': fold_di}
+        risultati = [r for fold in range(n_fold) for r in _valuta_fold(fold, parametri, dati)]
+    else:
+        segmenti, descrittori = [], {}
+        try:
+            for nome, array in (('X', X), ('y', y), ('fold', fold_di)):
+                segmento, descrittori[nome] = _descrivi(array)
+                if segmento is not None:
+                    segmenti.append(segmento)
+            with ProcessPoolExecutor(max_workers=processi, initializer=_inizializza_processo,
+                                     initargs=(descrittori,)) as pool:
+                risultati = [r for parte in pool.map(_valuta_fold, range(n_fold), [parametri] * n_fold)
+                             for r in parte]
+        finally:
+            for segmento in segmenti:
+                segmento.close()
+                segmento.unlink()
+    return classi, risultati
+
+
+def valida_incrociata(modello, X, y, n_fold=5, standardizza=True, processi=None, random_state=42,
+                      dimensione_blocco=DIMENSIONE_BLOCCO):
+    """K-fold stratificata: addestra `modello` (una copia per fold) e lo valuta su ogni fold.
+
+    - modello: classificatore NON addestrato con fit/predict (es. KNeighborsClassifier(n_neighbors=5)).
+    - standardizza: se True ogni fold usa uno StandardScaler adattato sul proprio training set.
+    - processi: numero di processi (None = tutti i core, 1 = nessun pool).
+
+    Restituisce le accuratezze delle fold, la loro media e deviazione standard e la matrice
+    di confusione sommata su tutte le fold (ogni campione compare una volta come test).
+    """
+    classi, risultati = _esegui_fold(modello, X, y, n_fold, [1.0], standardizza, False, processi,
+                                     random_state, dimensione_blocco)
+    accuratezze = np.array([r['accuratezza_test'] for r in risultati])
+    return {
+        'classi': classi,
+        'accuratezza_fold': accuratezze.tolist(),
+        'accuratezza_media': float(accuratezze.mean()),
+        'accuratezza_std': float(accuratezze.std()),
+        'matrice_confusione': sum(r['matrice_confusione'] for r in risultati),
+        'tempo_fit_s': [r['tempo_fit_s'] for r in risultati],
+    }
+
+
+def curva_apprendimento(modello, X, y, dimensioni=(0.1, 0.325, 0.55, 0.775, 1.0), n_fold=5, standardizza=True,
+                        punteggio_train=True, processi=None, random_state=42, dimensione_blocco=DIMENSIONE_BLOCCO):
+    """Accuratezza di training e di test al crescere del training set, per ogni fold.
+
+    - dimensioni: frazioni (<= 1) del training set di una fold o numeri di campioni.
+    Restituisce 'n_train' (media sulle fold, che possono differire di qualche campione) e, per ogni dimensione, media e deviazione standard sulle fold
+    ('test_media', 'test_std', 'train_media', 'train_std') più i valori di ogni fold.
+    """
+    classi, risultati = _esegui_fold(modello, X, y, n_fold, dimensioni, standardizza, punteggio_train,
+                                     processi, random_state, dimensione_blocco)
+    punti = range(len(dimensioni))
+
+    def per_punto(chiave):
+        # Matrice (punti della curva, fold)
+        return np.array([[r[chiave] for r in risultati if r['punto'] == p] for p in punti])
+
+    curva = {'classi': classi, 'n_train': [int(round(m)) for m in per_punto('n_train').mean(axis=1)]}
+    for chiave in (['test', 'train'] if punteggio_train else ['test']):
+        valori = per_punto(f'accuratezza_{chiave}')
+        curva[f'{chiave}_fold'] = valori
+        curva[f'{chiave}_media'] = valori.mean(axis=1)
+        curva[f'{chiave}_std'] = valori.std(axis=1)
+    curva['tempo_fit_s'] = per_punto('tempo_fit_s').mean(axis=1).tolist()
+    return curva
+
+
+# --- Classificatori degli esempi ---
+
+def classificatore(nome):
+    """Modello non addestrato con gli stessi iperparametri dello script e se standardizzare."""
+    if nome == 'knn':
+        from sklearn.neighbors import KNeighborsClassifier
+        return KNeighborsClassifier(n_neighbors=5), True
+    if nome == 'albero':
+        from sklearn.tree import DecisionTreeClassifier
+        return DecisionTreeClassifier(criterion='gini', max_depth=4, random_state=42), False
+    if nome == 'mlp':
+        from sklearn.neural_network import MLPClassifier
+        return MLPClassifier(hidden_layer_sizes=(100, 50), activation='relu', solver='adam', alpha=0.0001,
+                             learning_rate_init=0.001, max_iter=300, early_stopping=True,
+                             validation_fraction=0.1, n_iter_no_change=10, random_state=42), True
+    raise ValueError(f"Classificatore sconosciuto: {nome!r} (disponibili: knn, albero, mlp)")
+
+
+def dataset_esempio(nome):
+    """Dataset usato dallo script del classificatore `nome`: (X, y)."""
+    from sklearn import datasets
+
+    caricatori = {'knn': datasets.load_iris, 'albero': datasets.load_breast_cancer, 'mlp': datasets.load_digits}
+    return caricatori[nome](return_X_y=True)
+
+
+def _disegna_curva(curva, titolo, percorso):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 5))
+    for chiave, etichetta, colore in (('train', 'Training', 'tab:blue'), ('test', 'Validazione', 'tab:orange')):
+        if f'{chiave}_media' not in curva:
+            continue
+        media, std = curva[f'{chiave}_media'], curva[f'{chiave}_std']
+        plt.plot(curva['n_train'], media, marker='o', color=colore, label=etichetta)
+        plt.fill_between(curva['n_train'], media - std, media + std, color=colore, alpha=0.2)
+    plt.title(titolo)
+    plt.xlabel("Campioni di training")
+    plt.ylabel("Accuratezza")
+    plt.grid(True)
+    plt.legend()
+    plt.savefig(percorso, dpi=100)
+    plt.close('all')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validazione incrociata e curve di apprendimento in parallelo")
+    parser.add_argument("classificatore", choices=['knn', 'albero', 'mlp'])
+    parser.add_argument("--fold", type=int, default=5, help="Numero di fold")
+    parser.add_argument("--curva", action='store_true', help="Calcola anche la curva di apprendimento")
+    parser.add_argument("--dimensioni", nargs='+', type=float, default=[0.1, 0.325, 0.55, 0.775, 1.0],
+                        help="Dimensioni del training set per la curva (frazioni o numeri di campioni)")
+    parser.add_argument("--grafico", default=None, help="File PNG in cui salvare la curva di apprendimento")
+    parser.add_argument("--dati", default=None,
+                        help="Cartella di un dataset creato con 'python -m utils.dataset' (default: quello dello script)")
+    parser.add_argument("--processi", type=int, default=None, help="Numero di processi (default: tutti i core)")
+    args = parser.parse_args()
+
+    modello, standardizza = classificatore(args.classificatore)
+    if args.dati is None:
+        X, y = dataset_esempio(args.classificatore)
+    else:
+        from utils.dataset import carica_dataset
+        X, y = carica_dataset(args.dati)
+    print(f"--- Validazione incrociata {args.fold}-fold: {type(modello).__name__} ---")
+    print(f"Campioni: {X.shape[0]}, features: {X.shape[1]}")
+
+    inizio = time.perf_counter()
+    risultato = valida_incrociata(modello, X, y, n_fold=args.fold, standardizza=standardizza, processi=args.processi)
+    print(f"Accuratezza per fold: {' '.join(f'{a:.3f}' for a in risultato['accuratezza_fold'])}")
+    print(f"Accuratezza media: {risultato['accuratezza_media']:.3f} ± {risultato['accuratezza_std']:.3f} "
+          f"({time.perf_counter() - inizio:.2f} s)")
+    print(f"Matrice di confusione (somma delle fold, classi {risultato['classi'].tolist()}):")
+    print(risultato['matrice_confusione'])
+
+    if args.curva or args.grafico:
+        inizio = time.perf_counter()
+        curva = curva_apprendimento(modello, X, y, dimensioni=args.dimensioni, n_fold=args.fold,
+                                    standardizza=standardizza, processi=args.processi)
+        print(f"\nCurva di apprendimento ({time.perf_counter() - inizio:.2f} s):")
+        print(f"{'n_train':>9} {'train':>14} {'validazione':>14} {'fit':>8}")
+        for i, n in enumerate(curva['n_train']):
+            print(f"{n:>9} {curva['train_media'][i]:>7.3f} ± {curva['train_std'][i]:.3f} "
+                  f"{curva['test_media'][i]:>7.3f} ± {curva['test_std'][i]:.3f} {curva['tempo_fit_s'][i]:>7.2f}s")
+        if args.grafico:
+            _disegna_curva(curva, f"Curva di apprendimento - {type(modello).__name__}", args.grafico)
+            print(f"Grafico salvato in {args.grafico}")
+
+
+if __name__ == "__main__":
+    main()